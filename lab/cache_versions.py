@@ -0,0 +1,86 @@
+"""
+Versioned keys for the sidebar filter-count caches.
+
+The counts live in the shared CACHES backend, so one worker computes them for
+all. Every key embeds its group's version number
+("individual_filter_counts:v7:..."). lab.signals bumps the version after
+a commit that saves, deletes or relinks one of the models the group's counts
+read (FILTER_COUNT_DEPENDENCIES). Every worker therefore switches to a fresh
+key on its next request, and superseded entries expire on their own.
+"""
+from django.apps import apps
+from django.core.cache import cache
+
+# Long: entries are replaced by a version bump, not by expiry.
+FILTER_COUNTS_CACHE_TTL = 60 * 60 * 24
+
+# Cache group -> models (with their subclasses) its counts are computed from.
+FILTER_COUNT_DEPENDENCIES = {
+    "individual_filter_counts": [
+        "lab.Individual",
+        "lab.Family",
+        "lab.Institution",
+        "lab.Project",
+        "lab.Status",
+        "lab.TaggedStatus",
+        "lab.Sample",
+        "lab.SampleType",
+        "lab.Test",
+        "lab.TestType",
+        "lab.Pipeline",
+        "lab.PipelineType",
+        "lab.Analysis",
+        "lab.AnalysisType",
+        "lab.AnalysisReport",
+        "lab.AnalysisRequestForm",
+        "variant.Variant",
+        "variant.Classification",
+        "variant.Annotation",
+        "variant.ACMGEvidenceOverride",
+    ],
+    "variant_filter_counts": [
+        "lab.Status",
+        "lab.TaggedStatus",
+        "variant.Variant",
+        "variant.Classification",
+        "variant.Annotation",
+        "variant.ACMGEvidenceOverride",
+    ],
+    "project_filter_counts": [
+        "lab.Project",
+        "lab.Status",
+        "lab.TaggedStatus",
+    ],
+}
+
+
+def _version_key(group):
+    return f"{group}:version"
+
+
+def versioned_key(group, *parts):
+    """Cache key of `group` at its current version, with optional extra parts."""
+    version = cache.get(_version_key(group), 1)
+    return ":".join([group, f"v{version}", *(str(part) for part in parts)])
+
+
+def bump_cache_versions(*groups):
+    for group in groups:
+        key = _version_key(group)
+        # add + incr, not get + set: concurrent bumps from other workers must not be lost.
+        cache.add(key, 1, None)
+        cache.incr(key)
+
+
+def cache_dependents():
+    """{model: [groups]} for every concrete model the filter counts depend on."""
+    sources = {}
+    for group, labels in FILTER_COUNT_DEPENDENCIES.items():
+        for label in labels:
+            sources.setdefault(apps.get_model(label), []).append(group)
+    dependents = {}
+    for model in apps.get_models():
+        groups = sorted({group for source, names in sources.items() if issubclass(model, source) for group in names})
+        if groups:
+            dependents[model] = groups
+    return dependents
@@ -0,0 +1,266 @@
+"""
+De-identified columnar export of the cohort for notebooks and offline analysis.
+
+`write_columnar_tables` writes individuals, their HPO terms, samples, tests,
+pipelines, analyses, variants and flattened variant annotations as one
+Parquet (or Arrow IPC) file per table. Each file is written in record
+batches straight from a `values_list()` iterator, so memory stays at one
+batch whatever the table size. Columns are typed: dates, timestamps,
+integers, booleans and floats keep their types, so pandas/polars/duckdb
+(or a memory-mapped Arrow file) read them without re-parsing.
+
+No direct identifiers are exported. Names, TC identities, cross identifiers,
+free-text diagnoses and notes are left out; birth dates are reduced to the
+year. Individuals, families and parents appear only as keyed HMAC
+pseudonyms, which are stable between exports (for joins across tables and
+runs) but cannot be reversed without the key.
+
+pyarrow is optional: it is only imported here, and the
+`export_columnar_cohort` command reports when it is missing.
+"""
+import hashlib
+import hmac
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import Case, CharField, Value, When
+from django.db.models.fields.json import KT
+from django.db.models.functions import Coalesce
+
+from .facet_bitmaps import VARIANT_TYPE_LOOKUPS
+from .models import Analysis, Individual, Pipeline, Sample, Test
+from variant.models import Annotation, Variant
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency
+    pa = pq = None
+
+COLUMNAR_BATCH_SIZE = 10000
+COLUMNAR_FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+
+@lru_cache(maxsize=1)
+def _pseudonym_key():
+    return hmac.new(
+        settings.FIELD_ENCRYPTION_KEY.encode("utf-8"), b"lab.columnar_export", hashlib.sha256
+    ).digest()
+
+
+def pseudonym(kind, pk):
+    """Stable, non-reversible stand-in for the primary key of an individual or family."""
+    if pk is None:
+        return None
+    return hmac.new(_pseudonym_key(), f"{kind}:{pk}".encode("utf-8"), hashlib.sha256).hexdigest()[:20]
+
+
+def _individual(pk):
+    return pseudonym("individual", pk)
+
+
+def _family(pk):
+    return pseudonym("family", pk)
+
+
+def _year(value):
+    return value.year if value else None
+
+
+def _float(value):
+    try:
+        return float(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+VARIANT_TYPE = Case(
+    *(When(**{f"{subtype}__isnull": False}, then=Value(label)) for label, subtype in VARIANT_TYPE_LOOKUPS.items()),
+    default=Value("Variant"),
+    output_field=CharField(),
+)
+
+# Table -> (queryset, [(column, field lookup or expression, arrow type, transform)]).
+# Arrow types are names of pyarrow type factories, so this table needs no pyarrow to import.
+COLUMNAR_TABLES = {
+    "individuals": (
+        lambda: Individual.objects.all(),
+        [
+            ("individual", "pk", "string", _individual),
+            ("family", "family_id", "string", _family),
+            ("mother", "mother_id", "string", _individual),
+            ("father", "father_id", "string", _individual),
+            ("sex", "sex", "string", None),
+            ("birth_year", "birth_date", "int32", _year),
+            ("is_index", "is_index", "bool_", None),
+            ("is_affected", "is_affected", "bool_", None),
+            ("is_alive", "is_alive", "bool_", None),
+            ("age_of_onset_in_months", "age_of_onset_in_months", "int32", None),
+            ("icd11_code", "icd11_code", "string", None),
+            ("diagnosis_date", "diagnosis_date", "date32", None),
+            ("council_date", "council_date", "date32", None),
+            ("registration_date", "registration_date", "date32", None),
+            ("created_at", "created_at", "timestamp", None),
+        ],
+    ),
+    "individual_hpo_terms": (
+        lambda: Individual.hpo_terms.through.objects.all(),
+        [
+            ("individual", "individual_id", "string", _individual),
+            ("hpo_term", "term__identifier", "string", None),
+            ("hpo_label", "term__label", "string", None),
+        ],
+    ),
+    "samples": (
+        lambda: Sample.objects.all(),
+        [
+            ("sample_id", "pk", "int64", None),
+            ("individual", "individual_id", "string", _individual),
+            ("sample_type", "sample_type__name", "string", None),
+            ("receipt_date", "receipt_date", "date32", None),
+            ("processing_date", "processing_date", "date32", None),
+        ],
+    ),
+    "tests": (
+        lambda: Test.objects.all(),
+        [
+            ("test_id", "pk", "int64", None),
+            ("sample_id", "sample_id", "int64", None),
+            ("individual", "sample__individual_id", "string", _individual),
+            ("test_type", "test_type__name", "string", None),
+            ("performed_date", "performed_date", "date32", None),
+            ("service_send_date", "service_send_date", "date32", None),
+            ("data_receipt_date", "data_receipt_date", "date32", None),
+        ],
+    ),
+    "pipelines": (
+        lambda: Pipeline.objects.all(),
+        [
+            ("pipeline_id", "pk", "int64", None),
+            ("test_id", "test_id", "int64", None),
+            ("individual", "test__sample__individual_id", "string", _individual),
+            ("pipeline_type", "type__name", "string", None),
+            ("performed_date", "performed_date", "date32", None),
+        ],
+    ),
+    "analyses": (
+        lambda: Analysis.objects.all(),
+        [
+            ("analysis_id", "pk", "int64", None),
+            ("pipeline_id", "pipeline_id", "int64", None),
+            ("individual", "pipeline__test__sample__individual_id", "string", _individual),
+            ("analysis_type", "type__name", "string", None),
+            ("performed_date", "performed_date", "date32", None),
+        ],
+    ),
+    "variants": (
+        lambda: Variant.objects.all(),
+        [
+            ("variant_id", "pk", "int64", None),
+            ("individual", "individual_id", "string", _individual),
+            ("analysis_id", "analysis_id", "int64", None),
+            ("variant_type", VARIANT_TYPE, "string", None),
+            ("assembly_version", "assembly_version", "string", None),
+            ("chromosome", "chromosome", "string", None),
+            ("start", "start", "int64", None),
+            ("end", "end", "int64", None),
+            ("zygosity", "zygosity", "string", None),
+            ("reference", Coalesce("snv__reference", "delins__reference"), "string", None),
+            ("alternate", Coalesce("snv__alternate", "delins__alternate"), "string", None),
+            ("cnv_type", "cnv__cnv_type", "string", None),
+            ("copy_number", "cnv__copy_number", "int32", None),
+            ("sv_type", "sv__sv_type", "string", None),
+            ("repeat_unit", "repeat__repeat_unit", "string", None),
+            ("repeat_count", "repeat__repeat_count", "int32", None),
+            ("created_at", "created_at", "timestamp", None),
+        ],
+    ),
+    "annotations": (
+        lambda: Annotation.objects.all(),
+        [
+            ("annotation_id", "pk", "int64", None),
+            ("variant_id", "variant_id", "int64", None),
+            ("source", "source", "string", None),
+            ("source_version", "source_version", "string", None),
+            ("updated_at", "updated_at", "timestamp", None),
+            ("gene_symbol", KT("data__variants__0__gene_symbol"), "string", None),
+            ("transcript", KT("data__variants__0__transcript"), "string", None),
+            ("effect", KT("data__variants__0__effect"), "string", None),
+            ("hgvs_c", KT("data__variants__0__hgvs_c"), "string", None),
+            ("hgvs_p", KT("data__variants__0__hgvs_p"), "string", None),
+            ("acmg_classification", "acmg_classification", "string", None),
+            ("acmg_alternate_classification", "acmg_alternate_classification", "string", None),
+            ("acmg_score", KT("data__variants__0__acmg_score"), "float64", _float),
+            ("acmg_criteria", "acmg_criteria", "string", None),
+            ("gnomad_exomes_af", KT("data__variants__0__gnomad_exomes_af"), "float64", _float),
+            ("gnomad_genomes_af", KT("data__variants__0__gnomad_genomes_af"), "float64", _float),
+        ],
+    ),
+}
+
+
+def _arrow_type(name):
+    if name == "timestamp":
+        return pa.timestamp("us", tz="UTC")
+    return getattr(pa, name)()
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("The 'pyarrow' package is required for columnar exports. Install it using: pip install pyarrow")
+
+
+def table_schema(table):
+    _require_pyarrow()
+    _, columns = COLUMNAR_TABLES[table]
+    return pa.schema([(name, _arrow_type(type_name)) for name, _, type_name, _ in columns])
+
+
+def record_batches(table, batch_size=COLUMNAR_BATCH_SIZE):
+    """Record batches of one table, read from a single ordered values_list() iterator."""
+    schema = table_schema(table)
+    queryset_factory, columns = COLUMNAR_TABLES[table]
+    rows = queryset_factory().order_by("pk").values_list(*(lookup for _, lookup, _, _ in columns))
+    transforms = [transform for _, _, _, transform in columns]
+
+    def to_batch(batch):
+        arrays = [pa.array(values, type=field.type) for values, field in zip(batch, schema)]
+        return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+    batch = [[] for _ in columns]
+    for row in rows.iterator(chunk_size=batch_size):
+        for values, transform, value in zip(batch, transforms, row):
+            values.append(transform(value) if transform else value)
+        if len(batch[0]) >= batch_size:
+            yield to_batch(batch)
+            batch = [[] for _ in columns]
+    if batch[0]:
+        yield to_batch(batch)
+
+
+def write_columnar_table(table, path, file_format="parquet", batch_size=COLUMNAR_BATCH_SIZE):
+    """Write one table to `path`; returns the number of rows."""
+    schema = table_schema(table)
+    if file_format == "arrow":
+        writer = pa.ipc.new_file(str(path), schema)
+    else:
+        writer = pq.ParquetWriter(str(path), schema, compression="zstd")
+    rows = 0
+    with writer:
+        for batch in record_batches(table, batch_size):
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    return rows
+
+
+def write_columnar_tables(output_dir, file_format="parquet", tables=None, batch_size=COLUMNAR_BATCH_SIZE):
+    """Write the given tables (default: all) into `output_dir`; returns {table: (path, rows)}."""
+    _require_pyarrow()
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    written = {}
+    for table in tables or COLUMNAR_TABLES:
+        path = output_dir / f"{table}{COLUMNAR_FORMATS[file_format]}"
+        written[table] = (path, write_columnar_table(table, path, file_format, batch_size))
+    return written
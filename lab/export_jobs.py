@@ -0,0 +1,182 @@
+"""
+Background exports of the individual and variant lists.
+
+Exporting from the list page creates an `ExportJob` holding the list's filter
+query string and the chosen format, and enqueues `lab.tasks.run_export_job`
+on the django.tasks backend (run by the db_worker service, see TASKS in
+settings), so no web worker is held for the download. The
+task re-applies the filters for the job's user and writes the rows in chunks
+(see lab.individual_export), recording progress as it goes. The file is
+stored under MEDIA_ROOT/exports/, and the user is notified with a download
+link. Meanwhile the job partial polls `export_job_status` over HTMX.
+"""
+import csv
+import io
+import logging
+import os
+import tempfile
+import zipfile
+from types import SimpleNamespace
+
+from django.core.files import File
+from django.http import QueryDict
+from django.urls import reverse
+from django.utils import timezone
+from openpyxl import Workbook
+
+from .filters import IndividualFilter, VariantFilter
+from .individual_export import (
+    EXPORT_CHUNK_SIZE,
+    _chunks,
+    _preferred_id,
+    _statuses_by_object,
+    individual_export_rows,
+)
+from .models import ExportJob, IdentifierType, Individual
+from .services import send_notification
+from variant.models import Variant
+
+logger = logging.getLogger(__name__)
+
+VARIANT_EXPORT_HEADER = [
+    "Individual", "Type", "Chromosome", "Start", "End", "Assembly",
+    "Reference", "Alternate", "Zygosity", "Genes", "Status", "Created At",
+]
+
+VARIANT_SUBTYPES = ["snv", "delins", "cnv", "sv", "repeat"]
+
+
+def variant_export_rows(queryset, user, chunk_size=EXPORT_CHUNK_SIZE):
+    """The header, then one row per variant of `queryset` (newest first)."""
+    primary_type = IdentifierType.objects.filter(use_priority=1).order_by("id").first()
+
+    yield VARIANT_EXPORT_HEADER
+    for variant_ids in _chunks(queryset, chunk_size):
+        variants = list(
+            Variant.objects.filter(pk__in=variant_ids)
+            .order_by("-pk")
+            .select_related("individual", *VARIANT_SUBTYPES)
+            .prefetch_related("genes", "individual__cross_ids__id_type")
+        )
+        statuses = _statuses_by_object(Variant, variant_ids)
+        for variant in variants:
+            subtype = next((getattr(variant, name) for name in VARIANT_SUBTYPES if hasattr(variant, name)), None)
+            yield [
+                _preferred_id(list(variant.individual.cross_ids.all()), 1, primary_type, "NO PRIMARY ID SET"),
+                variant.type,
+                variant.chromosome,
+                variant.start,
+                variant.end,
+                variant.assembly_version,
+                getattr(subtype, "reference", ""),
+                getattr(subtype, "alternate", ""),
+                variant.get_zygosity_display(),
+                "; ".join(gene.symbol for gene in variant.genes.all()),
+                ", ".join(statuses[variant.pk]),
+                variant.created_at.date() if variant.created_at else "",
+            ]
+
+
+# Job kind -> (model, filterset class, row generator)
+EXPORT_SOURCES = {
+    "individuals": (Individual, IndividualFilter, individual_export_rows),
+    "variants": (Variant, VariantFilter, variant_export_rows),
+}
+
+
+def export_queryset(job):
+    """The job's list selection, filtered as the user saw it."""
+    model, filterset_class, _ = EXPORT_SOURCES[job.kind]
+    filterset = filterset_class(
+        QueryDict(job.query), queryset=model.objects.all(), request=SimpleNamespace(user=job.user)
+    )
+    return filterset.qs
+
+
+def _write_csv(rows, handle):
+    text = io.TextIOWrapper(handle, encoding="utf-8-sig", newline="")
+    csv.writer(text).writerows(rows)
+    text.flush()
+    text.detach()
+
+
+def _write_xlsx(rows, handle):
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Export")
+    for row in rows:
+        sheet.append(row)
+    workbook.save(handle)
+
+
+def _write_zip(rows, handle, name):
+    with zipfile.ZipFile(handle, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        with archive.open(f"{name}.csv", "w", force_zip64=True) as member:
+            _write_csv(rows, member)
+
+
+def _tracked(job, rows):
+    """Pass rows through, saving the job's progress every chunk."""
+    processed = 0
+    for position, row in enumerate(rows):
+        if position:
+            processed += 1
+            if processed % EXPORT_CHUNK_SIZE == 0:
+                ExportJob.objects.filter(pk=job.pk).update(processed=processed)
+        yield row
+    job.processed = processed
+
+
+def build_export(job_id):
+    """Build a pending job's file. Returns the job, or None if it was already taken."""
+    claimed = ExportJob.objects.filter(pk=job_id, status="pending").update(status="running")
+    if not claimed:
+        return None
+    job = ExportJob.objects.select_related("user").get(pk=job_id)
+    _, _, export_rows = EXPORT_SOURCES[job.kind]
+    name = f"{job.kind}_export_{timezone.localtime(job.created_at).strftime('%Y%m%d_%H%M')}"
+
+    try:
+        queryset = export_queryset(job)
+        job.total = queryset.count()
+        ExportJob.objects.filter(pk=job.pk).update(total=job.total)
+        rows = _tracked(job, export_rows(queryset, job.user))
+        with tempfile.TemporaryFile() as handle:
+            if job.format == "xlsx":
+                _write_xlsx(rows, handle)
+            elif job.format == "zip":
+                _write_zip(rows, handle, name)
+            else:
+                _write_csv(rows, handle)
+            handle.seek(0)
+            job.file.save(f"{name}.{job.format}", File(handle), save=False)
+    except Exception as exc:
+        logger.exception("Export job %s failed", job.pk)
+        job.status = "failed"
+        job.error = str(exc)
+        job.finished_at = timezone.now()
+        job.save(update_fields=["status", "error", "finished_at"])
+        send_notification(
+            sender=job.user,
+            recipient=job.user,
+            verb="Export Failed",
+            description=f"Your {job.get_kind_display().lower()} export could not be created.",
+            target=job,
+            level="error",
+        )
+        return job
+
+    job.status = "done"
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "total", "processed", "file", "finished_at"])
+    send_notification(
+        sender=job.user,
+        recipient=job.user,
+        verb="Export Ready",
+        description=(
+            f"Your {job.get_kind_display().lower()} export ({job.processed} rows, "
+            f"{os.path.basename(job.file.name)}) is ready: {reverse('lab:export_job_download', args=[job.pk])}"
+        ),
+        target=job,
+        level="success",
+    )
+    return job
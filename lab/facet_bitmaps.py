@@ -0,0 +1,219 @@
+"""
+Optional in-memory bitmap index for the individual list facets.
+
+Most IndividualFilter facets ask for "individuals that have status X / sample
+type Y / test type Z / variant type W / project P". With the
+FACET_BITMAP_INDEX setting on, every (facet, option) pair is held as a boolean
+numpy array over the sorted individual ids. Includes, excludes and ANY/ALL
+modes of any number of facets then combine with bitwise operations, and SQL
+only receives the resulting ids (or their complement, whichever is shorter).
+
+The SQL filters still run for what the bitmaps cannot express: "together"
+sections, ALL mode on related statuses (one object carrying every status),
+and results too large to pass as an id list.
+
+The process-wide index is built on first use. After a change, lab.signals
+increments the shared cache version. This process patches the affected
+individuals in place if its index was at the version just before; otherwise
+(another change landed in between), and in other processes, the index is
+rebuilt on the next filter.
+"""
+import threading
+from collections import defaultdict
+
+import numpy as np
+from django.apps import apps
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db.models import Q
+
+from .models import Analysis, Individual, Pipeline, Sample, TaggedStatus, Test
+from variant.models import Variant
+
+FACET_BITMAP_VERSION_KEY = "facet_bitmap_version"
+# Longest id list sent to SQL as `pk IN (...)`; larger results use the SQL filters.
+FACET_BITMAP_MAX_SQL_IDS = 20000
+
+VARIANT_TYPE_LOOKUPS = {"SNV": "snv", "CNV": "cnv", "SV": "sv", "Repeat": "repeat"}
+
+# Filter field -> (model, path from the model to its individual, option
+# lookup). Statuses (lookup None) come from TaggedStatus.
+BITMAP_FACETS = {
+    "status": (Individual, "pk", None),
+    "projects": (Individual, "pk", "projects__name"),
+    "samples__status": (Sample, "individual", None),
+    "samples__sample_type": (Sample, "individual", "sample_type__name"),
+    "samples__tests__status": (Test, "sample__individual", None),
+    "samples__tests__test_type": (Test, "sample__individual", "test_type__name"),
+    "samples__tests__pipelines__status": (Pipeline, "test__sample__individual", None),
+    "samples__tests__pipelines__type": (Pipeline, "test__sample__individual", "type__name"),
+    "samples__tests__pipelines__analyses__status": (Analysis, "pipeline__test__sample__individual", None),
+    "samples__tests__pipelines__analyses__type": (Analysis, "pipeline__test__sample__individual", "type__name"),
+    "variants__status": (Variant, "individual", None),
+    "variant_type": (Variant, "individual", VARIANT_TYPE_LOOKUPS),
+}
+
+# Facets whose ALL mode means "an individual with every value". For related
+# statuses it means one object with every status, which a bitmap cannot tell.
+ALL_MODE_FACETS = {
+    "status",
+    "projects",
+    "samples__sample_type",
+    "samples__tests__test_type",
+    "samples__tests__pipelines__type",
+    "samples__tests__pipelines__analyses__type",
+    "variant_type",
+}
+
+# Facets whose filter has no exclude side.
+INCLUDE_ONLY_FACETS = {"projects"}
+
+
+def _facet_rows(field, individual_ids=None):
+    """(individual id, option value) pairs of one facet, optionally for some individuals only."""
+    model, path, lookup = BITMAP_FACETS[field]
+    objects = model._base_manager.all()
+    if individual_ids is not None:
+        objects = objects.filter(**{f"{path}__in": individual_ids})
+
+    if isinstance(lookup, dict):
+        for label, subtype in lookup.items():
+            for individual_id in objects.filter(**{f"{subtype}__isnull": False}).values_list(path, flat=True):
+                yield individual_id, label
+        return
+    if lookup is not None:
+        yield from objects.exclude(**{f"{lookup}__isnull": True}).values_list(path, lookup)
+        return
+
+    owners = dict(objects.values_list("pk", path))
+    tagged = TaggedStatus.objects.filter(content_type=ContentType.objects.get_for_model(model))
+    if individual_ids is not None:
+        tagged = tagged.filter(object_id__in=list(owners))
+    for object_id, name in tagged.values_list("object_id", "tag__name"):
+        if object_id in owners:
+            yield owners[object_id], name
+
+
+class FacetBitmapIndex:
+    """Boolean bitmaps over the sorted individual ids, one per (facet, option value)."""
+
+    def __init__(self, individual_ids):
+        self.ids = np.array(sorted(individual_ids), dtype=np.int64)
+        self.present = np.ones(len(self.ids), dtype=bool)
+        self.bitmaps = {field: {} for field in BITMAP_FACETS}
+        for field in BITMAP_FACETS:
+            self._set_bits(field, _facet_rows(field))
+
+    def _positions(self, individual_ids):
+        """Positions of the given ids, and whether all of them are indexed."""
+        wanted = np.fromiter(individual_ids, dtype=np.int64)
+        if not len(self.ids):
+            return wanted[:0], not len(wanted)
+        positions = np.minimum(np.searchsorted(self.ids, wanted), len(self.ids) - 1)
+        found = self.ids[positions] == wanted
+        return positions[found], bool(found.all())
+
+    def _set_bits(self, field, rows):
+        by_value = defaultdict(list)
+        for individual_id, value in rows:
+            if individual_id is not None and value:
+                by_value[value].append(individual_id)
+        bitmaps = self.bitmaps[field]
+        for value, individual_ids in by_value.items():
+            positions, _ = self._positions(individual_ids)
+            if value not in bitmaps:
+                bitmaps[value] = np.zeros(len(self.ids), dtype=bool)
+            bitmaps[value][positions] = True
+
+    def refresh(self, individual_ids):
+        """Re-read the facets of some individuals in place; False if one of them is not indexed."""
+        individual_ids = sorted(set(individual_ids) - {None})
+        positions, complete = self._positions(individual_ids)
+        if not complete:
+            return False
+        existing = list(Individual.objects.filter(pk__in=individual_ids).values_list("pk", flat=True))
+        self.present[positions] = np.isin(self.ids[positions], existing)
+        for field in BITMAP_FACETS:
+            for bitmap in self.bitmaps[field].values():
+                bitmap[positions] = False
+            self._set_bits(field, _facet_rows(field, individual_ids))
+        return True
+
+    def everyone(self):
+        return self.present.copy()
+
+    def matching(self, field, values, require_all=False):
+        """Individuals with any (or, with `require_all`, every) one of the option values."""
+        empty = np.zeros(len(self.ids), dtype=bool)
+        bitmaps = [self.bitmaps[field].get(value, empty) for value in values]
+        combine = np.logical_and if require_all else np.logical_or
+        return combine.reduce(bitmaps) if bitmaps else self.everyone()
+
+    def id_filter(self, bitmap):
+        """Q selecting the individuals in `bitmap`, or None when both it and its complement are too long."""
+        selected = bitmap & self.present
+        if np.count_nonzero(selected) <= FACET_BITMAP_MAX_SQL_IDS:
+            return Q(pk__in=self.ids[selected].tolist())
+        rest = self.present & ~selected
+        if np.count_nonzero(rest) <= FACET_BITMAP_MAX_SQL_IDS:
+            return ~Q(pk__in=self.ids[rest].tolist())
+        return None
+
+
+_index_lock = threading.Lock()
+_index_state = {"version": None, "index": None}
+
+
+def _version():
+    return cache.get(FACET_BITMAP_VERSION_KEY, 1)
+
+
+def get_facet_bitmap_index():
+    """The process-wide index, or None when FACET_BITMAP_INDEX is off."""
+    if not settings.FACET_BITMAP_INDEX:
+        return None
+    version = _version()
+    if _index_state["version"] != version:
+        with _index_lock:
+            if _index_state["version"] != version:
+                _index_state["index"] = FacetBitmapIndex(Individual.objects.values_list("pk", flat=True))
+                _index_state["version"] = version
+    return _index_state["index"]
+
+
+def refresh_facet_bitmaps(individual_ids=None):
+    """
+    Record a facet change for the given individuals (None: anything may have
+    changed). Other processes rebuild; this one patches its index when it can.
+    """
+    if not settings.FACET_BITMAP_INDEX:
+        return
+    with _index_lock:
+        cache.add(FACET_BITMAP_VERSION_KEY, 1, None)
+        version = cache.incr(FACET_BITMAP_VERSION_KEY)
+        index = _index_state["index"]
+        # Patch only if no other change landed in between; otherwise the next read rebuilds.
+        if (
+            _index_state["version"] == version - 1
+            and index is not None
+            and individual_ids is not None
+            and index.refresh(individual_ids)
+        ):
+            _index_state["version"] = version
+
+
+def facet_models():
+    """Related models behind the facets, with their subclasses (e.g. the concrete Variant types)."""
+    sources = tuple({model for model, _, _ in BITMAP_FACETS.values() if model is not Individual})
+    return [model for model in apps.get_models() if issubclass(model, sources)]
+
+
+def facet_individual_ids(obj):
+    """Ids of the individuals whose facets depend on `obj`."""
+    if isinstance(obj, Individual):
+        return {obj.pk}
+    for model, path, _ in BITMAP_FACETS.values():
+        if model is not Individual and isinstance(obj, model):
+            return set(model._base_manager.filter(pk=obj.pk).values_list(path, flat=True)) - {None}
+    return set()
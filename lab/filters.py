@@ -1,4 +1,5 @@
 import django_filters
+import numpy as np
 from django import forms
 from django.db.models import Count, Exists, OuterRef, Q
 from django.contrib.contenttypes.models import ContentType
@@ -6,7 +7,9 @@ from .models import (
     Individual, Sample, Project, SampleType, TestType, Status, PipelineType,
     Institution, Test, Pipeline, Analysis, AnalysisType, TaggedStatus, Family,
 )
-from .search_utils import filter_normalized_contains, normalized_contains, normalized_contains_q
+from .search_utils import filter_normalized_contains, normalized_contains_q
+from .name_index import full_name_q
+from .facet_bitmaps import ALL_MODE_FACETS, BITMAP_FACETS, INCLUDE_ONLY_FACETS, get_facet_bitmap_index
 from variant.models import ACMGEvidenceOverride, Variant, Annotation
 from variant.templatetags.variant_filters import ACMG_CRITERIA_INFO
 
@@ -16,6 +19,16 @@ FILTER_MODE_ALL = "all"
 FILTER_MODE_TOGETHER = "together"
 FILTER_GROUP_MODE_ANY = "any"
 
+# Individual filter fields whose "together" mode applies to the whole group.
+TOGETHER_SECTIONS = (
+    ("institution__city", "institution__speciality", "institution__center_name"),
+    ("samples__sample_type", "samples__status"),
+    ("samples__tests__test_type", "samples__tests__status"),
+    ("samples__tests__pipelines__type", "samples__tests__pipelines__status"),
+    ("samples__tests__pipelines__analyses__type", "samples__tests__pipelines__analyses__status"),
+    ("variant_type", "variants__status", "variants__annotation_acmg_classification", "variants__acmg_evidence"),
+)
+
 def _request_targets_table(request, target_id):
     return bool(
         getattr(request, "htmx", False)
@@ -254,34 +267,25 @@ def _format_annotation_choice_label(value):
     return str(value).replace("_", " ").replace("-", " ").title()
 
 
+ANNOTATION_ACMG_CLASSIFICATION_FIELDS = ("acmg_classification", "acmg_alternate_classification")
+
+
 def _annotation_acmg_classification_choices():
     values = set()
-    for lookup in ("data__variants__0__acmg_classification", "data__acmg_classification"):
-        values.update(
-            value
-            for value in Annotation.objects.filter(source__icontains="genebe")
-            .exclude(**{f"{lookup}__isnull": True})
-            .exclude(**{lookup: ""})
-            .values_list(lookup, flat=True)
-            if value
-        )
+    for field in ANNOTATION_ACMG_CLASSIFICATION_FIELDS:
+        values.update(Annotation.objects.exclude(**{field: ""}).order_by().values_list(field, flat=True).distinct())
     return [(value, _format_annotation_choice_label(value)) for value in sorted(values)]
 
 
 def _annotation_acmg_classification_q(relation_path, values):
+    """A GeneBe annotation matches on its variant record's or its top-level classification."""
     if not values:
         return Q()
-    return Q(
-        **{
-            f"{relation_path}__source__icontains": "genebe",
-            f"{relation_path}__data__variants__0__acmg_classification__in": values,
-        }
-    ) | Q(
-        **{
-            f"{relation_path}__source__icontains": "genebe",
-            f"{relation_path}__data__acmg_classification__in": values,
-        }
-    )
+    prefix = f"{relation_path}__" if relation_path else ""
+    q = Q()
+    for field in ANNOTATION_ACMG_CLASSIFICATION_FIELDS:
+        q |= Q(**{f"{prefix}{field}__in": values})
+    return q
 
 
 def _filter_annotation_acmg_classification_values(queryset, relation_path, values, mode):
@@ -463,68 +467,45 @@ class IndividualFilter(django_filters.FilterSet):
     )
 
     def filter_hpo_terms(self, queryset, name, value):
-        from ontologies.utils import get_descendants, get_descendants_from_obo
-        
-        # 1. Handle Inclusion (OR logic for now, or keep existing logic)
-        # Existing logic: individuals who have ANY of these terms
+        from ontologies.utils import hpo_descendant_term_ids
+
+        # 1. Handle Inclusion: each selected term also matches its descendants.
         if value:
             mode = _get_filter_mode(self.data, name)
-            term_groups = []
-
-            for selected_value in value:
-                selected_db_ids = set()
-                selected_obo_ids = set()
-                try:
-                    selected_db_ids.add(int(selected_value))
-                except (ValueError, TypeError):
-                    selected_obo_ids.add(str(selected_value))
-
-                relevant_term_ids = set()
-                if selected_db_ids:
-                    relevant_term_ids.update(get_descendants(selected_db_ids))
-                if selected_obo_ids:
-                    relevant_term_ids.update(get_descendants_from_obo(selected_obo_ids))
-                if relevant_term_ids:
-                    term_groups.append(relevant_term_ids)
-
             if mode == FILTER_MODE_ALL:
-                for term_ids in term_groups:
-                    queryset = queryset.filter(hpo_terms__in=term_ids)
+                for selected_value in value:
+                    queryset = queryset.filter(
+                        hpo_terms__in=hpo_descendant_term_ids([selected_value])
+                    )
             else:
-                all_relevant_term_ids = set()
-                for term_ids in term_groups:
-                    all_relevant_term_ids.update(term_ids)
-                queryset = queryset.filter(hpo_terms__in=all_relevant_term_ids)
+                queryset = queryset.filter(hpo_terms__in=hpo_descendant_term_ids(value))
 
         # 2. Handle Exclusion
-        data = self.data
-        if hasattr(data, 'getlist'):
-            excluded_values = data.getlist(f"{name}__exclude")
-        else:
-            excluded_values = data.get(f"{name}__exclude", [])
-            if not isinstance(excluded_values, list):
-                excluded_values = [excluded_values]
-        
+        excluded_values = _exclude_values_for_data(self.data, name)
         if excluded_values:
-            ex_db_ids = set()
-            ex_obo_ids = set()
-            for v in excluded_values:
-                try:
-                    ex_db_ids.add(int(v))
-                except (ValueError, TypeError):
-                    ex_obo_ids.add(str(v))
-            
-            ex_term_ids = set()
-            if ex_db_ids:
-                ex_term_ids.update(get_descendants(ex_db_ids))
-            if ex_obo_ids:
-                ex_term_ids.update(get_descendants_from_obo(ex_obo_ids))
-                
-            if ex_term_ids:
-                queryset = queryset.exclude(hpo_terms__in=ex_term_ids)
+            queryset = queryset.exclude(hpo_terms__in=hpo_descendant_term_ids(excluded_values))
 
         return queryset.distinct()
 
+    similar_to = django_filters.NumberFilter(
+        method='filter_similar_to',
+        label="Phenotypically Similar To",
+    )
+
+    def filter_similar_to(self, queryset, name, value):
+        from .phenotype_similarity import SIMILAR_FILTER_LIMIT, get_phenotype_similarity_index
+
+        if value is None:
+            return queryset
+        try:
+            min_score = float(self.data.get('similar_min_score') or 0)
+        except (TypeError, ValueError):
+            min_score = 0.0
+        ranked = get_phenotype_similarity_index().similar_to(
+            int(value), method="lin", limit=SIMILAR_FILTER_LIMIT, min_score=min_score,
+        )
+        return queryset.filter(pk__in=[pk for pk, _ in ranked])
+
     class Meta:
         model = Individual
         fields = ['sex', 'family']
@@ -829,17 +810,7 @@ class IndividualFilter(django_filters.FilterSet):
         search_query = normalized_contains_q(queryset, ["cross_ids__id_value", "id"], value)
         request_user = getattr(getattr(self, "request", None), "user", None)
         if request_user and request_user.has_perm("lab.view_sensitive_data"):
-            matching_name_ids = []
-            name_queryset = (
-                queryset.prefetch_related(None)
-                .only("pk", "full_name")
-                .order_by()
-            )
-            for individual in name_queryset.iterator(chunk_size=1000):
-                if normalized_contains(individual.full_name, value):
-                    matching_name_ids.append(individual.pk)
-            if matching_name_ids:
-                search_query |= Q(pk__in=matching_name_ids)
+            search_query |= full_name_q(value)
         return queryset.filter(search_query).distinct()
 
     def filter_variant_type(self, queryset, name, value):
@@ -970,10 +941,19 @@ class IndividualFilter(django_filters.FilterSet):
         if self.data.get("filter_group_mode") == FILTER_GROUP_MODE_ANY:
             return self._filter_queryset_any_group(queryset)
         search_value = self.form.cleaned_data.get("search")
+        index = get_facet_bitmap_index()
+        bitmap_fields = self._bitmap_fields(index)
+        bitmap_filter = None
+        if bitmap_fields:
+            bitmap_filter = index.id_filter(self._bitmap_result(index, bitmap_fields))
+            if bitmap_filter is None:
+                bitmap_fields = {}
         for name, value in self.form.cleaned_data.items():
-            if name == "search":
+            if name == "search" or name in bitmap_fields:
                 continue
             queryset = self.filters[name].filter(queryset, value)
+        if bitmap_filter is not None:
+            queryset = queryset.filter(bitmap_filter)
         queryset = self._apply_together_constraints(queryset)
         queryset = self._apply_variant_acmg_evidence_exclusions(queryset).distinct()
         if search_value:
@@ -988,8 +968,22 @@ class IndividualFilter(django_filters.FilterSet):
         combined_queryset = queryset.none()
         has_include_group = False
 
+        # Include groups the bitmap index can answer become one id filter.
+        index = get_facet_bitmap_index()
+        bitmap_groups = self._bitmap_fields(index)
+        if bitmap_groups:
+            union = np.logical_or.reduce([
+                self._bitmap_result(index, {name: spec}) for name, spec in bitmap_groups.items()
+            ])
+            bitmap_filter = index.id_filter(union)
+            if bitmap_filter is None:
+                bitmap_groups = {}
+            else:
+                has_include_group = True
+                combined_queryset = base_queryset.filter(bitmap_filter)
+
         for name, filter_instance in self.filters.items():
-            if name == "search":
+            if name == "search" or name in bitmap_groups:
                 continue
             value = self.form.cleaned_data.get(name)
             if self._is_empty_filter_value(value):
@@ -1010,6 +1004,40 @@ class IndividualFilter(django_filters.FilterSet):
 
         return result_queryset.distinct()
 
+    def _bitmap_fields(self, index):
+        """
+        {field: (included values, ALL mode, excluded values)} for the submitted
+        facets the bitmap index can evaluate; empty when the index is off.
+        Like the method filters they replace, a facet without included values
+        is left alone.
+        """
+        if index is None:
+            return {}
+        fields = {}
+        for name in BITMAP_FACETS:
+            values = self._values_for(name)
+            if not values:
+                continue
+            excluded = self._exclude_values_for(name)
+            mode = _get_filter_mode(self.data, name, allow_together=True)
+            section = next((group for group in TOGETHER_SECTIONS if name in group), (name,))
+            if mode == FILTER_MODE_TOGETHER or self._section_uses_together(section):
+                continue
+            if mode == FILTER_MODE_ALL and name not in ALL_MODE_FACETS:
+                continue
+            if excluded and name in INCLUDE_ONLY_FACETS:
+                continue
+            fields[name] = (values, mode == FILTER_MODE_ALL, excluded)
+        return fields
+
+    def _bitmap_result(self, index, fields):
+        bitmap = index.everyone()
+        for name, (values, require_all, excluded) in fields.items():
+            bitmap &= index.matching(name, values, require_all)
+            if excluded:
+                bitmap &= ~index.matching(name, excluded)
+        return bitmap
+
     def _is_empty_filter_value(self, value):
         if value is None or value == "":
             return True
@@ -1346,11 +1374,12 @@ class VariantFilter(django_filters.FilterSet):
             "end",
             "genes__symbol",
         ]
+        search_query = normalized_contains_q(queryset, search_fields, value)
         request_user = getattr(getattr(self, "request", None), "user", None)
         if request_user and request_user.has_perm("lab.view_sensitive_data"):
-            search_fields.append("individual__full_name")
+            search_query |= full_name_q(value, prefix="individual__")
 
-        return filter_normalized_contains(queryset, search_fields, value).distinct()
+        return queryset.filter(search_query).distinct()
 
     def filter_gene(self, queryset, name, value):
         return filter_normalized_contains(queryset, ["genes__symbol"], value).distinct()
@@ -0,0 +1,172 @@
+"""
+HPO term enrichment of a cohort against the rest of the database.
+
+The annotated population is the individual x term incidence matrix of
+`PhenotypeSimilarityIndex` with every annotation propagated to its ancestors,
+stored as CSR arrays. For a cohort the per-term counts are one `np.bincount`
+over the cohort's rows; the one-sided Fisher exact test (over-representation)
+is the hypergeometric upper tail, evaluated for all terms at once in log
+space from a table of log-factorials, and p-values are adjusted with
+Benjamini-Hochberg.
+"""
+import hashlib
+
+import numpy as np
+from django.core.cache import cache
+
+from ontologies.utils import HPO_DESCENDANT_CACHE_VERSION_KEY, get_hpo_graph
+
+from .phenotype_similarity import SIMILARITY_VERSION_KEY, get_phenotype_similarity_index
+
+ENRICHMENT_CACHE_TTL = 60 * 30
+ENRICHMENT_ROOT = "HP:0000001"
+DEFAULT_ENRICHMENT_LIMIT = 50
+
+
+class HPOIncidence:
+    """Propagated individual x term incidence (CSR) over an index's term universe."""
+
+    def __init__(self, index):
+        self.individual_pks = index.individual_pks
+        self.terms = index.universe
+        rows = []
+        for start, end in zip(index.profile_indptr[:-1].tolist(), index.profile_indptr[1:].tolist()):
+            rows.append(np.flatnonzero(index.ancestor_matrix[index.profile_terms[start:end]].any(axis=0)))
+        self.indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        self.indptr[1:] = np.cumsum([len(row) for row in rows])
+        self.columns = np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+        self.term_totals = np.bincount(self.columns, minlength=len(self.terms))
+
+    def __len__(self):
+        return len(self.individual_pks)
+
+    def cohort_rows(self, individual_pks):
+        return np.flatnonzero(np.isin(self.individual_pks, np.asarray(list(individual_pks), dtype=np.int64)))
+
+    def term_counts(self, rows):
+        starts = self.indptr[rows]
+        lengths = self.indptr[rows + 1] - starts
+        total = int(lengths.sum())
+        if not total:
+            return np.zeros(len(self.terms), dtype=np.int64)
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        return np.bincount(self.columns[offsets + np.arange(total)], minlength=len(self.terms))
+
+
+def _log_choose(log_factorial, n, k):
+    return log_factorial[n] - log_factorial[k] - log_factorial[n - k]
+
+
+def hypergeometric_sf(k, population, successes, draws):
+    """
+    P(X >= k) for X ~ Hypergeometric(population, successes, draws), elementwise
+    over the arrays `k` and `successes` (population and draws are scalars).
+    """
+    k = np.asarray(k, dtype=np.int64)
+    successes = np.asarray(successes, dtype=np.int64)
+    log_factorial = np.concatenate(([0.0], np.cumsum(np.log(np.arange(1, population + 1)))))
+    upper = np.minimum(successes, draws)
+    log_total = _log_choose(log_factorial, population, draws)
+
+    log_tail = np.full(k.shape, -np.inf)
+    span = int((upper - k).max()) + 1 if k.size else 0
+    for offset in range(max(span, 0)):
+        x = k + offset
+        valid = (x <= upper) & (draws - x <= population - successes)
+        if not valid.any():
+            continue
+        xs = x[valid]
+        log_pmf = (
+            _log_choose(log_factorial, successes[valid], xs)
+            + _log_choose(log_factorial, population - successes[valid], draws - xs)
+            - log_total
+        )
+        log_tail[valid] = np.logaddexp(log_tail[valid], log_pmf)
+    return np.minimum(np.exp(log_tail), 1.0)
+
+
+def benjamini_hochberg(p_values):
+    p_values = np.asarray(p_values, dtype=float)
+    if not p_values.size:
+        return p_values
+    order = np.argsort(p_values)
+    ranked = p_values[order] * len(p_values) / np.arange(1, len(p_values) + 1)
+    adjusted = np.minimum.accumulate(ranked[::-1])[::-1]
+    result = np.empty_like(adjusted)
+    result[order] = np.minimum(adjusted, 1.0)
+    return result
+
+
+def compute_enrichment(incidence, individual_pks):
+    """
+    Rows for every term carried by at least one cohort member, ordered by p-value:
+    dicts with identifier, cohort_count, cohort_size, background_count,
+    background_size, fold, p_value and q_value.
+    """
+    rows = incidence.cohort_rows(individual_pks)
+    cohort_size = len(rows)
+    population = len(incidence)
+    if not cohort_size or not population:
+        return []
+
+    counts = incidence.term_counts(rows)
+    tested = np.flatnonzero(counts > 0)
+    tested = tested[[incidence.terms[column] != ENRICHMENT_ROOT for column in tested.tolist()]]
+    if not tested.size:
+        return []
+    k = counts[tested]
+    totals = incidence.term_totals[tested]
+    p_values = hypergeometric_sf(k, population, totals, cohort_size)
+    q_values = benjamini_hochberg(p_values)
+    fold = (k / cohort_size) / (totals / population)
+
+    order = np.lexsort((-k, p_values))
+    return [
+        {
+            "identifier": incidence.terms[int(tested[i])],
+            "cohort_count": int(k[i]),
+            "cohort_size": cohort_size,
+            "background_count": int(totals[i]),
+            "background_size": population,
+            "fold": float(fold[i]),
+            "p_value": float(p_values[i]),
+            "q_value": float(q_values[i]),
+        }
+        for i in order.tolist()
+    ]
+
+
+_incidence_state = {"index": None, "incidence": None}
+
+
+def get_hpo_incidence():
+    """Incidence matrix of the current similarity index (rebuilt together with it)."""
+    index = get_phenotype_similarity_index()
+    if _incidence_state["index"] is not index:
+        _incidence_state["incidence"] = HPOIncidence(index)
+        _incidence_state["index"] = index
+    return _incidence_state["incidence"]
+
+
+def _cohort_cache_key(individual_pks, limit):
+    digest = hashlib.sha1(np.unique(np.asarray(individual_pks, dtype=np.int64)).tobytes()).hexdigest()
+    return "hpo_enrichment:{}:{}:{}:{}".format(
+        cache.get(SIMILARITY_VERSION_KEY, 1),
+        cache.get(HPO_DESCENDANT_CACHE_VERSION_KEY, 1),
+        limit,
+        digest,
+    )
+
+
+def cohort_enrichment(individual_pks, limit=DEFAULT_ENRICHMENT_LIMIT):
+    """Top `limit` enrichment rows for a cohort, labelled, cached per cohort membership."""
+    individual_pks = list(individual_pks)
+    key = _cohort_cache_key(individual_pks, limit)
+    results = cache.get(key)
+    if results is None:
+        results = compute_enrichment(get_hpo_incidence(), individual_pks)[:limit]
+        graph = get_hpo_graph()
+        for row in results:
+            row["label"] = graph.label(row["identifier"])
+        cache.set(key, results, ENRICHMENT_CACHE_TTL)
+    return results
@@ -0,0 +1,175 @@
+"""
+Maintenance of the HPOTermFrequency table.
+
+Every Individual.hpo_terms change is turned into a before/after diff of the
+affected individuals' direct and propagated (ancestor-inclusive) term sets,
+and only the counters of the terms in that diff are adjusted.
+`rebuild_hpo_term_frequency` takes an optional app registry so the data
+migration that fills the table can run it against its historical models.
+"""
+from collections import Counter, defaultdict
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import F
+
+from ontologies.utils import get_hpo_graph
+
+from .models import HPOTermFrequency, Individual
+
+HPO_ROOT = "HP:0000001"
+
+
+def _obo_id(identifier):
+    return identifier if ":" in identifier else f"HP:{identifier}"
+
+
+def hpo_profiles(individual_ids, registry=apps):
+    """{individual_pk: (direct OBO IDs, propagated OBO IDs)} for the given individuals."""
+    direct = defaultdict(set)
+    links = registry.get_model(Individual._meta.label).hpo_terms.through.objects.filter(
+        individual_id__in=individual_ids
+    ).values_list("individual_id", "term__identifier")
+    for individual_id, identifier in links:
+        direct[individual_id].add(_obo_id(identifier))
+
+    graph = get_hpo_graph()
+    profiles = {}
+    for individual_id in individual_ids:
+        terms = direct.get(individual_id, set())
+        propagated = set(terms)
+        propagated.update(graph.obo_ids(graph.reachable(graph.indices(terms), "up")))
+        profiles[individual_id] = (terms, propagated)
+    return profiles
+
+
+def _depth(graph, index, root_index):
+    """Shortest is_a distance from the node at `index` up to the root."""
+    level, frontier, seen = 0, {index}, {index}
+    while frontier and root_index not in frontier:
+        level += 1
+        parents = set()
+        for node in frontier:
+            parents.update(graph.parent_indices[graph.parent_indptr[node]:graph.parent_indptr[node + 1]].tolist())
+        frontier = parents - seen
+        seen |= frontier
+    return level
+
+
+def _term_metadata(graph, obo_ids):
+    """{obo_id: (label, primary parent, depth)}; the primary parent is the one closest to the root."""
+    root_index = graph.index(HPO_ROOT)
+    depths = {}
+
+    def depth(obo_id):
+        if obo_id not in depths:
+            index = graph.index(obo_id)
+            depths[obo_id] = 0 if index is None or root_index is None else _depth(graph, index, root_index)
+        return depths[obo_id]
+
+    metadata = {}
+    for obo_id in obo_ids:
+        parents = graph.parents(obo_id)
+        primary_parent = min(parents, key=lambda parent: (depth(parent), parent)) if parents else ""
+        metadata[obo_id] = (graph.label(obo_id), primary_parent, depth(obo_id))
+    return metadata
+
+
+def _ensure_rows(obo_ids):
+    existing = set(
+        HPOTermFrequency.objects.filter(identifier__in=obo_ids).values_list("identifier", flat=True)
+    )
+    missing = [obo_id for obo_id in obo_ids if obo_id not in existing]
+    if not missing:
+        return
+    metadata = _term_metadata(get_hpo_graph(), missing)
+    HPOTermFrequency.objects.bulk_create(
+        [
+            HPOTermFrequency(
+                identifier=obo_id,
+                label=metadata[obo_id][0],
+                parent_identifier=metadata[obo_id][1],
+                depth=metadata[obo_id][2],
+            )
+            for obo_id in missing
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def apply_profile_changes(before, after):
+    """Adjust counters by the difference between two hpo_profiles() results."""
+    direct_delta = Counter()
+    propagated_delta = Counter()
+    for individual_id in set(before) | set(after):
+        old_direct, old_propagated = before.get(individual_id, (set(), set()))
+        new_direct, new_propagated = after.get(individual_id, (set(), set()))
+        for obo_id in new_direct - old_direct:
+            direct_delta[obo_id] += 1
+        for obo_id in old_direct - new_direct:
+            direct_delta[obo_id] -= 1
+        for obo_id in new_propagated - old_propagated:
+            propagated_delta[obo_id] += 1
+        for obo_id in old_propagated - new_propagated:
+            propagated_delta[obo_id] -= 1
+
+    changed = {obo_id for obo_id, delta in direct_delta.items() if delta}
+    changed |= {obo_id for obo_id, delta in propagated_delta.items() if delta}
+    if not changed:
+        return
+
+    with transaction.atomic():
+        _ensure_rows(sorted(changed))
+        # Group terms by their (direct, propagated) delta so the update is a few statements.
+        by_delta = defaultdict(list)
+        for obo_id in changed:
+            by_delta[(direct_delta[obo_id], propagated_delta[obo_id])].append(obo_id)
+        for (direct, propagated), obo_ids in by_delta.items():
+            HPOTermFrequency.objects.filter(identifier__in=obo_ids).update(
+                direct_count=F("direct_count") + direct,
+                propagated_count=F("propagated_count") + propagated,
+            )
+        HPOTermFrequency.objects.filter(identifier__in=changed, propagated_count__lte=0).delete()
+
+
+def affected_individual_ids(instance, reverse, pk_set):
+    """Individuals touched by an Individual.hpo_terms m2m_changed event."""
+    if not reverse:
+        return [instance.pk]
+    if pk_set is not None:
+        return list(pk_set)
+    # Term.individuals.clear()
+    return list(instance.individuals.values_list("pk", flat=True))
+
+
+def rebuild_hpo_term_frequency(registry=apps):
+    """Recount the whole table from Individual.hpo_terms. Returns the number of rows."""
+    frequency = registry.get_model(HPOTermFrequency._meta.label)
+    links = registry.get_model(Individual._meta.label).hpo_terms.through.objects
+    individual_ids = list(links.values_list("individual_id", flat=True).distinct())
+    direct_counts = Counter()
+    propagated_counts = Counter()
+    for start in range(0, len(individual_ids), 1000):
+        for direct, propagated in hpo_profiles(individual_ids[start:start + 1000], registry).values():
+            direct_counts.update(direct)
+            propagated_counts.update(propagated)
+
+    # No annotated individuals: leave the HPO graph (and its hp.obo fallback) unloaded.
+    metadata = _term_metadata(get_hpo_graph(), list(propagated_counts)) if propagated_counts else {}
+    with transaction.atomic():
+        frequency.objects.all().delete()
+        frequency.objects.bulk_create(
+            [
+                frequency(
+                    identifier=obo_id,
+                    label=metadata[obo_id][0],
+                    parent_identifier=metadata[obo_id][1],
+                    depth=metadata[obo_id][2],
+                    direct_count=direct_counts.get(obo_id, 0),
+                    propagated_count=count,
+                )
+                for obo_id, count in propagated_counts.items()
+            ],
+            batch_size=5000,
+        )
+    return len(propagated_counts)
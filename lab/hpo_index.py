@@ -0,0 +1,338 @@
+"""
+In-memory HPO term search index.
+
+Built once per process for the loaded HP ontology version: every term label
+and synonym is normalized with `normalize_search_text` and put into a trigram
+inverted index (numpy posting arrays). Autocomplete then only touches the
+posting lists of the query's trigrams instead of normalizing every `Term` row
+on each keystroke, synonym hits ("fits" -> Seizure) come for free, and
+trigram overlap gives typo tolerance ("seizre").
+"""
+import re
+import threading
+from collections import defaultdict, namedtuple
+from collections.abc import Sequence
+
+import numpy as np
+
+from ontologies.models import Ontology, Synonym, Term
+
+from .search_utils import normalize_search_text
+
+HPO_ONTOLOGY_TYPE = 1
+
+# Match classes, best first.
+MATCH_IDENTIFIER = 0
+MATCH_EXACT = 1
+MATCH_PREFIX = 2
+MATCH_WORD_PREFIX = 3
+MATCH_SUBSTRING = 4
+MATCH_ALL_WORDS = 5
+MATCH_FUZZY = 6
+
+MATCH_CONFIDENCE = {
+    MATCH_IDENTIFIER: 1.0,
+    MATCH_EXACT: 1.0,
+    MATCH_PREFIX: 0.9,
+    MATCH_WORD_PREFIX: 0.85,
+    MATCH_SUBSTRING: 0.75,
+    MATCH_ALL_WORDS: 0.7,
+}
+FUZZY_MIN_SIMILARITY = 0.5
+FUZZY_MIN_QUERY_LENGTH = 4
+FUZZY_WHEN_FEWER_THAN = 10
+
+HPO_CODE_RE = re.compile(r"(?i)\bHP\s*:?\s*(\d{4,7})\b")
+
+SearchHit = namedtuple("SearchHit", "pk identifier label matched_name is_synonym match_class confidence")
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _padded_trigrams(text):
+    return _trigrams(f"  {text} ")
+
+
+def _query_trigrams(words):
+    """Trigrams every name containing all `words` must have."""
+    trigrams = set()
+    for word in words:
+        if len(word) >= 3:
+            trigrams |= _trigrams(word)
+    return trigrams
+
+
+def _normalize_identifier(value):
+    digits = re.sub(r"\D", "", value or "")
+    return digits.zfill(7) if digits else ""
+
+
+class HPOTermIndex:
+    """Trigram index over the labels and synonyms of the HP terms in the database."""
+
+    def __init__(self, terms, synonyms):
+        """
+        terms: iterable of (pk, identifier, label, alternate_ids)
+        synonyms: iterable of (term_pk, description)
+        """
+        self.term_pks = []
+        self.term_identifiers = []
+        self.term_labels = []
+        self.identifier_to_term = {}
+        term_position = {}
+        for pk, identifier, label, alternate_ids in terms:
+            position = len(self.term_pks)
+            term_position[pk] = position
+            self.term_pks.append(pk)
+            self.term_identifiers.append(identifier)
+            self.term_labels.append(label or "")
+            self.identifier_to_term[identifier] = position
+            for alt_id in filter(None, (alternate_ids or "").split(",")):
+                self.identifier_to_term.setdefault(_normalize_identifier(alt_id), position)
+
+        # Shorter, alphabetically earlier labels rank first among equal matches.
+        label_order = sorted(
+            range(len(self.term_labels)),
+            key=lambda position: (len(self.term_labels[position]), normalize_search_text(self.term_labels[position])),
+        )
+        self.term_rank = np.empty(len(label_order), dtype=np.int32)
+        self.term_rank[label_order] = np.arange(len(label_order), dtype=np.int32)
+
+        self.names = []
+        self.name_display = []
+        name_term = []
+        name_is_synonym = []
+        seen = set()
+
+        def add_name(position, text, is_synonym):
+            normalized = " ".join(normalize_search_text(text).split())
+            if not normalized or (position, normalized) in seen:
+                return
+            seen.add((position, normalized))
+            self.names.append(normalized)
+            self.name_display.append(text)
+            name_term.append(position)
+            name_is_synonym.append(is_synonym)
+
+        for position, label in enumerate(self.term_labels):
+            add_name(position, label, False)
+        for term_pk, description in synonyms:
+            if term_pk in term_position:
+                add_name(term_position[term_pk], description, True)
+
+        self.name_term = np.array(name_term, dtype=np.int32)
+        self.name_is_synonym = np.array(name_is_synonym, dtype=bool)
+
+        postings = defaultdict(list)
+        for name_id, name in enumerate(self.names):
+            for trigram in _padded_trigrams(name):
+                postings[trigram].append(name_id)
+        self.postings = {trigram: np.array(ids, dtype=np.int32) for trigram, ids in postings.items()}
+
+    def __len__(self):
+        return len(self.term_pks)
+
+    def _count_shared(self, trigrams):
+        arrays = [self.postings[trigram] for trigram in trigrams if trigram in self.postings]
+        if not arrays:
+            return np.zeros(len(self.names), dtype=np.int64)
+        return np.bincount(np.concatenate(arrays), minlength=len(self.names))
+
+    def _text_matches(self, query):
+        """(name_ids, match classes) of names containing the query or all of its words."""
+        words = query.split()
+        required = _query_trigrams(words)
+        # Two-letter words can still narrow candidates via the word-start trigram.
+        required |= {f" {word}" for word in words if len(word) == 2}
+        if required:
+            counts = self._count_shared(required)
+            candidates = np.flatnonzero(counts == len(required))
+        else:
+            candidates = range(len(self.names))
+
+        name_ids = []
+        classes = []
+        for name_id in candidates:
+            name = self.names[name_id]
+            if name == query:
+                match_class = MATCH_EXACT
+            elif name.startswith(query):
+                match_class = MATCH_PREFIX
+            elif f" {query}" in f" {name}":
+                match_class = MATCH_WORD_PREFIX
+            elif query in name:
+                match_class = MATCH_SUBSTRING
+            elif len(words) > 1 and all(word in name for word in words):
+                match_class = MATCH_ALL_WORDS
+            else:
+                continue
+            name_ids.append(name_id)
+            classes.append(match_class)
+        return np.array(name_ids, dtype=np.int64), np.array(classes, dtype=np.int64)
+
+    def _fuzzy_matches(self, query, exclude_name_ids):
+        """(name_ids, similarity) of names sharing most of the query's padded trigrams."""
+        trigrams = _padded_trigrams(query)
+        counts = self._count_shared(trigrams)
+        similarity = counts / len(trigrams)
+        similarity[exclude_name_ids] = 0
+        name_ids = np.flatnonzero(similarity >= FUZZY_MIN_SIMILARITY)
+        return name_ids, similarity[name_ids]
+
+    def _identifier_hits(self, query):
+        code_match = HPO_CODE_RE.search(query)
+        digits = _normalize_identifier(code_match.group(1)) if code_match else ""
+        if not digits:
+            stripped = re.sub(r"(?i)^HP\s*:?\s*", "", query).strip()
+            if not stripped.isdigit():
+                return []
+            if len(stripped) < 7:
+                # Partial code: identifiers containing the typed digits.
+                return [
+                    position for position, identifier in enumerate(self.term_identifiers)
+                    if stripped in identifier
+                ]
+            digits = stripped
+        position = self.identifier_to_term.get(digits)
+        return [] if position is None else [position]
+
+    def search(self, query, exclude_pks=(), limit=None, fuzzy=True):
+        """Ranked SearchHits for a free-text query or HP code, best first."""
+        query = " ".join(normalize_search_text(query).split())
+        if not query:
+            return []
+        exclude_pks = set(exclude_pks)
+
+        best = {}
+
+        def offer(position, match_class, name_id, similarity):
+            key = (match_class, bool(self.name_is_synonym[name_id]) if name_id is not None else False,
+                   -similarity, int(self.term_rank[position]))
+            current = best.get(position)
+            if current is None or key < current[0]:
+                best[position] = (key, name_id, similarity)
+
+        for position in self._identifier_hits(query):
+            offer(position, MATCH_IDENTIFIER, None, 1.0)
+
+        text_query = " ".join(HPO_CODE_RE.sub(" ", query).split())
+        if text_query and not text_query.isdigit():
+            name_ids, classes = self._text_matches(text_query)
+            for name_id, match_class in zip(name_ids.tolist(), classes.tolist()):
+                offer(int(self.name_term[name_id]), match_class, name_id, 1.0)
+
+            if fuzzy and len(text_query) >= FUZZY_MIN_QUERY_LENGTH and len(best) < FUZZY_WHEN_FEWER_THAN:
+                fuzzy_ids, similarities = self._fuzzy_matches(text_query, name_ids)
+                for name_id, similarity in zip(fuzzy_ids.tolist(), similarities.tolist()):
+                    offer(int(self.name_term[name_id]), MATCH_FUZZY, name_id, similarity)
+
+        ranked = sorted(best.items(), key=lambda item: item[1][0])
+        hits = []
+        for position, (key, name_id, similarity) in ranked:
+            pk = self.term_pks[position]
+            if pk in exclude_pks:
+                continue
+            match_class, is_synonym = key[0], key[1]
+            confidence = MATCH_CONFIDENCE.get(match_class, round(0.6 * similarity, 3))
+            hits.append(SearchHit(
+                pk=pk,
+                identifier=self.term_identifiers[position],
+                label=self.term_labels[position],
+                matched_name=self.name_display[name_id] if is_synonym else None,
+                is_synonym=is_synonym,
+                match_class=match_class,
+                confidence=confidence,
+            ))
+            if limit and len(hits) >= limit:
+                break
+        return hits
+
+    def search_many(self, queries, limit=5, fuzzy=True):
+        """
+        Ranked hits for each query in `queries`, in order.
+        Chunks that normalize to the same text are resolved once.
+        """
+        resolved = {}
+        results = []
+        for query in queries:
+            key = " ".join(normalize_search_text(query).split())
+            if key not in resolved:
+                resolved[key] = self.search(key, limit=limit, fuzzy=fuzzy)
+            results.append(resolved[key])
+        return results
+
+
+class SearchResults(Sequence):
+    """
+    Lazily hydrated list of Terms for ranked SearchHits.
+
+    Slicing (as the paginator does) loads only the Terms of that slice.
+    Each Term gets `matched_synonym` and `match_confidence` attributes.
+    """
+
+    def __init__(self, hits):
+        self.hits = hits
+
+    def __len__(self):
+        return len(self.hits)
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0] if index >= 0 else self[len(self) + index]
+        hits = self.hits[index]
+        terms = Term.objects.select_related("ontology").in_bulk([hit.pk for hit in hits])
+        results = []
+        for hit in hits:
+            term = terms.get(hit.pk)
+            if term is None:
+                continue
+            term.matched_synonym = hit.matched_name
+            term.match_confidence = hit.confidence
+            results.append(term)
+        return results
+
+
+_index_lock = threading.Lock()
+_index_state = {"signature": None, "index": None}
+
+
+def _index_signature():
+    return tuple(
+        Ontology.objects.filter(type=HPO_ONTOLOGY_TYPE)
+        .order_by("id")
+        .values_list("id", "label", "modified")
+    )
+
+
+def _build_index():
+    # One row per identifier: the newest loaded HP version wins.
+    terms = {}
+    for row in (
+        Term.objects.filter(ontology__type=HPO_ONTOLOGY_TYPE)
+        .order_by("ontology_id", "id")
+        .values_list("pk", "identifier", "label", "alternate_ids")
+        .iterator(chunk_size=5000)
+    ):
+        terms[row[1]] = row
+    term_pks = {row[0] for row in terms.values()}
+    synonyms = (
+        (term_pk, description)
+        for term_pk, description in Synonym.objects.filter(term__ontology__type=HPO_ONTOLOGY_TYPE)
+        .values_list("term_id", "description")
+        .iterator(chunk_size=5000)
+        if term_pk in term_pks
+    )
+    return HPOTermIndex(terms.values(), synonyms)
+
+
+def get_hpo_term_index():
+    """The process-wide HPOTermIndex, rebuilt when an HP version is loaded or updated."""
+    signature = _index_signature()
+    if _index_state["signature"] != signature:
+        with _index_lock:
+            if _index_state["signature"] != signature:
+                _index_state["index"] = _build_index()
+                _index_state["signature"] = signature
+    return _index_state["index"]
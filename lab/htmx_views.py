@@ -361,6 +361,31 @@ def note_count(request):
     except Exception:
          return HttpResponse("")
 
+def _note_owner_url(owner):
+    if isinstance(owner, Project):
+        return reverse("lab:project_detail", args=[owner.pk])
+    if isinstance(owner, Task):
+        return reverse("lab:task_detail", args=[owner.pk])
+    individual = _resolve_workflow_individual(owner) if owner is not None else None
+    if individual is not None:
+        return reverse("lab:individual_detail", args=[individual.pk])
+    return None
+
+
+@login_required
+def note_search(request):
+    """Full-text search over the notes the user can see (see lab.note_search)."""
+    from .note_search import search_notes
+
+    query = request.GET.get("q", "").strip()
+    hits = search_notes(query, request.user) if query else []
+    for hit in hits:
+        hit["url"] = _note_owner_url(hit["owner"])
+    context = {"query": query, "hits": hits}
+    if request.GET.get("partial") == "hits":
+        return render(request, "lab/partials/notes/search_results.html#hits", context)
+    return render(request, "lab/partials/notes/search_results.html", context)
+
 @login_required
 def individual_identification_edit(request, pk):
     individual = get_object_or_404(Individual, pk=pk)
@@ -604,6 +629,19 @@ def family_search(request):
     return render(request, "lab/partials/family_picker_results.html", context)
 
 
+@login_required
+def omnisearch_results(request):
+    from .omnisearch import OMNISEARCH_MIN_QUERY_LENGTH, omnisearch
+
+    query = request.GET.get("q", "").strip()
+    context = {
+        "query": query,
+        "groups": omnisearch(query, request.user),
+        "too_short": len(query) < OMNISEARCH_MIN_QUERY_LENGTH,
+    }
+    return render(request, "lab/partials/omnisearch_results.html", context)
+
+
 @login_required
 def individual_parents_edit(request, pk):
     if not request.user.has_perm("lab.change_family"):
@@ -982,9 +1020,9 @@ def update_status(request, content_type_id, object_id, status_id):
     # table row badge so connected statuses stay in sync.
     if individual:
         from lab.tables import _render_status_badges
-        from .status_utils import collect_individual_row_statuses
+        from .row_status import row_statuses
         from django.utils.html import format_html
-        badges_html = _render_status_badges(collect_individual_row_statuses(individual))
+        badges_html = _render_status_badges(row_statuses(individual))
         oob_html = format_html(
             '<span id="individual-row-status-{}" hx-swap-oob="true">{}</span>',
             individual.pk,
@@ -0,0 +1,206 @@
+"""
+Cohort CSV export of individuals.
+
+`individual_export_rows` walks the filtered individuals newest first in
+keyset chunks of EXPORT_CHUNK_SIZE. Each chunk is loaded with its relations
+in a fixed number of bulk queries: statuses and notes by content type and
+object id, prefetched samples/tests/institutions, and identifier types read
+once. The encrypted name and TC identity are only loaded (and so decrypted)
+for users allowed to see them. Memory therefore stays at one chunk
+whatever the cohort size, and `IndividualExportView` streams the rows as
+they are produced.
+"""
+import csv
+from collections import defaultdict
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Prefetch
+
+from .display_preferences import DEFAULT_INSTITUTION_DISPLAY, institution_display_name, normalize_institution_display
+from .models import IdentifierType, Individual, Note, Sample, TaggedStatus, Test
+
+EXPORT_CHUNK_SIZE = 500
+
+EXPORT_HEADER = [
+    # IDs
+    "Primary ID", "Secondary ID", "Ad-Soyad", "TC Kimlik No", "Other IDs",
+    # Demographics
+    "Doğum Tarihi", "Cinsiyet", "Durum", # Status
+    # Clinical
+    "ICD11", "HPO kodları", "Tanı", "Geliş Tarihi", "Kurum Notları",
+
+    # Relations
+    "Gönderen Kurum/Birim", "Klinisyen & İletişim Bilgileri", "Konsey Tarihi", "Takip Notları", "Genel Notlar/Sonuçlar",
+
+    # Sample & Test (Flattened)
+    "Örnek Tipi", "Örnek Notları", "İzolasyonu yapan", "Örnek gön.& OD değ.", # Sample Measurements
+    "Çalışılan Test Adı", "Test Notları", "Çalışılma Tarihi", "Hiz.Alım.Gön. Tarihi", "Data Geliş tarihi",
+
+    # Projects
+    "Projeler"
+]
+
+
+def _chunks(queryset, chunk_size):
+    """Pk lists of `queryset` in descending pk order, read by keyset."""
+    ids = queryset.order_by("-pk").values_list("pk", flat=True)
+    last = None
+    while True:
+        chunk = list((ids if last is None else ids.filter(pk__lt=last))[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last = chunk[-1]
+
+
+def _notes_by_object(model, object_ids):
+    notes = defaultdict(list)
+    for object_id, content in (
+        Note.objects.filter(content_type=ContentType.objects.get_for_model(model), object_id__in=object_ids)
+        .values_list("object_id", "content")
+    ):
+        notes[object_id].append(content)
+    return notes
+
+
+def _statuses_by_object(model, object_ids):
+    statuses = defaultdict(list)
+    for object_id, name in (
+        TaggedStatus.objects.filter(content_type=ContentType.objects.get_for_model(model), object_id__in=object_ids)
+        .order_by("tag__name")
+        .values_list("object_id", "tag__name")
+    ):
+        statuses[object_id].append(name)
+    return statuses
+
+
+def _preferred_id(cross_ids, priority, id_type, missing):
+    """Same value as Individual.primary_id / secondary_id for prefetched cross ids."""
+    matches = sorted((x for x in cross_ids if x.id_type.use_priority == priority), key=lambda x: x.id_type.id)
+    if matches:
+        return matches[0].id_value
+    if id_type is None:
+        return missing
+    return f"No {id_type.name} ID"
+
+
+def _load_chunk(individual_ids, sensitive):
+    individuals = (
+        Individual.objects.filter(pk__in=individual_ids)
+        .order_by("-pk")
+        .prefetch_related(
+            "cross_ids__id_type",
+            "hpo_terms",
+            "institution",
+            "physicians",
+            "projects",
+            Prefetch("samples", queryset=Sample.objects.select_related("sample_type", "isolation_by")),
+            Prefetch("samples__tests", queryset=Test.objects.select_related("test_type")),
+        )
+    )
+    if not sensitive:
+        individuals = individuals.defer("full_name", "tc_identity")
+    return list(individuals)
+
+
+def individual_export_rows(queryset, user, chunk_size=EXPORT_CHUNK_SIZE):
+    """The header, then one CSV row per individual of `queryset` (newest first)."""
+    sensitive = user.has_perm("lab.view_sensitive_data")
+    institution_display = DEFAULT_INSTITUTION_DISPLAY
+    if user.is_authenticated and hasattr(user, "profile"):
+        institution_display = normalize_institution_display(
+            (user.profile.display_preferences or {}).get("institution_display", DEFAULT_INSTITUTION_DISPLAY)
+        )
+    id_types = {
+        priority: IdentifierType.objects.filter(use_priority=priority).order_by("id").first()
+        for priority in (1, 2)
+    }
+
+    yield EXPORT_HEADER
+    for individual_ids in _chunks(queryset, chunk_size):
+        individuals = _load_chunk(individual_ids, sensitive)
+        statuses = _statuses_by_object(Individual, individual_ids)
+        individual_notes = _notes_by_object(Individual, individual_ids)
+        sample_ids = [sample.pk for individual in individuals for sample in individual.samples.all()]
+        sample_notes = _notes_by_object(Sample, sample_ids)
+        test_notes = _notes_by_object(
+            Test, [test.pk for individual in individuals for sample in individual.samples.all() for test in sample.tests.all()]
+        )
+
+        for individual in individuals:
+            cross_ids = list(individual.cross_ids.all())
+            other_ids = "; ".join(
+                f"{x.id_type.name}:{x.id_value}" for x in cross_ids if x.id_type.use_priority not in [1, 2]
+            )
+            if sensitive:
+                name = individual.full_name
+                tc = str(individual.tc_identity) if individual.tc_identity else ""
+            else:
+                name = tc = "*****"
+
+            receipt_dates, sample_types, sample_notes_list, isolation_by_list, measurements_list = [], [], [], [], []
+            test_names, test_notes_list, test_dates, service_dates, data_dates = [], [], [], [], []
+            for sample in individual.samples.all():
+                if sample.receipt_date:
+                    receipt_dates.append(str(sample.receipt_date))
+                if sample.sample_type:
+                    sample_types.append(sample.sample_type.name)
+                if sample_notes[sample.pk]:
+                    sample_notes_list.append(" | ".join(sample_notes[sample.pk]))
+                if sample.isolation_by:
+                    isolation_by_list.append(sample.isolation_by.full_name or str(sample.isolation_by))
+                if sample.sample_measurements:
+                    measurements_list.append(sample.sample_measurements)
+                for test in sample.tests.all():
+                    if test.test_type:
+                        test_names.append(test.test_type.name)
+                    if test_notes[test.pk]:
+                        test_notes_list.append(" | ".join(test_notes[test.pk]))
+                    if test.performed_date:
+                        test_dates.append(str(test.performed_date))
+                    if test.service_send_date:
+                        service_dates.append(str(test.service_send_date))
+                    if test.data_receipt_date:
+                        data_dates.append(str(test.data_receipt_date))
+
+            yield [
+                _preferred_id(cross_ids, 1, id_types[1], "NO PRIMARY ID SET"),
+                _preferred_id(cross_ids, 2, id_types[2], "NO SECONDARY ID SET"),
+                name, tc, other_ids,
+                individual.birth_date,
+                individual.get_sex_display() if individual.sex else "",
+                ", ".join(statuses[individual.pk]),
+                individual.icd11_code or "",
+                "; ".join(term.identifier for term in individual.hpo_terms.all()),
+                individual.diagnosis or "",
+                "; ".join(receipt_dates) if receipt_dates else (individual.created_at.date() if individual.created_at else ""),
+                "",  # Kurum Notları
+                "; ".join(
+                    institution_display_name(institution, institution_display)
+                    for institution in individual.institution.all()
+                ),
+                "; ".join(contact.full_name or str(contact) for contact in individual.physicians.all()),
+                individual.council_date or "",
+                "",  # Takip Notları
+                " | ".join(individual_notes[individual.pk]),
+                "; ".join(sample_types), "; ".join(sample_notes_list),
+                "; ".join(isolation_by_list), "; ".join(measurements_list),
+                "; ".join(test_names), "; ".join(test_notes_list),
+                "; ".join(test_dates), "; ".join(service_dates), "; ".join(data_dates),
+                "; ".join(project.name for project in individual.projects.all()),
+            ]
+
+
+class _Echo:
+    """File-like object whose write() returns the line, for csv.writer in a generator."""
+
+    def write(self, value):
+        return value
+
+
+def individual_export_csv(queryset, user, chunk_size=EXPORT_CHUNK_SIZE):
+    """The export as CSV text lines, starting with a UTF-8 BOM for Excel."""
+    writer = csv.writer(_Echo())
+    yield "\ufeff"
+    for row in individual_export_rows(queryset, user, chunk_size):
+        yield writer.writerow(row)
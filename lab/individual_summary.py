@@ -0,0 +1,150 @@
+"""
+Denormalized IndividualSummary rows for the patient list.
+
+The list used to annotate every individual with Min/Max aggregates across the
+whole workflow tree (samples -> tests -> pipelines -> analyses -> reports,
+plus variants), whose joins fan out multiplicatively. Here each stage is
+aggregated on its own, grouped by individual, and stored; lab.signals
+refreshes the affected individuals whenever a workflow object, cross
+identifier or institution changes, and `rebuild_individual_summaries`
+recomputes everything. Both take an optional app registry so the data
+migration that fills the table can run them against its historical models.
+"""
+from datetime import datetime, time, timezone as dt_timezone
+
+from django.apps import apps
+from django.db.models import Count, Max, Min
+
+from .models import (
+    Analysis,
+    AnalysisReport,
+    CrossIdentifier,
+    Individual,
+    IndividualSummary,
+    Pipeline,
+    Sample,
+    Test,
+)
+from variant.models import Variant
+
+SUMMARY_BATCH_SIZE = 500
+
+# (stage, model, path to the individual, last-activity field), most
+# downstream first: last_activity is the first stage that has a date.
+SUMMARY_STAGES = (
+    ("report", AnalysisReport, "analysis__pipeline__test__sample__individual", "created_at"),
+    ("variant", Variant, "individual", "created_at"),
+    ("analysis", Analysis, "pipeline__test__sample__individual", "performed_date"),
+    ("pipeline", Pipeline, "test__sample__individual", "performed_date"),
+    ("test", Test, "sample__individual", "performed_date"),
+    ("sample", Sample, "individual", "receipt_date"),
+)
+
+# Models whose saves and deletes change a summary, with their path to the individual.
+SUMMARY_SOURCES = tuple((model, path) for _, model, path, _ in SUMMARY_STAGES) + (
+    (CrossIdentifier, "individual"),
+)
+
+SUMMARY_UPDATE_FIELDS = [
+    "last_activity",
+    "first_institution_name",
+    "primary_id",
+    "secondary_id",
+    *(f"{stage}_count" for stage, _, _, _ in SUMMARY_STAGES),
+    "updated_at",
+]
+
+
+def _as_datetime(value):
+    # Same midnight-UTC reading as the previous Cast(date, DateTimeField()).
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.combine(value, time.min, tzinfo=dt_timezone.utc)
+
+
+def _summaries(individual_ids, registry=apps):
+    def get_model(model):
+        return registry.get_model(model._meta.label)
+
+    individuals = get_model(Individual)
+    created = dict(individuals.objects.filter(pk__in=individual_ids).values_list("pk", "created_at"))
+    summaries = {pk: get_model(IndividualSummary)(individual_id=pk) for pk in created}
+    last_dates = {pk: {} for pk in created}
+
+    for stage, model, path, date_field in SUMMARY_STAGES:
+        key = f"{path}_id"
+        rows = (
+            get_model(model)._base_manager.filter(**{f"{key}__in": created})
+            .order_by()
+            .values(key)
+            .annotate(last=Max(date_field), count=Count("pk"))
+            .values_list(key, "last", "count")
+        )
+        for individual_id, last, count in rows:
+            setattr(summaries[individual_id], f"{stage}_count", count)
+            last_dates[individual_id][stage] = _as_datetime(last)
+
+    institution_names = (
+        individuals.institution.through.objects.filter(individual_id__in=created)
+        .order_by()
+        .values("individual_id")
+        .annotate(name=Min("institution__name"))
+        .values_list("individual_id", "name")
+    )
+    for individual_id, name in institution_names:
+        summaries[individual_id].first_institution_name = name or ""
+
+    cross_ids = (
+        get_model(CrossIdentifier).objects.filter(individual_id__in=created, id_type__use_priority__in=(1, 2))
+        .order_by("id_type_id", "id")
+        .values_list("individual_id", "id_type__use_priority", "id_value")
+    )
+    for individual_id, priority, id_value in cross_ids:
+        field = "primary_id" if priority == 1 else "secondary_id"
+        if not getattr(summaries[individual_id], field):
+            setattr(summaries[individual_id], field, id_value)
+
+    for pk, summary in summaries.items():
+        summary.last_activity = next(
+            (last_dates[pk][stage] for stage, _, _, _ in SUMMARY_STAGES if last_dates[pk].get(stage)),
+            created[pk],
+        )
+    return list(summaries.values())
+
+
+def refresh_individual_summaries(individual_ids, registry=apps):
+    """Recompute the summaries of the given individuals (missing ones are ignored)."""
+    individual_ids = sorted({pk for pk in individual_ids if pk is not None})
+    for start in range(0, len(individual_ids), SUMMARY_BATCH_SIZE):
+        registry.get_model(IndividualSummary._meta.label).objects.bulk_create(
+            _summaries(individual_ids[start:start + SUMMARY_BATCH_SIZE], registry),
+            update_conflicts=True,
+            unique_fields=["individual"],
+            update_fields=SUMMARY_UPDATE_FIELDS,
+        )
+
+
+def rebuild_individual_summaries(registry=apps):
+    """Recompute every individual's summary. Returns the number of individuals."""
+    individual_ids = list(registry.get_model(Individual._meta.label).objects.values_list("pk", flat=True))
+    refresh_individual_summaries(individual_ids, registry)
+    return len(individual_ids)
+
+
+def summary_models():
+    """SUMMARY_SOURCES models and their subclasses (e.g. the concrete Variant types)."""
+    sources = tuple(model for model, _ in SUMMARY_SOURCES)
+    return [model for model in apps.get_models() if issubclass(model, sources)]
+
+
+def summary_individual_ids(instance):
+    """Ids of the individuals whose summary depends on `instance` (a SUMMARY_SOURCES object)."""
+    path = next((path for model, path in SUMMARY_SOURCES if isinstance(instance, model)), None)
+    if path is None:
+        return set()
+    first, _, rest = path.partition("__")
+    related_id = getattr(instance, f"{first}_id")
+    if not rest or related_id is None:
+        return {related_id} - {None}
+    related_model = instance._meta.get_field(first).related_model
+    return set(related_model._base_manager.filter(pk=related_id).values_list(f"{rest}_id", flat=True)) - {None}
@@ -107,6 +107,7 @@ class Command(BaseCommand):
             CrossIdentifier,
             DashboardWidget,
             Family,
+            HPOTermFrequency,
             IdentifierType,
             Individual,
             Institution,
@@ -174,6 +175,7 @@ class Command(BaseCommand):
         self._delete(CrossIdentifier.objects.all(), "CrossIdentifier")
         self._delete(Individual.objects.all(), "Individual")
         self._delete(Family.objects.all(), "Family")
+        self._delete(HPOTermFrequency.objects.all(), "HPOTermFrequency")
 
         # ── 5. Notes / Tasks / TaggedStatuses / Projects / Dashboards ─
         self.stdout.write("Phase 5: Notes · Tasks · TaggedStatuses · Projects · Dashboards")
@@ -221,8 +223,10 @@ class Command(BaseCommand):
                     Relationship,
                     Synonym,
                     Term,
+                    TermClosure,
                     Ontology,
                 )
+                self._delete(TermClosure.objects.all(), "TermClosure")
                 self._delete(CrossReference.objects.all(), "CrossReference")
                 self._delete(Relationship.objects.all(), "Relationship")
                 self._delete(Synonym.objects.all(), "Synonym")
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from lab.columnar_export import COLUMNAR_BATCH_SIZE, COLUMNAR_FORMATS, COLUMNAR_TABLES, write_columnar_tables
+
+
+class Command(BaseCommand):
+    help = (
+        "Write de-identified cohort tables (individuals, HPO terms, samples, tests, pipelines, analyses, "
+        "variants, annotations) as Parquet or Arrow IPC files for notebooks and offline analysis"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("output_dir", help="Directory to write one file per table into")
+        parser.add_argument("--format", choices=sorted(COLUMNAR_FORMATS), default="parquet")
+        parser.add_argument(
+            "--table",
+            action="append",
+            choices=list(COLUMNAR_TABLES),
+            dest="tables",
+            help="Table to export (repeatable; default: all)",
+        )
+        parser.add_argument("--batch-size", type=int, default=COLUMNAR_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            written = write_columnar_tables(
+                options["output_dir"],
+                file_format=options["format"],
+                tables=options["tables"],
+                batch_size=options["batch_size"],
+            )
+        except ImportError as exc:
+            raise CommandError(str(exc))
+
+        for table, (path, rows) in written.items():
+            self.stdout.write(f"{table}: {rows} rows -> {path}")
+        self.stdout.write(self.style.SUCCESS(f"Columnar export written: {len(written)} tables"))
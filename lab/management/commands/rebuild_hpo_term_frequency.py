@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from lab.hpo_frequency import rebuild_hpo_term_frequency
+
+
+class Command(BaseCommand):
+    help = "Recount the HPOTermFrequency table from Individual.hpo_terms (e.g. after a bulk import or a new HPO release)"
+
+    def handle(self, *args, **options):
+        rows = rebuild_hpo_term_frequency()
+        self.stdout.write(self.style.SUCCESS(f"HPO term frequencies rebuilt: {rows} terms"))
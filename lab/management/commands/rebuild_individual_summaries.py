@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from lab.individual_summary import rebuild_individual_summaries
+
+
+class Command(BaseCommand):
+    help = "Recompute the denormalized IndividualSummary rows behind the patient list (e.g. after a bulk import)"
+
+    def handle(self, *args, **options):
+        count = rebuild_individual_summaries()
+        self.stdout.write(self.style.SUCCESS(f"Individual summaries rebuilt: {count} individuals"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from lab.name_index import rebuild_name_index
+
+
+class Command(BaseCommand):
+    help = "Re-tokenize the blind index over Individual.full_name (after a key change or a bulk import)"
+
+    def handle(self, *args, **options):
+        count = rebuild_name_index()
+        self.stdout.write(self.style.SUCCESS(f"Name index rebuilt: {count} individuals"))
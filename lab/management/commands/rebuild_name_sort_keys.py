@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from lab.name_sort import rebuild_name_sort_keys
+
+
+class Command(BaseCommand):
+    help = "Renumber the alphabetical sort keys of Individual.full_name (e.g. after a bulk import)"
+
+    def handle(self, *args, **options):
+        count = rebuild_name_sort_keys()
+        self.stdout.write(self.style.SUCCESS(f"Name sort keys rebuilt: {count} individuals"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from lab.row_status import rebuild_row_statuses
+
+
+class Command(BaseCommand):
+    help = "Recompute the materialized status badges of every individual's list row"
+
+    def handle(self, *args, **options):
+        count = rebuild_row_statuses()
+        self.stdout.write(self.style.SUCCESS(f"Row statuses rebuilt: {count} individuals"))
@@ -0,0 +1,23 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from lab.search_index import SEARCH_INDEXED_FIELDS, rebuild_search_values
+
+
+class Command(BaseCommand):
+    help = "Backfill the normalized SearchValue rows used by search boxes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "models",
+            nargs="*",
+            help="Model labels to reindex (e.g. lab.Institution); all registered models by default.",
+        )
+
+    def handle(self, *args, **options):
+        labels = options["models"] or list(SEARCH_INDEXED_FIELDS)
+        for label in labels:
+            model = apps.get_model(label)
+            rows = rebuild_search_values(model)
+            self.stdout.write(f"{label}: {rows} search values")
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt."))
@@ -59,13 +59,12 @@ class Command(BaseCommand):
                 "name": "HPO Term Network",
                 "slug": "hpo-term-network",
                 "description": "Network visualization of HPO terms used across individuals.",
-                "target_model": "Individual",
+                "target_model": "HPOTermFrequency",
                 "default_col_span": 2,
                 "show_download_menu": False,
                 "notebook_filename": "hpo_network_visualization.py",
                 "query_config": {
-                    "values": ["hpo_terms__identifier"],
-                    "annotate": {"count": {"count": "id"}}
+                    "values": ["identifier", "label", "parent_identifier", "direct_count", "propagated_count"]
                 },
                 "is_published": True
             }
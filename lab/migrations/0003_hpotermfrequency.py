@@ -0,0 +1,31 @@
+# Generated by Django 6.0rc1 on 2026-10-17 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lab', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HPOTermFrequency',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('identifier', models.CharField(max_length=25, unique=True)),
+                ('label', models.CharField(blank=True, max_length=255)),
+                ('parent_identifier', models.CharField(blank=True, db_index=True, max_length=25)),
+                ('depth', models.PositiveSmallIntegerField(default=0)),
+                ('direct_count', models.PositiveIntegerField(default=0)),
+                ('propagated_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'HPO term frequency',
+                'verbose_name_plural': 'HPO term frequencies',
+                'ordering': ['-propagated_count', 'identifier'],
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 6.0rc1 on 2026-10-17 14:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS lab_searchvalue_value_trgm "
+        "ON lab_searchvalue USING gin (value gin_trgm_ops)"
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS lab_searchvalue_value_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('lab', '0003_hpotermfrequency'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchValue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('field', models.CharField(max_length=64)),
+                ('value', models.TextField()),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'indexes': [
+                    models.Index(fields=['content_type', 'field', 'object_id'], name='lab_searchvalue_lookup'),
+                    models.Index(fields=['content_type', 'object_id'], name='lab_searchvalue_object'),
+                ],
+            },
+        ),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 6.0rc1 on 2026-10-17 15:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lab', '0004_searchvalue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndividualNameToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(db_index=True, max_length=64)),
+                ('individual', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='name_tokens', to='lab.individual')),
+            ],
+            options={
+                'unique_together': {('individual', 'digest')},
+            },
+        ),
+    ]
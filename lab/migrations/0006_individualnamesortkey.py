@@ -0,0 +1,21 @@
+# Generated by Django 6.0rc1 on 2026-10-17 16:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lab', '0005_individualnametoken'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndividualNameSortKey',
+            fields=[
+                ('individual', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='name_sort_key', serialize=False, to='lab.individual')),
+                ('rank', models.BigIntegerField(db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 6.0rc1 on 2026-10-17 17:20
+
+from django.db import migrations
+
+POSTGRESQL_FORWARD = [
+    "ALTER TABLE lab_note ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('simple', coalesce(content, ''))) STORED",
+    "CREATE INDEX IF NOT EXISTS lab_note_search_vector ON lab_note USING gin (search_vector)",
+]
+POSTGRESQL_BACKWARD = [
+    "DROP INDEX IF EXISTS lab_note_search_vector",
+    "ALTER TABLE lab_note DROP COLUMN IF EXISTS search_vector",
+]
+
+# SQLite rebuilds a table for most ALTERs, which drops its triggers; a later
+# migration that alters lab_note there must recreate these.
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS lab_note_fts USING fts5("
+    "content, content='lab_note', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS lab_note_fts_insert AFTER INSERT ON lab_note BEGIN "
+    "INSERT INTO lab_note_fts(rowid, content) VALUES (new.id, new.content); END",
+    "CREATE TRIGGER IF NOT EXISTS lab_note_fts_delete AFTER DELETE ON lab_note BEGIN "
+    "INSERT INTO lab_note_fts(lab_note_fts, rowid, content) VALUES ('delete', old.id, old.content); END",
+    "CREATE TRIGGER IF NOT EXISTS lab_note_fts_update AFTER UPDATE OF content ON lab_note BEGIN "
+    "INSERT INTO lab_note_fts(lab_note_fts, rowid, content) VALUES ('delete', old.id, old.content); "
+    "INSERT INTO lab_note_fts(rowid, content) VALUES (new.id, new.content); END",
+    "INSERT INTO lab_note_fts(lab_note_fts) VALUES ('rebuild')",
+]
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS lab_note_fts_insert",
+    "DROP TRIGGER IF EXISTS lab_note_fts_delete",
+    "DROP TRIGGER IF EXISTS lab_note_fts_update",
+    "DROP TABLE IF EXISTS lab_note_fts",
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lab', '0006_individualnamesortkey'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({"postgresql": POSTGRESQL_FORWARD, "sqlite": SQLITE_FORWARD}),
+            _run({"postgresql": POSTGRESQL_BACKWARD, "sqlite": SQLITE_BACKWARD}),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 6.0rc1 on 2026-10-17 18:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lab', '0007_note_fulltext'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndividualSummary',
+            fields=[
+                ('individual', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='lab.individual')),
+                ('last_activity', models.DateTimeField(blank=True, db_index=True, null=True)),
+                ('first_institution_name', models.CharField(blank=True, db_index=True, max_length=255)),
+                ('primary_id', models.CharField(blank=True, db_index=True, max_length=255)),
+                ('secondary_id', models.CharField(blank=True, db_index=True, max_length=255)),
+                ('sample_count', models.PositiveIntegerField(default=0)),
+                ('test_count', models.PositiveIntegerField(default=0)),
+                ('pipeline_count', models.PositiveIntegerField(default=0)),
+                ('analysis_count', models.PositiveIntegerField(default=0)),
+                ('variant_count', models.PositiveIntegerField(default=0)),
+                ('report_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'individual summaries',
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 6.0rc1 on 2026-10-17 19:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lab', '0008_individualsummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndividualRowStatus',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField(default=0)),
+                ('individual', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='row_statuses', to='lab.individual')),
+                ('status', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='row_entries', to='lab.status')),
+            ],
+            options={
+                'ordering': ['individual', 'position'],
+                'unique_together': {('individual', 'status')},
+            },
+        ),
+    ]
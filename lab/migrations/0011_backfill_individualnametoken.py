@@ -0,0 +1,32 @@
+# Generated by Django 6.0rc1 on 2026-10-17 21:10
+
+from django.db import migrations
+
+from lab.name_index import NAME_INDEX_BATCH_SIZE, name_token_digests
+
+
+def backfill_name_tokens(apps, schema_editor):
+    """Tokenize the names of individuals created before the blind index existed."""
+    Individual = apps.get_model("lab", "Individual")
+    IndividualNameToken = apps.get_model("lab", "IndividualNameToken")
+    tokens = []
+    for individual in Individual.objects.only("pk", "full_name").order_by("pk").iterator(chunk_size=NAME_INDEX_BATCH_SIZE):
+        tokens.extend(
+            IndividualNameToken(individual_id=individual.pk, digest=digest)
+            for digest in name_token_digests(individual.full_name)
+        )
+        if len(tokens) >= NAME_INDEX_BATCH_SIZE:
+            IndividualNameToken.objects.bulk_create(tokens, ignore_conflicts=True)
+            tokens = []
+    IndividualNameToken.objects.bulk_create(tokens, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lab', '0010_exportjob'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_name_tokens, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 6.0rc1 on 2026-10-17 21:20
+
+from django.db import migrations
+
+from lab.individual_summary import rebuild_individual_summaries
+
+
+def backfill_individual_summaries(apps, schema_editor):
+    """Summarize the individuals created before the summary table existed."""
+    rebuild_individual_summaries(registry=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lab', '0011_backfill_individualnametoken'),
+        ('variant', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_individual_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0rc1 on 2026-10-17 21:30
+
+from django.db import migrations
+
+from lab.row_status import rebuild_row_statuses
+
+
+def backfill_row_statuses(apps, schema_editor):
+    """Materialize the row badges of individuals created before the table existed."""
+    rebuild_row_statuses(registry=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('lab', '0012_backfill_individualsummary'),
+        ('variant', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_row_statuses, migrations.RunPython.noop),
+    ]
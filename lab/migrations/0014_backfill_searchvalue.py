@@ -0,0 +1,24 @@
+# Generated by Django 6.0rc1 on 2026-10-17 22:40
+
+from django.db import migrations
+
+from lab.search_index import SEARCH_INDEXED_FIELDS, rebuild_search_values
+
+
+def backfill_search_values(apps, schema_editor):
+    """Index the rows saved before the normalized search values existed."""
+    for label in SEARCH_INDEXED_FIELDS:
+        rebuild_search_values(apps.get_model(label), registry=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('lab', '0013_backfill_individualrowstatus'),
+        ('variant', '0003_annotation_acmg_alternate_classification'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_search_values, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 6.0rc1 on 2026-10-17 22:50
+
+from django.db import migrations
+
+from lab.name_sort import rebuild_name_sort_keys
+
+
+def backfill_name_sort_keys(apps, schema_editor):
+    """Rank the names of individuals created before the sort keys existed."""
+    rebuild_name_sort_keys(registry=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lab', '0014_backfill_searchvalue'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_name_sort_keys, migrations.RunPython.noop),
+    ]
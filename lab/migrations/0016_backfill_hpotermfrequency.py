@@ -0,0 +1,21 @@
+# Generated by Django 6.0rc1 on 2026-10-17 23:00
+
+from django.db import migrations
+
+from lab.hpo_frequency import rebuild_hpo_term_frequency
+
+
+def backfill_hpo_term_frequency(apps, schema_editor):
+    """Count the HPO terms of individuals annotated before the table existed."""
+    rebuild_hpo_term_frequency(registry=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lab', '0015_backfill_individualnamesortkey'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_hpo_term_frequency, migrations.RunPython.noop),
+    ]
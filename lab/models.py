@@ -1302,3 +1302,174 @@ class DashboardWidget(HistoryMixin, models.Model):
 
     def __str__(self):
         return f"{self.user.username} - {self.template.name}"
+
+
+class HPOTermFrequency(models.Model):
+    """
+    Per-HPO-term individual counts, kept up to date from Individual.hpo_terms
+    changes (see lab.hpo_frequency). `propagated_count` counts individuals
+    annotated with the term or any of its descendants.
+    """
+    identifier = models.CharField(max_length=25, unique=True)  # OBO ID, e.g. "HP:0000118"
+    label = models.CharField(max_length=255, blank=True)
+    parent_identifier = models.CharField(max_length=25, blank=True, db_index=True)
+    depth = models.PositiveSmallIntegerField(default=0)
+    direct_count = models.PositiveIntegerField(default=0)
+    propagated_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "HPO term frequency"
+        verbose_name_plural = "HPO term frequencies"
+        ordering = ["-propagated_count", "identifier"]
+
+    def __str__(self):
+        return f"{self.identifier} ({self.direct_count}/{self.propagated_count})"
+
+
+class SearchValue(models.Model):
+    """
+    A registered text field value passed through `normalize_search_text`
+    (see lab.search_index), so Turkish-aware substring search runs in SQL.
+    """
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveBigIntegerField()
+    field = models.CharField(max_length=64)
+    value = models.TextField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["content_type", "field", "object_id"], name="lab_searchvalue_lookup"),
+            models.Index(fields=["content_type", "object_id"], name="lab_searchvalue_object"),
+        ]
+
+    def __str__(self):
+        return f"{self.content_type_id}:{self.object_id}.{self.field} = {self.value}"
+
+
+class IndividualNameToken(models.Model):
+    """
+    Keyed HMAC of a normalized Individual.full_name word prefix (see
+    lab.name_index). Lets name search run as an indexed lookup without
+    storing or decrypting plaintext.
+    """
+    individual = models.ForeignKey(Individual, on_delete=models.CASCADE, related_name="name_tokens")
+    digest = models.CharField(max_length=64, db_index=True)
+
+    class Meta:
+        unique_together = ["individual", "digest"]
+
+    def __str__(self):
+        return f"{self.individual_id}:{self.digest[:12]}"
+
+
+class IndividualNameSortKey(models.Model):
+    """
+    Integer stand-in for the alphabetical position of an individual's
+    encrypted full_name (see lab.name_sort), so the name column can be sorted
+    in SQL.
+    """
+    individual = models.OneToOneField(
+        Individual, on_delete=models.CASCADE, primary_key=True, related_name="name_sort_key"
+    )
+    rank = models.BigIntegerField(db_index=True)
+
+    def __str__(self):
+        return f"{self.individual_id}: {self.rank}"
+
+
+class IndividualSummary(models.Model):
+    """
+    Denormalized per-individual values for the patient list (see
+    lab.individual_summary), so it sorts and paginates without joining the
+    whole workflow tree.
+    """
+    individual = models.OneToOneField(
+        Individual, on_delete=models.CASCADE, primary_key=True, related_name="summary"
+    )
+    last_activity = models.DateTimeField(null=True, blank=True, db_index=True)
+    first_institution_name = models.CharField(max_length=255, blank=True, db_index=True)
+    primary_id = models.CharField(max_length=255, blank=True, db_index=True)
+    secondary_id = models.CharField(max_length=255, blank=True, db_index=True)
+    sample_count = models.PositiveIntegerField(default=0)
+    test_count = models.PositiveIntegerField(default=0)
+    pipeline_count = models.PositiveIntegerField(default=0)
+    analysis_count = models.PositiveIntegerField(default=0)
+    variant_count = models.PositiveIntegerField(default=0)
+    report_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "individual summaries"
+
+    def __str__(self):
+        return f"{self.individual_id}: {self.last_activity}"
+
+
+class IndividualRowStatus(models.Model):
+    """
+    One badge of an individual's list row: its own or a connected workflow
+    status (see lab.row_status), in display order.
+    """
+    individual = models.ForeignKey(Individual, on_delete=models.CASCADE, related_name="row_statuses")
+    status = models.ForeignKey(Status, on_delete=models.CASCADE, related_name="row_entries")
+    position = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        ordering = ["individual", "position"]
+        unique_together = ["individual", "status"]
+
+    def __str__(self):
+        return f"{self.individual_id}: {self.status_id}"
+
+
+class ExportJob(models.Model):
+    """
+    A list export run in the background (see lab.export_jobs): the filter
+    query string it was started with, its progress and the finished file.
+    """
+    KIND_CHOICES = [
+        ("individuals", "Individuals"),
+        ("variants", "Variants"),
+    ]
+    FORMAT_CHOICES = [
+        ("csv", "CSV"),
+        ("xlsx", "Excel (XLSX)"),
+        ("zip", "Zipped CSV"),
+    ]
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("running", "Running"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="export_jobs")
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default="csv")
+    query = models.TextField(blank=True, help_text="URL-encoded filter parameters")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    file = models.FileField(upload_to="exports/%Y/%m/%d/", blank=True, max_length=500)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-id"]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} export #{self.pk} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in {"done", "failed"}
+
+    @property
+    def progress_percent(self):
+        if self.status == "done":
+            return 100
+        if not self.total:
+            return 0
+        return min(100, int(self.processed * 100 / self.total))
@@ -0,0 +1,118 @@
+"""
+Blind index for searching the encrypted Individual.full_name.
+
+Every word of the normalized name (`normalize_search_text`) is stored as a
+keyed HMAC of each of its prefixes in `IndividualNameToken`. A search
+hashes the query words the same way and becomes an indexed `digest IN (...)`
+lookup: only the digests reach the database, and no row is decrypted to
+decide whether it matches.
+
+Matching is per word prefix ("ay yil" finds "Ayşe Yılmaz"), not arbitrary
+substring.
+"""
+import hashlib
+import hmac
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .models import Individual, IndividualNameToken
+from .search_utils import normalize_search_text
+
+NAME_TOKEN_MIN_PREFIX = 2
+NAME_TOKEN_MAX_PREFIX = 16
+NAME_INDEX_BATCH_SIZE = 1000
+
+
+@lru_cache(maxsize=1)
+def _index_key():
+    configured = getattr(settings, "NAME_BLIND_INDEX_KEY", "")
+    if configured:
+        return configured.encode("utf-8")
+    return hmac.new(
+        settings.FIELD_ENCRYPTION_KEY.encode("utf-8"), b"lab.name_index", hashlib.sha256
+    ).digest()
+
+
+def name_digest(text):
+    return hmac.new(_index_key(), text.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def _words(text):
+    return normalize_search_text(text).split()
+
+
+def name_token_digests(full_name):
+    """Digests of every indexed prefix of every word of `full_name`."""
+    digests = set()
+    for word in _words(full_name):
+        word = word[:NAME_TOKEN_MAX_PREFIX]
+        for length in range(min(NAME_TOKEN_MIN_PREFIX, len(word)), len(word) + 1):
+            digests.add(name_digest(word[:length]))
+    return digests
+
+
+def index_individual_names(individuals):
+    """Rewrite the name tokens of the given (already decrypted) Individual instances."""
+    individuals = list(individuals)
+    with transaction.atomic():
+        IndividualNameToken.objects.filter(individual__in=[individual.pk for individual in individuals]).delete()
+        IndividualNameToken.objects.bulk_create(
+            [
+                IndividualNameToken(individual_id=individual.pk, digest=digest)
+                for individual in individuals
+                for digest in name_token_digests(individual.full_name)
+            ],
+            batch_size=NAME_INDEX_BATCH_SIZE,
+        )
+
+
+def rebuild_name_index():
+    """Re-tokenize every individual's name (after a key change or a bulk import). Returns the count."""
+    count = 0
+    batch = []
+    queryset = Individual.objects.only("pk", "full_name").order_by("pk")
+    with transaction.atomic():
+        IndividualNameToken.objects.all().delete()
+        for individual in queryset.iterator(chunk_size=NAME_INDEX_BATCH_SIZE):
+            batch.append(individual)
+            if len(batch) >= NAME_INDEX_BATCH_SIZE:
+                index_individual_names(batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            index_individual_names(batch)
+            count += len(batch)
+    return count
+
+
+def full_name_q(query, prefix=""):
+    """
+    Q matching individuals (or rows related to them through `prefix`, e.g.
+    "individual__") whose name has a word starting with every query word.
+    """
+    words = {word for word in _words(query) if len(word) >= NAME_TOKEN_MIN_PREFIX}
+    if not words:
+        return Q(pk__in=[])
+    digests = {name_digest(word[:NAME_TOKEN_MAX_PREFIX]) for word in words}
+    matches = (
+        IndividualNameToken.objects.filter(digest__in=digests)
+        .values("individual_id")
+        .annotate(matched=Count("digest", distinct=True))
+        .filter(matched=len(digests))
+        .values("individual_id")
+    )
+    if any(len(word) > NAME_TOKEN_MAX_PREFIX for word in words):
+        # Only the indexed prefix was compared; confirm the candidates' full words.
+        candidates = Individual.objects.filter(pk__in=matches).only("pk", "full_name")
+        matches = [
+            individual.pk
+            for individual in candidates
+            if all(
+                any(name_word.startswith(word) for name_word in _words(individual.full_name))
+                for word in words
+            )
+        ]
+    return Q(**{f"{prefix}pk__in": matches})
@@ -0,0 +1,84 @@
+"""
+Alphabetical ordering of the encrypted Individual.full_name.
+
+Each individual gets an integer `IndividualNameSortKey.rank` whose order
+matches the order of the normalized names, so the table can `ORDER BY` an
+indexed integer. Ranks are spaced RANK_GAP apart: a save binary-searches the
+rank range with indexed "first key at or above" queries, decrypting only the
+O(log n) probed neighbours, and takes the midpoint of the gap it lands in.
+When a gap is exhausted the individual shares its neighbour's rank until the
+whole table is renumbered by a background task after the commit.
+`rebuild_name_sort_keys` takes an optional app registry so the data
+migration that fills the table can run it against its historical models.
+"""
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Max, Min
+
+from .models import Individual, IndividualNameSortKey
+from .search_utils import normalize_search_text
+
+RANK_GAP = 1 << 20
+NAME_SORT_BATCH_SIZE = 1000
+
+
+def name_sort_text(full_name):
+    return " ".join(normalize_search_text(full_name).split())
+
+
+def rebuild_name_sort_keys(registry=apps):
+    """Decrypt every name once and renumber all ranks. Returns the number of individuals."""
+    individuals = registry.get_model(Individual._meta.label).objects
+    sort_key = registry.get_model(IndividualNameSortKey._meta.label)
+    entries = [
+        (name_sort_text(individual.full_name), individual.pk)
+        for individual in individuals.only("pk", "full_name").iterator(chunk_size=NAME_SORT_BATCH_SIZE)
+    ]
+    entries.sort()
+    with transaction.atomic():
+        sort_key.objects.all().delete()
+        sort_key.objects.bulk_create(
+            [
+                sort_key(individual_id=pk, rank=(position + 1) * RANK_GAP)
+                for position, (_, pk) in enumerate(entries)
+            ],
+            batch_size=NAME_SORT_BATCH_SIZE,
+        )
+    return len(entries)
+
+
+def place_individual_name(individual):
+    """Give `individual` (with its decrypted full_name) a rank between its alphabetical neighbours."""
+    key = (name_sort_text(individual.full_name), individual.pk)
+    others = IndividualNameSortKey.objects.exclude(individual_id=individual.pk)
+    bounds = others.aggregate(low=Min("rank"), high=Max("rank"))
+
+    # Largest rank sorting before `key` and smallest sorting after it.
+    previous_rank, next_rank = 0, None
+    low, high = bounds["low"], bounds["high"]
+    while low is not None and low <= high:
+        probe = (
+            others.filter(rank__gte=(low + high) // 2, rank__lte=high)
+            .select_related("individual")
+            .only("rank", "individual__full_name")
+            .order_by("rank")
+            .first()
+        )
+        if probe is None:
+            high = (low + high) // 2 - 1
+        elif (name_sort_text(probe.individual.full_name), probe.individual_id) < key:
+            previous_rank, low = probe.rank, probe.rank + 1
+        else:
+            next_rank, high = probe.rank, probe.rank - 1
+
+    if next_rank is None:
+        next_rank = previous_rank + 2 * RANK_GAP
+    if next_rank - previous_rank < 2:
+        # Share the neighbour's rank until the table is renumbered.
+        from .tasks import renumber_name_sort_keys
+
+        transaction.on_commit(renumber_name_sort_keys.enqueue)
+    IndividualNameSortKey.objects.update_or_create(
+        individual_id=individual.pk,
+        defaults={"rank": (previous_rank + next_rank) // 2},
+    )
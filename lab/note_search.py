@@ -0,0 +1,123 @@
+"""
+Full-text search over Note.content.
+
+The text index lives in the database and is maintained by it, so creating,
+editing or deleting a note only touches that note's index entry:
+
+* PostgreSQL: a generated `lab_note.search_vector` tsvector column with a GIN
+  index (migration 0007); snippets come from `ts_headline`.
+* SQLite: an external-content FTS5 table `lab_note_fts` kept in sync by
+  triggers on `lab_note`; snippets come from `snippet()`.
+
+Other backends fall back to a case-insensitive `LIKE` with a snippet cut in
+Python. Notes with a `private_owner` are only returned to that user.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Note
+
+NOTE_SEARCH_LIMIT = 25
+NOTE_SNIPPET_WORDS = 16
+
+# Highlight delimiters emitted by the database; swapped for <mark> after the
+# snippet has been HTML-escaped, so note content can never inject markup.
+_HIGHLIGHT_START = "\x02"
+_HIGHLIGHT_STOP = "\x03"
+
+
+def _query_words(query):
+    return re.findall(r"\w+", query.replace("İ", "i").lower())
+
+
+def _postgresql_hits(words, user, limit):
+    tsquery = " & ".join(f"{word}:*" for word in words)
+    sql = f"""
+        SELECT n.id,
+               ts_headline('simple', n.content, q,
+                           'StartSel={_HIGHLIGHT_START}, StopSel={_HIGHLIGHT_STOP}, '
+                           'MaxWords={NOTE_SNIPPET_WORDS}, MinWords=5, MaxFragments=2'),
+               ts_rank(n.search_vector, q) AS score
+        FROM lab_note n, to_tsquery('simple', %s) q
+        WHERE n.search_vector @@ q
+          AND (n.private_owner_id IS NULL OR n.private_owner_id = %s)
+        ORDER BY score DESC, n.id DESC
+        LIMIT %s
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [tsquery, user.pk, limit])
+        return cursor.fetchall()
+
+
+def _sqlite_hits(words, user, limit):
+    # Quoting every word keeps FTS5 operators in user input literal.
+    match = " ".join(f'"{word}"*' for word in words)
+    sql = f"""
+        SELECT n.id,
+               snippet(lab_note_fts, 0, '{_HIGHLIGHT_START}', '{_HIGHLIGHT_STOP}', '…', {NOTE_SNIPPET_WORDS}),
+               -bm25(lab_note_fts) AS score
+        FROM lab_note_fts
+        JOIN lab_note n ON n.id = lab_note_fts.rowid
+        WHERE lab_note_fts MATCH %s
+          AND (n.private_owner_id IS NULL OR n.private_owner_id = %s)
+        ORDER BY score DESC, n.id DESC
+        LIMIT %s
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [match, user.pk, limit])
+        return cursor.fetchall()
+
+
+def _fallback_snippet(content, words):
+    pattern = re.compile("|".join(re.escape(word) for word in words), re.IGNORECASE)
+    first = pattern.search(content)
+    start = max(0, first.start() - 60) if first else 0
+    excerpt = content[start:start + 200]
+    excerpt = pattern.sub(lambda found: f"{_HIGHLIGHT_START}{found.group(0)}{_HIGHLIGHT_STOP}", excerpt)
+    return ("…" if start else "") + excerpt
+
+
+def _fallback_hits(words, user, limit):
+    notes = Note.objects.filter(Q(private_owner__isnull=True) | Q(private_owner=user))
+    for word in words:
+        notes = notes.filter(content__icontains=word)
+    return [(note.pk, _fallback_snippet(note.content, words), 0.0) for note in notes[:limit]]
+
+
+def highlight(snippet):
+    """HTML for a database snippet: escaped text with the matches in <mark>."""
+    html = escape(snippet)
+    return mark_safe(html.replace(_HIGHLIGHT_START, "<mark>").replace(_HIGHLIGHT_STOP, "</mark>"))
+
+
+def search_notes(query, user, limit=NOTE_SEARCH_LIMIT):
+    """
+    Best matching notes visible to `user`, as dicts with the `note`, the
+    object it is attached to (`owner`), a highlighted `snippet` and `rank`.
+    Every query word must match (as a word prefix).
+    """
+    words = _query_words(query)
+    if not words:
+        return []
+    if connection.vendor == "postgresql":
+        hits = _postgresql_hits(words, user, limit)
+    elif connection.vendor == "sqlite":
+        hits = _sqlite_hits(words, user, limit)
+    else:
+        hits = _fallback_hits(words, user, limit)
+
+    notes = (
+        Note.objects.filter(pk__in=[note_id for note_id, _, _ in hits])
+        .select_related("user", "private_owner", "content_type")
+        .prefetch_related("content_object")
+        .in_bulk()
+    )
+    return [
+        {"note": notes[note_id], "owner": notes[note_id].content_object, "snippet": highlight(snippet), "rank": rank}
+        for note_id, snippet, rank in hits
+        if note_id in notes
+    ]
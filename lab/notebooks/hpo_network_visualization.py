@@ -25,12 +25,19 @@ def _(mo):
 def _(token):
     import _utils
 
+    # Server-maintained per-term counts (direct + ancestor-propagated), with each
+    # term's primary parent, so this notebook never has to parse hp.obo.
     rows = _utils.fetch_plot_data(
         token,
-        "Individual",
+        "HPOTermFrequency",
         {
-            "values": ["hpo_terms__identifier"],
-            "annotate": {"count": {"count": "id"}},
+            "values": [
+                "identifier",
+                "label",
+                "parent_identifier",
+                "direct_count",
+                "propagated_count",
+            ],
         },
     )
     return (rows,)
@@ -39,10 +46,6 @@ def _(token):
 @app.cell
 def _():
     import json
-    from functools import lru_cache
-    from pathlib import Path
-    import fastobo
-    import networkx as nx
     import warnings
 
     import _utils
@@ -52,74 +55,12 @@ def _():
         message=r"No path from .* to root node .*",
         category=UserWarning,
     )
-    warnings.filterwarnings(
-        "ignore",
-        message=r"The node .* is not in the graph.*",
-        category=UserWarning,
-    )
-
-    @lru_cache(maxsize=1)
-    def _resolve_hpo_obo_path() -> Path:
-        candidates = [
-            Path.cwd() / "ontologies" / "hp.obo",
-            Path.cwd().parent / "ontologies" / "hp.obo",
-            Path.cwd().parent.parent / "ontologies" / "hp.obo",
-        ]
-
-        file_path = globals().get("__file__")
-        if file_path:
-            file_path = Path(file_path).resolve()
-            candidates.extend(
-                [
-                    file_path.parents[2] / "ontologies" / "hp.obo",
-                    file_path.parent.parent / "ontologies" / "hp.obo",
-                ]
-            )
-
-        for candidate in candidates:
-            if candidate.is_file():
-                return candidate
 
-        raise FileNotFoundError(
-            "Could not find ontologies/hp.obo. Start Marimo from the RareIndex "
-            "project root, or set the working directory so the repo is on the path."
-        )
-
-    @lru_cache(maxsize=1)
-    def load_hpo_ontology():
-        obo_path = _resolve_hpo_obo_path()
-        graph = nx.DiGraph()
-
-        with obo_path.open("rb") as response:
-            hpo = fastobo.load(response)
-
-        for frame in hpo:
-            if isinstance(frame, fastobo.term.TermFrame):
-                term_id = str(frame.id)
-                graph.add_node(term_id, name=term_id)
-                for clause in frame:
-                    if isinstance(clause, fastobo.term.NameClause):
-                        graph.nodes[term_id]["name"] = str(clause.name)
-                    elif isinstance(clause, fastobo.term.IsAClause):
-                        graph.add_edge(term_id, str(clause.term))
-
-        return graph, hpo
-
-    def consolidate_terms(graph, terms, threshold=3):
+    def consolidate_terms(parents, terms, threshold=3):
+        """Roll terms used fewer than `threshold` times up into their primary parent."""
         working_counts = terms.copy()
         root_node = "HP:0000118"  # Phenotypic abnormality
 
-        invalid_terms = []
-        for term in working_counts:
-            if term not in graph:
-                warnings.warn(
-                    f"The node {term} is not in the graph. Removing from consolidation."
-                )
-                invalid_terms.append(term)
-
-        for term in invalid_terms:
-            working_counts.pop(term, None)
-
         while True:
             rare_terms = [
                 term for term, count in working_counts.items() if count < threshold
@@ -134,21 +75,28 @@ def _():
                 if term == root_node:
                     continue
 
-                try:
-                    path = nx.shortest_path(graph, term, root_node)
-                    if len(path) > 1:
-                        parent = path[1]
-                        count = working_counts.pop(term)
-                        working_counts[parent] = working_counts.get(parent, 0) + count
-                        changes_made = True
-                except (nx.NetworkXNoPath, IndexError):
-                    continue
+                parent = parents.get(term)
+                if parent:
+                    count = working_counts.pop(term)
+                    working_counts[parent] = working_counts.get(parent, 0) + count
+                    changes_made = True
 
             if not changes_made:
                 break
 
         return working_counts
 
+    def _path_to_root(parents, term_id, root_node):
+        path = [term_id]
+        seen = {term_id}
+        while path[-1] != root_node:
+            parent = parents.get(path[-1])
+            if not parent or parent in seen:
+                return None
+            path.append(parent)
+            seen.add(parent)
+        return path
+
     def _shorten_term_name(name: str) -> str:
         cleaned = name.replace("system", "sys.")
         cleaned = cleaned.replace("morphology", "morph.")
@@ -161,16 +109,6 @@ def _():
             cleaned = cleaned[:27] + "..."
         return cleaned
 
-    def _term_name(graph, hpo, term_id: str) -> str:
-        if term_id in graph:
-            return str(graph.nodes[term_id].get("name", term_id))
-        for frame in hpo:
-            if isinstance(frame, fastobo.term.TermFrame) and str(frame.id) == term_id:
-                for clause in frame:
-                    if isinstance(clause, fastobo.term.NameClause):
-                        return str(clause.name)
-        return term_id
-
     def _node_color(count: int, is_root: bool = False) -> str:
         if is_root:
             return "#1d4ed8"
@@ -185,76 +123,56 @@ def _():
         return "#93c5fd"
 
     def build_hpo_network_elements(api_rows, min_count=1, consolidation_threshold=12):
-        graph, hpo = load_hpo_ontology()
         root_node = "HP:0000118"  # Phenotypic abnormality
 
-        total_assignments = 0
+        names = {}
+        parents = {}
         term_counts = {}
+        total_assignments = 0
         for row in api_rows:
-            identifier = row.get("hpo_terms__identifier")
-            if identifier in (None, ""):
+            term_id = str(row.get("identifier") or "").strip()
+            if not term_id:
                 continue
-
-            raw_identifier = str(identifier).strip()
-            term_id = (
-                raw_identifier
-                if raw_identifier.startswith("HP:")
-                else f"HP:{raw_identifier}"
-            )
-            count = int(row.get("count", 0))
-            total_assignments += count
-            term_counts[term_id] = term_counts.get(term_id, 0) + count
+            names[term_id] = row.get("label") or term_id
+            parents[term_id] = row.get("parent_identifier") or ""
+            count = int(row.get("direct_count") or 0)
+            if count:
+                total_assignments += count
+                term_counts[term_id] = count
 
         consolidated_counts = consolidate_terms(
-            graph,
+            parents,
             term_counts,
             threshold=consolidation_threshold,
         )
 
-        subgraph = nx.DiGraph()
+        nodes = {}
+        edges = set()
+
+        def _add_node(term_id):
+            if term_id not in nodes:
+                nodes[term_id] = {
+                    "name": _shorten_term_name(str(names.get(term_id, term_id))),
+                    "count": consolidated_counts.get(term_id, 0),
+                    "term_id": term_id,
+                }
 
         for term_id, count in consolidated_counts.items():
-            if term_id in graph and count >= min_count:
-                name = _shorten_term_name(_term_name(graph, hpo, term_id))
-                subgraph.add_node(term_id, name=name, count=count, term_id=term_id)
-
-                try:
-                    path = nx.shortest_path(graph, term_id, root_node)
-                    for i in range(len(path) - 1):
-                        source = path[i]
-                        target = path[i + 1]
-
-                        if source not in subgraph:
-                            source_count = consolidated_counts.get(source, 0)
-                            subgraph.add_node(
-                                source,
-                                name=_shorten_term_name(_term_name(graph, hpo, source)),
-                                count=source_count,
-                                term_id=source,
-                            )
-                        if target not in subgraph:
-                            target_count = consolidated_counts.get(target, 0)
-                            subgraph.add_node(
-                                target,
-                                name=_shorten_term_name(_term_name(graph, hpo, target)),
-                                count=target_count,
-                                term_id=target,
-                            )
-
-                        subgraph.add_edge(source, target)
-                except nx.NetworkXNoPath:
-                    warnings.warn(f"No path from {term_id} to root node {root_node}")
-
-        if root_node not in subgraph:
-            subgraph.add_node(
-                root_node,
-                name=_shorten_term_name(_term_name(graph, hpo, root_node)),
-                count=consolidated_counts.get(root_node, 0),
-                term_id=root_node,
-            )
+            if count < min_count:
+                continue
+            path = _path_to_root(parents, term_id, root_node)
+            if path is None:
+                warnings.warn(f"No path from {term_id} to root node {root_node}")
+                continue
+            for node in path:
+                _add_node(node)
+            for source, target in zip(path, path[1:]):
+                edges.add((source, target))
+
+        _add_node(root_node)
 
         elements = []
-        for node_id, data in subgraph.nodes(data=True):
+        for node_id, data in nodes.items():
             count = int(data.get("count", 0))
             name = str(data.get("name", node_id))
             label = name
@@ -275,7 +193,7 @@ def _():
                 node_element["classes"] = "root"
             elements.append(node_element)
 
-        for source, target in subgraph.edges():
+        for source, target in sorted(edges):
             elements.append(
                 {
                     "data": {
@@ -286,7 +204,7 @@ def _():
                 }
             )
 
-        term_count = len([node for node in subgraph.nodes() if node != root_node])
+        term_count = len([node for node in nodes if node != root_node])
         return elements, term_count, total_assignments
 
     def cytoscape_html(
@@ -0,0 +1,161 @@
+"""
+Global search across the SearchValue index (see lab.search_index).
+
+A keystroke is one indexed query over the normalized values of every
+searchable model, ranked exact > prefix > contains (then shorter values
+first) like the per-list searches; only the few winning objects are loaded
+to build result links.
+"""
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Case, IntegerField, Value, When
+from django.db.models.functions import Length
+from django.urls import reverse
+from django.utils.http import urlencode
+from django.utils.text import Truncator
+
+from .models import CrossIdentifier, Family, Individual, Institution, Note, Project, SearchValue
+from .search_utils import normalize_search_text
+from variant.models import Gene, Variant
+
+OMNISEARCH_MIN_QUERY_LENGTH = 2
+OMNISEARCH_CANDIDATES = 60
+OMNISEARCH_PER_CATEGORY = 5
+
+MATCH_EXACT = 0
+MATCH_PREFIX = 1
+MATCH_CONTAINS = 2
+
+
+def _list_url(name, **params):
+    return f"{reverse(name)}?{urlencode(params)}"
+
+
+def _note_url(note):
+    if note.content_type.model_class() is Individual:
+        return reverse("lab:individual_detail", args=[note.object_id])
+    if note.content_type.model_class() is Project:
+        return reverse("lab:project_detail", args=[note.object_id])
+    return None
+
+
+# (category, queryset, presenter) per searchable model, in display order.
+OMNISEARCH_SOURCES = (
+    (
+        "Individuals",
+        lambda: CrossIdentifier.objects.select_related("id_type"),
+        lambda cross_id: {
+            "label": cross_id.id_value,
+            "detail": cross_id.id_type.name,
+            "url": reverse("lab:individual_detail", args=[cross_id.individual_id]),
+        },
+    ),
+    (
+        "Families",
+        lambda: Family.objects.all(),
+        lambda family: {
+            "label": family.family_id,
+            "detail": Truncator(family.description).chars(60),
+            "url": _list_url("lab:individual_list", family=family.pk),
+        },
+    ),
+    (
+        "Projects",
+        lambda: Project.objects.all(),
+        lambda project: {
+            "label": project.name,
+            "detail": Truncator(project.description).chars(60),
+            "url": reverse("lab:project_detail", args=[project.pk]),
+        },
+    ),
+    (
+        "Genes",
+        lambda: Gene.objects.all(),
+        lambda gene: {
+            "label": gene.symbol,
+            "detail": gene.name,
+            "url": _list_url("lab:variant_list", gene=gene.symbol),
+        },
+    ),
+    (
+        "Variants",
+        lambda: Variant.objects.select_related("snv"),
+        lambda variant: {
+            "label": variant.hgvs_name,
+            "detail": variant.type,
+            "url": reverse("lab:individual_detail", args=[variant.individual_id]),
+        },
+    ),
+    (
+        "Institutions",
+        lambda: Institution.objects.all(),
+        lambda institution: {
+            "label": institution.name,
+            "detail": institution.city or "",
+            "url": _list_url("lab:individual_list", institution_name=institution.name),
+        },
+    ),
+    (
+        "Notes",
+        lambda: Note.objects.select_related("content_type", "user"),
+        lambda note: {
+            "label": Truncator(note.content).chars(80),
+            "detail": f"{note.user.username} · {note.content_type.name}",
+            "url": _note_url(note),
+        },
+    ),
+)
+
+
+def _source_content_types():
+    models = [queryset().model for _, queryset, _ in OMNISEARCH_SOURCES]
+    return ContentType.objects.get_for_models(*models)
+
+
+def omnisearch(query, user):
+    """[{"category", "results": [{"label", "detail", "url", "match"}]}] for non-empty categories."""
+    normalized_query = normalize_search_text(query).strip()
+    if len(normalized_query) < OMNISEARCH_MIN_QUERY_LENGTH:
+        return []
+
+    content_types = _source_content_types()
+    note_type = content_types[Note]
+    hidden_notes = Note.objects.filter(private_owner__isnull=False).exclude(private_owner=user).values("pk")
+    candidates = (
+        SearchValue.objects.filter(content_type__in=content_types.values(), value__contains=normalized_query)
+        .exclude(content_type=note_type, object_id__in=hidden_notes)
+        .annotate(
+            match=Case(
+                When(value=normalized_query, then=Value(MATCH_EXACT)),
+                When(value__startswith=normalized_query, then=Value(MATCH_PREFIX)),
+                default=Value(MATCH_CONTAINS),
+                output_field=IntegerField(),
+            ),
+            value_length=Length("value"),
+        )
+        .order_by("match", "value_length", "object_id")
+        .values_list("content_type_id", "object_id", "match")[:OMNISEARCH_CANDIDATES]
+    )
+
+    best = {}
+    for content_type_id, object_id, match in candidates:
+        best.setdefault((content_type_id, object_id), match)
+
+    groups = []
+    for category, queryset, present in OMNISEARCH_SOURCES:
+        queryset = queryset()
+        content_type_id = content_types[queryset.model].pk
+        # `best` keeps the query's ranking order.
+        ranked = [
+            (match, object_id) for (type_id, object_id), match in best.items() if type_id == content_type_id
+        ][:OMNISEARCH_PER_CATEGORY]
+        if not ranked:
+            continue
+        objects = queryset.in_bulk([object_id for _, object_id in ranked])
+        results = [
+            {**present(objects[object_id]), "match": match}
+            for match, object_id in ranked
+            if object_id in objects
+        ]
+        if results:
+            groups.append({"category": category, "results": results})
+    return groups
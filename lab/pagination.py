@@ -0,0 +1,257 @@
+"""
+Pagination for the large list views.
+
+`HydratedPagePaginator` pages a light table queryset and hydrates only the
+rows of the current page with the heavy prefetches. List views using
+`CursorPaginationMixin` page it by keyset instead of OFFSET: the table's
+active sort columns plus the primary key become a cursor
+(`?page=c.<token>`) naming the last row shown, and the next page is a
+`WHERE (sort keys) > (cursor)` range read of `per_page + 1` rows. So
+infinite-scroll loads cost the same at any depth.
+
+In cursor mode the total shown in the header comes from `cached_count`. That
+count is cached per filtered query for a short time rather than recounted on
+every scroll. Sorts that cannot be expressed as a keyset (ordering by a
+multi-valued relation, a related model's default ordering or an arbitrary
+expression), and old numeric `?page=N` links, fall back to offset pages.
+"""
+import base64
+import binascii
+import datetime
+import decimal
+import hashlib
+import json
+import uuid
+
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, FieldDoesNotExist
+from django.core.paginator import Page, Paginator
+from django.db.models import F, OrderBy, Q
+from django.utils.functional import cached_property
+from django_tables2.rows import BoundRows
+
+LIST_COUNT_CACHE_TIMEOUT = 120
+CURSOR_PREFIX = "c."
+
+
+def queryset_signature(queryset):
+    """Hash of the queryset's SQL without ordering, or None if it matches nothing."""
+    try:
+        sql, params = queryset.order_by().query.sql_with_params()
+    except EmptyResultSet:
+        return None
+    return hashlib.sha256(f"{sql}|{params!r}".encode("utf-8")).hexdigest()
+
+
+def cached_count(queryset, timeout=LIST_COUNT_CACHE_TIMEOUT):
+    """`queryset.count()`, cached per SQL statement for `timeout` seconds (may lag recent writes)."""
+    signature = queryset_signature(queryset)
+    if signature is None:
+        return 0
+    key = f"list_count:{signature}"
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, timeout)
+    return count
+
+
+def _single_valued(queryset, name):
+    """Whether ordering by `name` gives one comparable value per row."""
+    annotation = queryset.query.annotations.get(name)
+    if annotation is not None:
+        return not annotation.contains_aggregate
+    opts = queryset.model._meta
+    parts = name.split("__")
+    for position, part in enumerate(parts):
+        try:
+            field = opts.get_field(part)
+        except FieldDoesNotExist:
+            return False
+        if not field.is_relation:
+            return position == len(parts) - 1
+        if field.many_to_many or field.one_to_many or position == len(parts) - 1:
+            # Multi-valued, or ordered through the related model's Meta.ordering.
+            return False
+        opts = field.related_model._meta
+    return False
+
+
+def keyset_ordering(queryset):
+    """[(name, descending)] for the queryset's ordering, ending in "pk"; None if not keyset-able."""
+    query = queryset.query
+    ordering = query.order_by or (query.default_ordering and queryset.model._meta.ordering) or ()
+    pk_names = {"pk", queryset.model._meta.pk.name, queryset.model._meta.pk.attname}
+    keys = []
+    for term in ordering:
+        if isinstance(term, str):
+            name, descending = term.lstrip("-"), term.startswith("-")
+        elif isinstance(term, OrderBy) and isinstance(term.expression, F):
+            name, descending = term.expression.name, term.descending
+        else:
+            return None
+        if name in pk_names:
+            return keys + [("pk", descending)]
+        if not _single_valued(queryset, name):
+            return None
+        keys.append((name, descending))
+    return keys + [("pk", keys[-1][1] if keys else False)]
+
+
+def _keyset_order_by(keys):
+    # NULLs always last, so the cursor comparison below is the same on every backend.
+    return [F(name).desc(nulls_last=True) if descending else F(name).asc(nulls_last=True) for name, descending in keys]
+
+
+def _after(keys, values):
+    """Q for the rows that sort after a row with the given key values."""
+    condition = Q(pk__in=[])
+    equal = Q()
+    for (name, descending), value in zip(keys, values):
+        if value is None:
+            beyond = Q(pk__in=[])
+            same = Q(**{f"{name}__isnull": True})
+        else:
+            beyond = Q(**{f"{name}__{'lt' if descending else 'gt'}": value}) | Q(**{f"{name}__isnull": True})
+            same = Q(**{name: value})
+        condition |= equal & beyond
+        equal &= same
+    return condition
+
+
+def _json_value(value):
+    # Full-precision ISO strings: the fields parse them back for the comparison.
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    raise TypeError(f"Unsupported cursor value: {value!r}")
+
+
+def encode_cursor(keys, values):
+    payload = json.dumps([keys, list(values)], default=_json_value, separators=(",", ":"))
+    return CURSOR_PREFIX + base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token, keys):
+    """Key values from `token`, or None if it is not a cursor for this ordering."""
+    if not token or not token.startswith(CURSOR_PREFIX):
+        return None
+    data = token[len(CURSOR_PREFIX):]
+    try:
+        cursor_keys, values = json.loads(base64.urlsafe_b64decode(data + "=" * (-len(data) % 4)))
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        return None
+    if [tuple(key) for key in cursor_keys] != [tuple(key) for key in keys] or len(values) != len(keys):
+        return None
+    return values
+
+
+class CursorPage(Page):
+    """A keyset page: `number` and `next_page_number()` are cursor tokens (1 for the first page)."""
+
+    def __init__(self, object_list, number, paginator, next_cursor):
+        super().__init__(object_list, number, paginator)
+        self.next_cursor = next_cursor
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return False
+
+    def next_page_number(self):
+        return self.next_cursor
+
+
+class HydratedPagePaginator(Paginator):
+    """Paginate a light table queryset, then hydrate only the current page rows."""
+
+    def __init__(self, object_list, per_page, *args, hydrated_queryset=None, cursor=None, **kwargs):
+        self.hydrated_queryset = hydrated_queryset
+        # None: offset pages. Otherwise keyset pages; the request's page value.
+        self.cursor = cursor
+        super().__init__(object_list, per_page, *args, **kwargs)
+
+    def _table_queryset(self):
+        table_data = getattr(self.object_list, "data", None)
+        queryset = getattr(table_data, "data", table_data)
+        return queryset if hasattr(queryset, "values_list") else None
+
+    @cached_property
+    def count(self):
+        queryset = self._table_queryset()
+        if self.cursor is not None and queryset is not None:
+            return cached_count(queryset)
+        return super().count
+
+    def page(self, number):
+        # django-tables2 passes numeric ?page values as ints and anything else as 1.
+        if self.cursor is not None and str(number) == "1":
+            queryset = self._table_queryset()
+            keys = keyset_ordering(queryset) if queryset is not None else None
+            if keys is not None:
+                return self._cursor_page(queryset, keys)
+        return super().page(number)
+
+    def _cursor_page(self, queryset, keys):
+        values = decode_cursor(self.cursor, keys)
+        ordered = queryset.order_by(*_keyset_order_by(keys))
+        if values is not None:
+            ordered = ordered.filter(_after(keys, values))
+        rows = list(ordered.values_list(*(name for name, _ in keys))[: self.per_page + 1])
+
+        next_cursor = encode_cursor(keys, rows[self.per_page - 1]) if len(rows) > self.per_page else None
+        page_ids = [row[-1] for row in rows[: self.per_page]]
+        source = self.hydrated_queryset if self.hydrated_queryset is not None else queryset
+        records_by_id = {record.pk: record for record in source.filter(pk__in=page_ids)}
+        object_list = BoundRows(
+            data=[records_by_id[pk] for pk in page_ids if pk in records_by_id],
+            table=self.object_list.table,
+            pinned_data=self.object_list.pinned_data,
+        )
+        return CursorPage(object_list, self.cursor if values is not None else 1, self, next_cursor)
+
+    def _get_page(self, object_list, number, paginator):
+        if self.hydrated_queryset is not None and isinstance(object_list, BoundRows):
+            object_list = BoundRows(
+                data=self._hydrate_records(object_list),
+                table=object_list.table,
+                pinned_data=object_list.pinned_data,
+            )
+        return super()._get_page(object_list, number, paginator)
+
+    def _hydrate_records(self, bound_rows):
+        table_data = getattr(bound_rows, "data", None)
+        page_queryset = getattr(table_data, "data", table_data)
+        if not hasattr(page_queryset, "values_list"):
+            return list(table_data or [])
+
+        page_ids = list(page_queryset.values_list("pk", flat=True))
+        if not page_ids:
+            return []
+
+        hydrated_by_id = {
+            record.pk: record
+            for record in self.hydrated_queryset.filter(pk__in=page_ids)
+        }
+        return [hydrated_by_id[pk] for pk in page_ids if pk in hydrated_by_id]
+
+
+class CursorPaginationMixin:
+    """
+    For SingleTableMixin list views: page the table by keyset through
+    HydratedPagePaginator (see module docstring). Place before SingleTableMixin.
+    """
+
+    cursor_pagination = True
+
+    def get_table_pagination(self, table):
+        paginate = super().get_table_pagination(table)
+        if paginate is False or not self.cursor_pagination:
+            return paginate
+        if paginate is True:
+            paginate = {}
+        paginate.setdefault("paginator_class", HydratedPagePaginator)
+        paginate["cursor"] = self.request.GET.get(table.prefixed_page_field, "")
+        return paginate
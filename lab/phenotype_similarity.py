@@ -0,0 +1,271 @@
+"""
+Semantic similarity between individuals' HPO profiles.
+
+Information content comes from the cohort itself: IC(t) = log(N / n_t), where
+n_t is the number of individuals annotated with t or a descendant of t.
+Term-to-term similarity is Resnik (IC of the most informative common
+ancestor) or Lin (2 * Resnik / (IC(a) + IC(b))); profiles are compared with
+the symmetric best-match average.
+
+`PhenotypeSimilarityIndex` holds the cohort as numpy arrays -- a boolean
+ancestor matrix for every term used directly by someone and a CSR list of each
+individual's terms -- so one query profile is scored against every individual
+in a single vectorized pass.
+
+Each individual's ancestor-closed profile is cached under its own key. An
+hpo_terms change drops only the changed individuals' profiles, bumps the
+similarity version and logs the changed primary keys under that version (see
+signals.py). Each process then re-reads just those profiles, adjusts its
+cohort term counts (the only cohort-wide aggregate, needed for IC) and
+reassembles the arrays. It falls back to loading every profile when the log
+is incomplete or the HPO release changed.
+"""
+import threading
+from collections import Counter
+
+import numpy as np
+from django.core.cache import cache
+
+from ontologies.utils import HPO_DESCENDANT_CACHE_VERSION_KEY, get_hpo_graph
+
+from .hpo_frequency import hpo_profiles
+from .models import Individual
+
+SIMILARITY_VERSION_KEY = "phenotype_similarity_version"
+# Version -> individuals whose hpo_terms changed in the bump to that version.
+SIMILARITY_CHANGES_KEY = "phenotype_similarity_changes:{}"
+SIMILARITY_CHANGES_TTL = 60 * 60 * 24
+SIMILARITY_MAX_CHANGE_LOG = 1000
+# (HPO version, individual) -> (direct OBO IDs, ancestor-closed OBO IDs).
+PROFILE_CACHE_KEY = "phenotype_profile:{}:{}"
+PROFILE_CACHE_TTL = 60 * 60 * 24 * 7
+PROFILE_BATCH_SIZE = 1000
+SIMILARITY_METHODS = ("resnik", "lin")
+DEFAULT_SIMILAR_LIMIT = 10
+SIMILAR_FILTER_LIMIT = 100
+
+
+def _obo_id(identifier):
+    return identifier if ":" in identifier else f"HP:{identifier}"
+
+
+class PhenotypeSimilarityIndex:
+    """Cohort HPO profiles prepared for vectorized Resnik/Lin best-match-average scoring."""
+
+    def __init__(self, profiles, ancestors, term_counts=None):
+        """
+        profiles: {individual_pk: iterable of directly annotated OBO IDs}
+        ancestors: callable returning the ancestor OBO IDs (exclusive) of an OBO ID
+        term_counts: optional {OBO ID: individuals carrying it or a descendant},
+            counted from `profiles` when not given
+        """
+        self._ancestors = ancestors
+        profiles = {pk: sorted(set(terms)) for pk, terms in profiles.items() if terms}
+        self.individual_pks = np.array(sorted(profiles), dtype=np.int64)
+        self.cohort_size = len(self.individual_pks)
+
+        # Direct terms (rows) and every term they imply (columns).
+        self.terms = sorted({term for terms in profiles.values() for term in terms})
+        self.term_position = {term: position for position, term in enumerate(self.terms)}
+        term_ancestors = [{term, *ancestors(term)} for term in self.terms]
+        self.universe = sorted(set().union(*term_ancestors)) if term_ancestors else []
+        self.universe_position = {term: position for position, term in enumerate(self.universe)}
+
+        self.ancestor_matrix = np.zeros((len(self.terms), len(self.universe)), dtype=bool)
+        for row, implied in enumerate(term_ancestors):
+            self.ancestor_matrix[row, [self.universe_position[term] for term in implied]] = True
+
+        # CSR of each individual's direct term rows.
+        lengths = np.array([len(profiles[pk]) for pk in self.individual_pks.tolist()], dtype=np.int64)
+        self.profile_indptr = np.zeros(self.cohort_size + 1, dtype=np.int64)
+        self.profile_indptr[1:] = np.cumsum(lengths)
+        self.profile_terms = np.array(
+            [self.term_position[term] for pk in self.individual_pks.tolist() for term in profiles[pk]],
+            dtype=np.int64,
+        )
+
+        # n_t per universe column: each individual counted once per implied term.
+        if term_counts is not None:
+            member_columns = np.array([term_counts.get(term, 0) for term in self.universe], dtype=np.int64)
+        else:
+            member_columns = np.zeros(len(self.universe), dtype=np.int64)
+            for start, end in zip(self.profile_indptr[:-1].tolist(), self.profile_indptr[1:].tolist()):
+                member_columns += self.ancestor_matrix[self.profile_terms[start:end]].any(axis=0)
+        self.ic = self._information_content(member_columns)
+        self.term_ic = self.ic[[self.universe_position[term] for term in self.terms]] if self.terms else np.zeros(0)
+
+    def __len__(self):
+        return self.cohort_size
+
+    def _information_content(self, counts):
+        if not self.cohort_size:
+            return np.zeros(len(counts))
+        # Terms nobody in the cohort carries are as specific as a single-member term.
+        return np.log(self.cohort_size / np.maximum(counts, 1))
+
+    def _query_similarity(self, query_terms, method):
+        """(query term IC, len(query) x len(self.terms) term similarity matrix)."""
+        query_ic = []
+        rows = []
+        for term in query_terms:
+            column = self.universe_position.get(term)
+            query_ic.append(self.ic[column] if column is not None else self._information_content(np.zeros(1))[0])
+            implied = [self.universe_position[t] for t in {term, *self._ancestors(term)} if t in self.universe_position]
+            if implied:
+                # Resnik: the most informative ancestor shared with each cohort term.
+                rows.append((self.ancestor_matrix[:, implied] * self.ic[implied]).max(axis=1))
+            else:
+                rows.append(np.zeros(len(self.terms)))
+        query_ic = np.array(query_ic)
+        similarity = np.vstack(rows)
+        if method == "lin":
+            denominator = query_ic[:, None] + self.term_ic[None, :]
+            similarity = np.divide(
+                2 * similarity, denominator, out=np.zeros_like(similarity), where=denominator > 0
+            )
+        return query_ic, similarity
+
+    def score(self, query_terms, method="resnik"):
+        """Best-match-average similarity of `query_terms` to every individual, aligned with individual_pks."""
+        if method not in SIMILARITY_METHODS:
+            raise ValueError(f"Unknown similarity method: {method}")
+        query_terms = sorted({_obo_id(term) for term in query_terms})
+        if not query_terms or not self.cohort_size or not self.terms:
+            return np.zeros(self.cohort_size)
+
+        _, similarity = self._query_similarity(query_terms, method)
+        per_pair = similarity[:, self.profile_terms]
+        starts = self.profile_indptr[:-1]
+        lengths = np.diff(self.profile_indptr)
+
+        # Query -> individual: for each query term its best match in each profile.
+        query_best = np.maximum.reduceat(per_pair, starts, axis=1).mean(axis=0)
+        # Individual -> query: for each profile term its best match in the query.
+        profile_best = np.add.reduceat(per_pair.max(axis=0), starts) / lengths
+        return (query_best + profile_best) / 2
+
+    def profile(self, individual_pk):
+        position = int(np.searchsorted(self.individual_pks, individual_pk))
+        if position >= self.cohort_size or self.individual_pks[position] != individual_pk:
+            return []
+        start, end = self.profile_indptr[position], self.profile_indptr[position + 1]
+        return [self.terms[row] for row in self.profile_terms[start:end].tolist()]
+
+    def rank(self, query_terms, method="resnik", exclude_pks=(), limit=DEFAULT_SIMILAR_LIMIT, min_score=0.0):
+        """[(individual_pk, score)] best first."""
+        scores = self.score(query_terms, method)
+        if not self.cohort_size:
+            return []
+        keep = scores > min_score
+        if exclude_pks:
+            keep &= ~np.isin(self.individual_pks, list(exclude_pks))
+        candidates = np.flatnonzero(keep)
+        order = candidates[np.lexsort((self.individual_pks[candidates], -scores[candidates]))]
+        if limit:
+            order = order[:limit]
+        return [(int(self.individual_pks[i]), float(scores[i])) for i in order]
+
+    def similar_to(self, individual_pk, **kwargs):
+        """Individuals ranked by similarity to `individual_pk`'s own profile."""
+        kwargs.setdefault("exclude_pks", {individual_pk})
+        return self.rank(self.profile(individual_pk), **kwargs)
+
+
+def individual_profiles(individual_ids):
+    """
+    {individual_pk: (direct, ancestor-closed OBO IDs)} for those of `individual_ids`
+    with HPO terms, read from the per-individual cache and filled in on a miss.
+    """
+    hpo_version = cache.get(HPO_DESCENDANT_CACHE_VERSION_KEY, 1)
+    individual_ids = list(individual_ids)
+    profiles = {}
+    for start in range(0, len(individual_ids), PROFILE_BATCH_SIZE):
+        batch = individual_ids[start:start + PROFILE_BATCH_SIZE]
+        keys = {PROFILE_CACHE_KEY.format(hpo_version, pk): pk for pk in batch}
+        cached = {keys[key]: profile for key, profile in cache.get_many(keys).items()}
+        missing = [pk for pk in batch if pk not in cached]
+        if missing:
+            computed = hpo_profiles(missing)
+            cache.set_many(
+                {PROFILE_CACHE_KEY.format(hpo_version, pk): profile for pk, profile in computed.items()},
+                PROFILE_CACHE_TTL,
+            )
+            cached.update(computed)
+        profiles.update((pk, profile) for pk, profile in cached.items() if profile[0])
+    return profiles
+
+
+def invalidate_phenotype_profiles(individual_ids):
+    """Drop the cached profiles of `individual_ids` and log them under a new similarity version."""
+    individual_ids = sorted(set(individual_ids))
+    hpo_version = cache.get(HPO_DESCENDANT_CACHE_VERSION_KEY, 1)
+    cache.delete_many([PROFILE_CACHE_KEY.format(hpo_version, pk) for pk in individual_ids])
+    cache.add(SIMILARITY_VERSION_KEY, 1, None)
+    version = cache.incr(SIMILARITY_VERSION_KEY)
+    cache.set(SIMILARITY_CHANGES_KEY.format(version), individual_ids, SIMILARITY_CHANGES_TTL)
+
+
+def _changed_since(version, current):
+    """Individuals changed between two similarity versions, or None when the log doesn't cover them."""
+    if version is None or not 0 <= current - version <= SIMILARITY_MAX_CHANGE_LOG:
+        return None
+    keys = [SIMILARITY_CHANGES_KEY.format(step) for step in range(version + 1, current + 1)]
+    logged = cache.get_many(keys)
+    if len(logged) != len(keys):
+        return None
+    return {pk for individual_ids in logged.values() for pk in individual_ids}
+
+
+def _refresh_profiles(version, hpo_version):
+    """Bring the process's profiles and term counts to `version`, re-reading only changed individuals."""
+    signature = _index_state["signature"]
+    changed = _changed_since(signature[0], version) if signature and signature[1] == hpo_version else None
+    # Left unset until the index is rebuilt, so a failure part-way means a full load next time.
+    _index_state["signature"] = None
+    if changed is None:
+        individual_ids = Individual.hpo_terms.through.objects.values_list("individual_id", flat=True).distinct()
+        profiles = individual_profiles(individual_ids)
+        _index_state["profiles"] = profiles
+        _index_state["counts"] = Counter(term for _, closed in profiles.values() for term in closed)
+        return
+
+    profiles, counts = _index_state["profiles"], _index_state["counts"]
+    updated = individual_profiles(changed)
+    for pk in changed:
+        previous = profiles.pop(pk, None)
+        if previous:
+            counts.subtract(previous[1])
+        if pk in updated:
+            profiles[pk] = updated[pk]
+            counts.update(updated[pk][1])
+    _index_state["counts"] = +counts
+
+
+_index_lock = threading.Lock()
+_index_state = {"signature": None, "index": None, "profiles": {}, "counts": Counter()}
+
+
+def get_phenotype_similarity_index():
+    """The process-wide index, patched after hpo_terms changes and rebuilt after an HPO reload."""
+    signature = (
+        cache.get(SIMILARITY_VERSION_KEY, 1),
+        cache.get(HPO_DESCENDANT_CACHE_VERSION_KEY, 1),
+    )
+    if _index_state["signature"] != signature:
+        with _index_lock:
+            if _index_state["signature"] != signature:
+                _refresh_profiles(*signature)
+                _index_state["index"] = PhenotypeSimilarityIndex(
+                    {pk: direct for pk, (direct, _) in _index_state["profiles"].items()},
+                    get_hpo_graph().ancestors,
+                    term_counts=_index_state["counts"],
+                )
+                _index_state["signature"] = signature
+    return _index_state["index"]
+
+
+def similar_individuals(individual, method="resnik", limit=DEFAULT_SIMILAR_LIMIT):
+    """[(Individual, score)] most similar to `individual`, best first."""
+    ranked = get_phenotype_similarity_index().similar_to(individual.pk, method=method, limit=limit)
+    individuals = Individual.objects.select_related("family").in_bulk([pk for pk, _ in ranked])
+    return [(individuals[pk], score) for pk, score in ranked if pk in individuals]
@@ -0,0 +1,217 @@
+"""
+Materialized status badges for individual rows.
+
+An individual's row shows its own statuses plus the statuses of the objects in
+its workflow subtree (projects and their tasks, its tasks, samples -> tests ->
+pipelines -> analyses -> reports and their tasks, and variants) whose Status
+lists Individual in `connected_classes`. `collect_individual_row_statuses`
+walks that tree depth first, object by object. Here the same set is computed
+with a few queries per source type for a batch of individuals. Each object
+gets a walk key (its path of sibling positions), so sorting badges by the key
+of the first object carrying them gives the walk's order. The result is
+stored in `IndividualRowStatus`.
+
+lab.signals recomputes the affected individuals whenever a TaggedStatus is
+added or removed, a tagged workflow object or task goes away, or project
+membership changes. The functions take an optional app registry so the data
+migration that fills the table can run them against its historical models.
+"""
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+
+from .models import (
+    Analysis,
+    AnalysisReport,
+    Individual,
+    IndividualRowStatus,
+    Pipeline,
+    Project,
+    Sample,
+    Status,
+    TaggedStatus,
+    Task,
+    Test,
+)
+from variant.models import Variant
+
+ROW_STATUS_BATCH_SIZE = 500
+
+# (model, lookup from the model to its individual(s), parent source and the
+# field pointing at it (None: the individual), whether its tasks are shown),
+# parents before children.
+ROW_STATUS_SOURCES = (
+    (Individual, "pk", None, None, True),
+    (Project, "individuals", None, None, True),
+    (Sample, "individual", None, None, True),
+    (Test, "sample__individual", Sample, "sample", True),
+    (Pipeline, "test__sample__individual", Test, "test", True),
+    (Analysis, "pipeline__test__sample__individual", Pipeline, "pipeline", True),
+    (AnalysisReport, "analysis__pipeline__test__sample__individual", Analysis, "analysis", False),
+    (Variant, "individual", None, None, False),
+)
+
+# Walk order below the individual: projects (each followed by its tasks), the
+# individual's tasks, samples and their subtrees, variants. Below any other
+# object its tasks come first (TASK_BRANCH), then its children (CHILD_BRANCH).
+ROOT_BRANCHES = {Project: 1, Task: 2, Sample: 3, Variant: 4}
+TASK_BRANCH = 1
+CHILD_BRANCH = 2
+
+
+def _registry_model(registry, model):
+    return registry.get_model(model._meta.label)
+
+
+def _content_type_ids(model, registry=apps):
+    """Content types of `model` and its subclasses (a tagged SNV is tagged as SNV)."""
+    model = _registry_model(registry, model)
+    models = [candidate for candidate in registry.get_models() if issubclass(candidate, model)]
+    content_types = _registry_model(registry, ContentType).objects.get_for_models(*models)
+    return [content_type.pk for content_type in content_types.values()]
+
+
+def _sibling_ordered(model, registry):
+    """`model`'s rows in the order its related managers list them."""
+    return _registry_model(registry, model)._base_manager.order_by(*model._meta.ordering, "pk")
+
+
+def _objects_by_source(individual_ids, registry=apps):
+    """
+    [(model, {object pk: (walk key, {individual ids})})] for each source and
+    then its tasks, parents before children.
+    """
+    sources = []
+    walk_keys = {}
+    for model, lookup, parent, parent_field, with_tasks in ROW_STATUS_SOURCES:
+        fields = ["pk", lookup, f"{parent_field}_id"] if parent else ["pk", lookup]
+        rows = _sibling_ordered(model, registry).filter(**{f"{lookup}__in": individual_ids}).values_list(*fields)
+        objects = {}
+        for position, (pk, individual_id, *parent_pk) in enumerate(rows):
+            if pk not in objects:
+                if model is Individual:
+                    key = ()
+                elif parent is None:
+                    key = (ROOT_BRANCHES[model], position)
+                else:
+                    key = walk_keys[parent][parent_pk[0]] + (CHILD_BRANCH, position)
+                objects[pk] = (key, set())
+            objects[pk][1].add(individual_id)
+        walk_keys[model] = {pk: key for pk, (key, _) in objects.items()}
+        sources.append((model, objects))
+        if not with_tasks or not objects:
+            continue
+
+        tasks = _sibling_ordered(Task, registry)
+        if model is Project:
+            tasks = tasks.filter(project_id__in=objects).values_list("pk", "project_id")
+        else:
+            tasks = tasks.filter(
+                content_type_id__in=_content_type_ids(model, registry), object_id__in=objects
+            ).values_list("pk", "object_id")
+        task_objects = {}
+        for position, (task_pk, owner_pk) in enumerate(tasks):
+            owner_key, owners = objects[owner_pk]
+            if model is Individual:
+                key = (ROOT_BRANCHES[Task], position)
+            else:
+                key = owner_key + (TASK_BRANCH, position)
+            # A task both on a project and on a workflow object is listed under each.
+            task_objects.setdefault(task_pk, (key, set()))[1].update(owners)
+        sources.append((Task, task_objects))
+    return sources
+
+
+def _row_status_ids(individual_ids, registry=apps):
+    """{individual id: [status ids in badge order]} for the given individuals."""
+    individual_type = _registry_model(registry, ContentType).objects.get_for_model(
+        _registry_model(registry, Individual)
+    )
+    statuses = _registry_model(registry, Status).objects
+    connected = set(statuses.filter(connected_classes=individual_type).values_list("pk", flat=True))
+    names = dict(statuses.values_list("pk", "name"))
+
+    # Individual -> {status id: (walk key, name, pk)} of the first object showing it.
+    first_seen = {pk: {} for pk in individual_ids}
+    for model, objects in _objects_by_source(individual_ids, registry):
+        if not objects:
+            continue
+        tagged = _registry_model(registry, TaggedStatus).objects.filter(
+            content_type_id__in=_content_type_ids(model, registry), object_id__in=objects
+        ).values_list("object_id", "tag_id")
+        for object_id, status_id in tagged:
+            # An individual's own statuses are always shown.
+            if model is not Individual and status_id not in connected:
+                continue
+            key, owners = objects[object_id]
+            order = (key, names[status_id], status_id)
+            for individual_id in owners:
+                seen = first_seen[individual_id]
+                if status_id not in seen or order < seen[status_id]:
+                    seen[status_id] = order
+    return {pk: sorted(seen, key=seen.get) for pk, seen in first_seen.items()}
+
+
+def refresh_row_statuses(individual_ids, registry=apps):
+    """Recompute the stored row statuses of the given individuals."""
+    individuals = _registry_model(registry, Individual)
+    row_status = _registry_model(registry, IndividualRowStatus)
+    individual_ids = sorted({pk for pk in individual_ids if pk is not None})
+    for start in range(0, len(individual_ids), ROW_STATUS_BATCH_SIZE):
+        batch = list(
+            individuals.objects.filter(pk__in=individual_ids[start:start + ROW_STATUS_BATCH_SIZE])
+            .values_list("pk", flat=True)
+        )
+        rows = _row_status_ids(batch, registry)
+        with transaction.atomic():
+            row_status.objects.filter(individual_id__in=batch).delete()
+            row_status.objects.bulk_create(
+                [
+                    row_status(individual_id=individual_id, status_id=status_id, position=position)
+                    for individual_id, status_ids in rows.items()
+                    for position, status_id in enumerate(status_ids)
+                ]
+            )
+
+
+def rebuild_row_statuses(registry=apps):
+    """Recompute every individual's row statuses. Returns the number of individuals."""
+    individual_ids = list(_registry_model(registry, Individual).objects.values_list("pk", flat=True))
+    refresh_row_statuses(individual_ids, registry)
+    return len(individual_ids)
+
+
+def row_status_models():
+    """Models whose deletion can drop badges from a row (with subclasses, e.g. SNV)."""
+    sources = tuple(model for model, *_ in ROW_STATUS_SOURCES if model is not Individual) + (Task,)
+    return [model for model in apps.get_models() if issubclass(model, sources)]
+
+
+def row_status_individual_ids(obj):
+    """Ids of the individuals whose row statuses may depend on `obj`'s statuses."""
+    if obj is None:
+        return set()
+    if isinstance(obj, Individual):
+        return {obj.pk}
+    if isinstance(obj, Task):
+        individual_ids = row_status_individual_ids(obj.content_object)
+        if obj.project_id:
+            individual_ids |= set(
+                Project.individuals.through.objects.filter(project_id=obj.project_id)
+                .values_list("individual_id", flat=True)
+            )
+        return individual_ids
+    if isinstance(obj, Project):
+        return set(obj.individuals.values_list("pk", flat=True))
+    for model, lookup, *_ in ROW_STATUS_SOURCES:
+        if isinstance(obj, model):
+            return set(model._base_manager.filter(pk=obj.pk).values_list(lookup, flat=True)) - {None}
+    return set()
+
+
+def row_statuses(individual):
+    """Stored row statuses of `individual`, using a `row_statuses__status` prefetch when present."""
+    rows = getattr(individual, "_prefetched_objects_cache", {}).get("row_statuses")
+    if rows is None:
+        rows = individual.row_statuses.select_related("status")
+    return [row.status for row in rows]
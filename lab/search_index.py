@@ -0,0 +1,151 @@
+"""
+Persisted `normalize_search_text` output for the text fields search boxes use.
+
+Each registered (model, field) value is stored once, normalized, in
+`SearchValue`, so `search_utils.normalized_contains_q` can answer a search
+with an indexed `LIKE` (a pg_trgm GIN index on PostgreSQL) instead of pulling
+the whole table into Python. Rows are kept current by the post_save /
+post_delete handlers in lab.signals; bulk writers call `index_search_values`
+or `rebuild_search_values`, and `rebuild_search_index` backfills everything.
+The rebuild takes an optional app registry so the data migration that fills
+the table can run it against its historical models.
+
+Encrypted fields (e.g. Individual.full_name) are deliberately not registered.
+"""
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+
+from .models import SearchValue
+from .search_utils import normalize_search_text
+
+# Names that are not concrete fields (e.g. Variant.locus) are read from model
+# instances, so properties can be indexed too.
+SEARCH_INDEXED_FIELDS = {
+    "lab.Institution": ("name",),
+    "lab.Project": ("name", "description"),
+    "lab.Family": ("family_id", "description"),
+    "lab.IdentifierType": ("name",),
+    "lab.CrossIdentifier": ("id_value",),
+    "lab.Note": ("content",),
+    "variant.Variant": ("chromosome", "locus", "hgvs_name"),
+    "variant.Gene": ("symbol",),
+}
+# Relations the computed fields read, joined so instances load in one query per batch.
+SEARCH_INDEX_SELECT_RELATED = {
+    "variant.Variant": ("snv",),
+}
+SEARCH_INDEX_BATCH_SIZE = 2000
+
+
+def indexed_models(registry=apps):
+    """Registered models and their subclasses (child saves send their own signals)."""
+    registered = tuple(registry.get_model(label) for label in SEARCH_INDEXED_FIELDS)
+    return [model for model in registry.get_models() if issubclass(model, registered)]
+
+
+def indexed_fields(model):
+    """(registered model, field names) for `model` or its nearest registered parent."""
+    for klass in [model, *model._meta.get_parent_list()]:
+        fields = SEARCH_INDEXED_FIELDS.get(klass._meta.label)
+        if fields:
+            return klass, fields
+    return None, ()
+
+
+def needs_reindex(model, update_fields):
+    """Whether a save with `update_fields` can change the model's indexed values."""
+    registered, fields = indexed_fields(model)
+    if not fields:
+        return False
+    if update_fields is None:
+        return True
+    concrete = {field.name for field in registered._meta.concrete_fields}
+    return any(field not in concrete or field in update_fields for field in fields)
+
+
+def _live_instance(instance, copies=None):
+    """
+    Copy of a historical-model `instance` (and its selected relations) as the
+    current model, whose properties the computed fields read.
+    """
+    model = apps.get_model(instance._meta.label)
+    if isinstance(instance, model):
+        return instance
+    copies = {} if copies is None else copies
+    if id(instance) not in copies:
+        attnames = {field.attname for field in instance._meta.concrete_fields}
+        fields = [field.attname for field in model._meta.concrete_fields if field.attname in attnames]
+        live = copies[id(instance)] = model.from_db(instance._state.db, fields, [getattr(instance, name) for name in fields])
+        for name, related in instance._state.fields_cache.items():
+            live._state.fields_cache[name] = related if related is None else _live_instance(related, copies)
+    return copies[id(instance)]
+
+
+def _field_values(model, fields, queryset):
+    """(pk, *values) tuples; instances are loaded only when a field is computed."""
+    concrete = {field.name for field in model._meta.concrete_fields}
+    if all(field in concrete for field in fields):
+        return queryset.values_list("pk", *fields).iterator(chunk_size=SEARCH_INDEX_BATCH_SIZE)
+    queryset = queryset.select_related(*SEARCH_INDEX_SELECT_RELATED.get(model._meta.label, ()))
+    instances = map(_live_instance, queryset.iterator(chunk_size=SEARCH_INDEX_BATCH_SIZE))
+    return ((instance.pk, *(getattr(instance, field) for field in fields)) for instance in instances)
+
+
+def _rows(model, fields, values, registry=apps):
+    """SearchValue objects for (pk, *field values) tuples."""
+    search_value = registry.get_model("lab", "SearchValue")
+    content_type = registry.get_model("contenttypes", "ContentType").objects.get_for_model(model)
+    for pk, *field_values in values:
+        for field_name, value in zip(fields, field_values):
+            normalized = normalize_search_text(value)
+            if normalized.strip():
+                yield search_value(content_type=content_type, object_id=pk, field=field_name, value=normalized)
+
+
+def index_search_values(model, pks):
+    """Rewrite the SearchValue rows of the given objects of `model`."""
+    registered, fields = indexed_fields(model)
+    if not fields:
+        return 0
+    pks = list(pks)
+    content_type = ContentType.objects.get_for_model(registered)
+    created = 0
+    with transaction.atomic():
+        for start in range(0, len(pks), SEARCH_INDEX_BATCH_SIZE):
+            chunk = pks[start:start + SEARCH_INDEX_BATCH_SIZE]
+            SearchValue.objects.filter(content_type=content_type, object_id__in=chunk).delete()
+            values = _field_values(registered, fields, registered._base_manager.filter(pk__in=chunk))
+            created += len(SearchValue.objects.bulk_create(list(_rows(registered, fields, values))))
+    return created
+
+
+def remove_search_values(model, pks):
+    registered, fields = indexed_fields(model)
+    if not fields:
+        return
+    content_type = ContentType.objects.get_for_model(registered)
+    SearchValue.objects.filter(content_type=content_type, object_id__in=list(pks)).delete()
+
+
+def rebuild_search_values(model, registry=apps):
+    """Reindex every row of `model`. Returns the number of SearchValue rows written."""
+    model = registry.get_model(model._meta.label)
+    registered, fields = indexed_fields(model)
+    if not fields:
+        return 0
+    search_values = registry.get_model("lab", "SearchValue").objects
+    content_type = registry.get_model("contenttypes", "ContentType").objects.get_for_model(registered)
+    created = 0
+    with transaction.atomic():
+        search_values.filter(content_type=content_type).delete()
+        batch = []
+        values = _field_values(registered, fields, registered._base_manager.all())
+        for row in _rows(registered, fields, values, registry):
+            batch.append(row)
+            if len(batch) >= SEARCH_INDEX_BATCH_SIZE:
+                created += len(search_values.bulk_create(batch))
+                batch = []
+        if batch:
+            created += len(search_values.bulk_create(batch))
+    return created
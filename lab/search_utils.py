@@ -51,8 +51,64 @@ def normalized_contains_ids(queryset, field_names, query):
     return matched_ids
 
 
+NUMERIC_SEARCH_FIELD_TYPES = {
+    "AutoField",
+    "BigAutoField",
+    "SmallAutoField",
+    "IntegerField",
+    "BigIntegerField",
+    "SmallIntegerField",
+    "PositiveIntegerField",
+    "PositiveBigIntegerField",
+    "PositiveSmallIntegerField",
+}
+
+
+def _resolve_search_field(model, field_path):
+    """(relation prefix, model, field) for a lookup path such as "cross_ids__id_value"."""
+    parts = field_path.split("__")
+    for part in parts[:-1]:
+        model = model._meta.get_field(part).related_model
+    return "__".join(parts[:-1]), model, model._meta.get_field(parts[-1])
+
+
 def normalized_contains_q(queryset, field_names, query):
-    return Q(pk__in=normalized_contains_ids(queryset, field_names, query))
+    """
+    Q matching rows where any of `field_names` contains `query` after
+    normalization. Fields registered in lab.search_index are matched in SQL
+    against their stored normalized values and integer fields with a plain
+    `contains`; anything else falls back to scanning the queryset in Python.
+    """
+    from django.contrib.contenttypes.models import ContentType
+
+    from .models import SearchValue
+    from .search_index import indexed_fields
+
+    normalized_query = normalize_search_text(query).strip()
+    if not normalized_query:
+        return Q(pk__in=[])
+
+    condition = Q(pk__in=[])
+    unindexed = []
+    for field_name in field_names:
+        prefix, model, field = _resolve_search_field(queryset.model, field_name)
+        lookup_prefix = f"{prefix}__" if prefix else ""
+        registered, indexed = indexed_fields(model)
+        if field.name in indexed:
+            matches = SearchValue.objects.filter(
+                content_type=ContentType.objects.get_for_model(registered),
+                field=field.name,
+                value__contains=normalized_query,
+            ).values("object_id")
+            condition |= Q(**{f"{lookup_prefix}pk__in": matches})
+        elif field.get_internal_type() in NUMERIC_SEARCH_FIELD_TYPES:
+            # Digits are unchanged by normalize_search_text.
+            condition |= Q(**{f"{lookup_prefix}{field.name}__contains": normalized_query})
+        else:
+            unindexed.append(field_name)
+    if unindexed:
+        condition |= Q(pk__in=normalized_contains_ids(queryset, unindexed, query))
+    return condition
 
 
 def filter_normalized_contains(queryset, field_names, query):
@@ -67,6 +123,8 @@ def order_by_normalized_relevance(queryset, field_names, query):
         return queryset
     if isinstance(field_names, str):
         field_names = [field_names]
+    # Only rows that match at all are ranked in Python.
+    queryset = queryset.filter(normalized_contains_q(queryset, field_names, query)).distinct()
 
     ranked_ids = []
     seen_ids = set()
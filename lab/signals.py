@@ -1,16 +1,292 @@
-from django.db.models.signals import m2m_changed
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.db import transaction
 from django.dispatch import receiver
 from django.core.cache import cache
-from .models import Individual
+from .models import (
+    AnalysisType,
+    IdentifierType,
+    Individual,
+    Institution,
+    PipelineType,
+    Project,
+    SampleType,
+    Status,
+    TaggedStatus,
+    TestType,
+)
+from .hpo_frequency import affected_individual_ids, apply_profile_changes, hpo_profiles
+from .phenotype_similarity import invalidate_phenotype_profiles
+from .search_index import index_search_values, indexed_models, needs_reindex, remove_search_values
+from .name_index import index_individual_names
+from .name_sort import place_individual_name
+from .individual_summary import (
+    rebuild_individual_summaries,
+    refresh_individual_summaries,
+    summary_individual_ids,
+    summary_models,
+)
+from .row_status import rebuild_row_statuses, refresh_row_statuses, row_status_individual_ids, row_status_models
+from .facet_bitmaps import facet_individual_ids, facet_models, refresh_facet_bitmaps
+from .cache_versions import bump_cache_versions, cache_dependents
 import re
 
 @receiver(m2m_changed, sender=Individual.hpo_terms.through)
-def invalidate_hpo_tree_cache(sender, instance, action, **kwargs):
+def invalidate_hpo_tree_cache(sender, instance, action, reverse, pk_set, **kwargs):
     """
-    Invalidate the HPO tree cache whenever HPO terms are added/removed from an Individual.
+    Invalidate the HPO tree cache whenever HPO terms are added/removed from an Individual,
+    and the similarity profiles of the individuals involved once the change commits.
     """
-    if action in ["post_add", "post_remove", "post_clear"]:
+    if action in ["pre_add", "pre_remove", "pre_clear"]:
+        # Term.individuals.clear() leaves nothing to look the individuals up by afterwards.
+        instance._phenotype_profile_ids = affected_individual_ids(instance, reverse, pk_set)
+    elif action in ["post_add", "post_remove", "post_clear"]:
         cache.delete("hpo_tree_structure")
+        individual_ids = instance.__dict__.pop("_phenotype_profile_ids", [])
+        transaction.on_commit(lambda: invalidate_phenotype_profiles(individual_ids))
+
+
+@receiver(m2m_changed, sender=Individual.hpo_terms.through)
+def update_hpo_term_frequency(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Keep HPOTermFrequency in step with hpo_terms changes: snapshot the affected
+    individuals' term profiles before the change and apply the difference after.
+    """
+    if action in ["pre_add", "pre_remove", "pre_clear"]:
+        individual_ids = affected_individual_ids(instance, reverse, pk_set)
+        instance._hpo_frequency_before = (individual_ids, hpo_profiles(individual_ids))
+    elif action in ["post_add", "post_remove", "post_clear"]:
+        individual_ids, before = getattr(instance, "_hpo_frequency_before", (None, None))
+        if individual_ids is None:
+            return
+        del instance._hpo_frequency_before
+        apply_profile_changes(before, hpo_profiles(individual_ids))
+
+
+@receiver(pre_delete, sender=Individual)
+def remove_hpo_term_frequency(sender, instance, **kwargs):
+    """Deleting an individual drops its links without an m2m_changed event."""
+    apply_profile_changes(hpo_profiles([instance.pk]), {})
+    individual_id = instance.pk
+    transaction.on_commit(lambda: invalidate_phenotype_profiles([individual_id]))
+
+
+def update_search_values(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Refresh the normalized SearchValue rows of a saved, search-indexed object."""
+    if not needs_reindex(sender, update_fields):
+        return
+    index_search_values(sender, [instance.pk])
+
+
+def delete_search_values(sender, instance, **kwargs):
+    remove_search_values(sender, [instance.pk])
+
+
+for _model in indexed_models():
+    post_save.connect(update_search_values, sender=_model, dispatch_uid=f"search_values_save_{_model._meta.label}")
+    post_delete.connect(delete_search_values, sender=_model, dispatch_uid=f"search_values_delete_{_model._meta.label}")
+
+
+@receiver(post_save, sender=Individual)
+def update_individual_name_tokens(sender, instance, update_fields=None, **kwargs):
+    """Re-tokenize the blind name index and re-place the name sort key when full_name may have changed."""
+    if update_fields is not None and "full_name" not in update_fields:
+        return
+    index_individual_names([instance])
+    place_individual_name(instance)
+
+
+
+def update_individual_summary(sender, instance, raw=False, **kwargs):
+    """Refresh the list summary of the individuals a workflow object belongs to."""
+    if raw:
+        return
+    refresh_individual_summaries(summary_individual_ids(instance))
+
+
+for _model in summary_models():
+    post_save.connect(update_individual_summary, sender=_model, dispatch_uid=f"individual_summary_save_{_model._meta.label}")
+    post_delete.connect(update_individual_summary, sender=_model, dispatch_uid=f"individual_summary_delete_{_model._meta.label}")
+
+
+@receiver(post_save, sender=Individual)
+def create_individual_summary(sender, instance, raw=False, **kwargs):
+    if not raw:
+        refresh_individual_summaries([instance.pk])
+
+
+@receiver(m2m_changed, sender=Individual.institution.through)
+def update_individual_summary_institutions(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ["post_add", "post_remove", "post_clear"]:
+        return
+    if not reverse:
+        refresh_individual_summaries([instance.pk])
+    elif pk_set:
+        refresh_individual_summaries(pk_set)
+    else:
+        # post_clear from the institution side: the former members are unknown now.
+        rebuild_individual_summaries()
+
+
+@receiver(post_save, sender=Institution)
+def update_institution_individual_summaries(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields is not None and "name" not in update_fields):
+        return
+    refresh_individual_summaries(instance.individuals.values_list("pk", flat=True))
+
+
+@receiver(post_save, sender=IdentifierType)
+def update_identifier_type_summaries(sender, instance, created, update_fields=None, **kwargs):
+    """A use_priority change can move primary/secondary IDs of every individual."""
+    if created or (update_fields is not None and "use_priority" not in update_fields):
+        return
+    rebuild_individual_summaries()
+
+
+
+def _refresh_row_statuses_on_commit(individual_ids):
+    # Deferred so that cascades deleting an individual finish before its rows are rewritten.
+    individual_ids = set(individual_ids)
+    if individual_ids:
+        transaction.on_commit(lambda: refresh_row_statuses(individual_ids))
+
+
+@receiver(post_save, sender=TaggedStatus)
+@receiver(post_delete, sender=TaggedStatus)
+def update_row_statuses_for_tag(sender, instance, raw=False, **kwargs):
+    """A status was added to or removed from an object: refresh the rows it shows on."""
+    if raw:
+        return
+    _refresh_row_statuses_on_commit(row_status_individual_ids(instance.content_object))
+
+
+def remember_row_status_individuals(sender, instance, **kwargs):
+    # After the delete the object can no longer be traced to its individuals.
+    instance._row_status_individual_ids = row_status_individual_ids(instance)
+
+
+def update_row_statuses_after_delete(sender, instance, **kwargs):
+    _refresh_row_statuses_on_commit(getattr(instance, "_row_status_individual_ids", ()))
+
+
+for _model in row_status_models():
+    pre_delete.connect(remember_row_status_individuals, sender=_model, dispatch_uid=f"row_status_pre_delete_{_model._meta.label}")
+    post_delete.connect(update_row_statuses_after_delete, sender=_model, dispatch_uid=f"row_status_delete_{_model._meta.label}")
+
+
+@receiver(m2m_changed, sender=Project.individuals.through)
+def update_row_statuses_for_membership(sender, instance, action, reverse, pk_set, **kwargs):
+    """Project statuses (and project task statuses) follow project membership."""
+    if action == "pre_clear":
+        instance._row_status_individual_ids = (
+            {instance.pk} if reverse else set(instance.individuals.values_list("pk", flat=True))
+        )
+    elif action in ["post_add", "post_remove"]:
+        _refresh_row_statuses_on_commit([instance.pk] if reverse else pk_set)
+    elif action == "post_clear":
+        _refresh_row_statuses_on_commit(getattr(instance, "_row_status_individual_ids", ()))
+
+
+@receiver(m2m_changed, sender=Status.connected_classes.through)
+def rebuild_row_statuses_for_connections(sender, action, **kwargs):
+    if action in ["post_add", "post_remove", "post_clear"]:
+        rebuild_row_statuses()
+
+
+def _refresh_facet_bitmaps_on_commit(individual_ids=None):
+    if individual_ids is None:
+        transaction.on_commit(refresh_facet_bitmaps)
+        return
+    individual_ids = set(individual_ids)
+    if individual_ids:
+        transaction.on_commit(lambda: refresh_facet_bitmaps(individual_ids))
+
+
+@receiver(post_save, sender=TaggedStatus)
+@receiver(post_delete, sender=TaggedStatus)
+def update_facet_bitmaps_for_tag(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _refresh_facet_bitmaps_on_commit(facet_individual_ids(instance.content_object))
+
+
+@receiver(post_save, sender=Individual)
+def add_individual_to_facet_bitmaps(sender, instance, created, raw=False, **kwargs):
+    # A new individual is not in the index yet, so this forces a rebuild.
+    if created and not raw:
+        _refresh_facet_bitmaps_on_commit([instance.pk])
+
+
+@receiver(post_delete, sender=Individual)
+def remove_individual_from_facet_bitmaps(sender, instance, **kwargs):
+    _refresh_facet_bitmaps_on_commit([instance.pk])
+
+
+def remember_facet_individuals(sender, instance, **kwargs):
+    instance._facet_individual_ids = facet_individual_ids(instance)
+
+
+def update_facet_bitmaps(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    individual_ids = getattr(instance, "_facet_individual_ids", None)
+    if individual_ids is None:
+        individual_ids = facet_individual_ids(instance)
+    _refresh_facet_bitmaps_on_commit(individual_ids)
+
+
+for _model in facet_models():
+    post_save.connect(update_facet_bitmaps, sender=_model, dispatch_uid=f"facet_bitmaps_save_{_model._meta.label}")
+    pre_delete.connect(remember_facet_individuals, sender=_model, dispatch_uid=f"facet_bitmaps_pre_delete_{_model._meta.label}")
+    post_delete.connect(update_facet_bitmaps, sender=_model, dispatch_uid=f"facet_bitmaps_delete_{_model._meta.label}")
+
+
+@receiver(m2m_changed, sender=Project.individuals.through)
+def update_facet_bitmaps_for_membership(sender, instance, action, reverse, pk_set, **kwargs):
+    if action in ["post_add", "post_remove"]:
+        _refresh_facet_bitmaps_on_commit([instance.pk] if reverse else pk_set)
+    elif action == "post_clear":
+        _refresh_facet_bitmaps_on_commit()
+
+
+def invalidate_facet_bitmaps(sender, instance, created=False, raw=False, **kwargs):
+    """Option names are bitmap keys: a rename or delete invalidates every process's index."""
+    if not raw and not created:
+        _refresh_facet_bitmaps_on_commit()
+
+
+for _model in (Status, Project, SampleType, TestType, PipelineType, AnalysisType):
+    post_save.connect(invalidate_facet_bitmaps, sender=_model, dispatch_uid=f"facet_bitmaps_names_save_{_model._meta.label}")
+    post_delete.connect(invalidate_facet_bitmaps, sender=_model, dispatch_uid=f"facet_bitmaps_names_delete_{_model._meta.label}")
+
+
+def _bump_cache_versions_on_commit(groups):
+    # After commit, so no worker can cache pre-commit data under the new version.
+    transaction.on_commit(lambda: bump_cache_versions(*groups))
+
+
+def bump_filter_count_versions(sender, raw=False, **kwargs):
+    if not raw:
+        _bump_cache_versions_on_commit(_cache_dependents[sender])
+
+
+_cache_dependents = cache_dependents()
+for _model, _groups in _cache_dependents.items():
+    post_save.connect(bump_filter_count_versions, sender=_model, dispatch_uid=f"cache_versions_save_{_model._meta.label}")
+    post_delete.connect(bump_filter_count_versions, sender=_model, dispatch_uid=f"cache_versions_delete_{_model._meta.label}")
+
+
+@receiver(m2m_changed, sender=Project.individuals.through)
+@receiver(m2m_changed, sender=Individual.institution.through)
+def bump_filter_count_versions_for_links(sender, action, **kwargs):
+    if action in ["post_add", "post_remove", "post_clear"]:
+        _bump_cache_versions_on_commit(["individual_filter_counts"])
+
+
+@receiver(m2m_changed, sender=TaggedStatus)
+def bump_filter_count_versions_for_tags(sender, action, **kwargs):
+    # taggit's add/remove/clear may bulk-write TaggedStatus rows without post_save.
+    if action in ["post_add", "post_remove", "post_clear"]:
+        _bump_cache_versions_on_commit(_cache_dependents[TaggedStatus])
+
 
 # Preview Generation Signals
 import os
@@ -1,10 +1,12 @@
 import django_tables2 as tables
+from django.db.models import F
 from django.utils.html import format_html, mark_safe
 from django.urls import reverse
 
 from .models import IdentifierType, Individual, Sample, Project
 from .display_preferences import DEFAULT_INSTITUTION_DISPLAY, institution_display_name, normalize_institution_display
-from .status_utils import collect_individual_row_statuses
+from .pagination import cached_count
+from .row_status import row_statuses
 from variant.models import Variant
 
 def _render_status_badges(statuses):
@@ -28,8 +30,8 @@ def _render_status_badges(statuses):
 class IndividualTable(tables.Table):
     """Static column set: Primary ID, Secondary ID, Other IDs, Institution, Name, Sex, Status."""
 
-    primary_id = tables.Column(verbose_name="Primary ID", order_by=("id",), empty_values=())
-    secondary_id = tables.Column(verbose_name="Secondary ID", order_by=("id",), empty_values=())
+    primary_id = tables.Column(verbose_name="Primary ID", order_by=("summary__primary_id", "id"), empty_values=())
+    secondary_id = tables.Column(verbose_name="Secondary ID", order_by=("summary__secondary_id", "id"), empty_values=())
     other_table_ids = tables.Column(verbose_name="Other IDs", orderable=False, empty_values=())
     institution = tables.Column(verbose_name="Institution", order_by=("first_institution_name",))
     full_name = tables.Column(verbose_name="Name")
@@ -42,8 +44,8 @@ class IndividualTable(tables.Table):
         format="m/y",
         short=False,
     )
-    # Aggregated "last activity" timestamp across Individual + related
-    # Sample, Test, Pipeline, Analysis, Variant, AnalysisReport.
+    # "Last activity" across Individual + related Sample, Test, Pipeline,
+    # Analysis, Variant, AnalysisReport, stored in IndividualSummary.
     last_activity = tables.DateTimeColumn(
         verbose_name="Last Activity",
         accessor="last_activity",
@@ -61,7 +63,7 @@ class IndividualTable(tables.Table):
         self.secondary_type = IdentifierType.objects.filter(use_priority=2).order_by("id").first()
 
     def before_render(self, request):
-        self.total_count = Individual.objects.count()
+        self.total_count = cached_count(Individual.objects.all())
         self.verbose_name = Individual._meta.verbose_name
         self.verbose_name_plural = Individual._meta.verbose_name_plural
 
@@ -148,7 +150,7 @@ class IndividualTable(tables.Table):
 
     def render_statuses(self, value, record):
         """Render multiple status badges wrapped in a span for OOB swaps."""
-        all_statuses = collect_individual_row_statuses(record)
+        all_statuses = row_statuses(record)
         badges_html = _render_status_badges(all_statuses)
         return format_html(
             '<span id="individual-row-status-{}">{}</span>',
@@ -166,6 +168,15 @@ class IndividualTable(tables.Table):
             return "—"
         return value.strftime("%m/%y")
 
+    def order_full_name(self, queryset, is_descending):
+        """Sort by the name sort-key rank; ignored for users who may not see names."""
+        user = getattr(self.request, "user", None) if hasattr(self, "request") else None
+        if not user or not user.has_perm("lab.view_sensitive_data"):
+            return queryset, True
+        rank = F("name_sort_key__rank")
+        rank = rank.desc(nulls_last=True) if is_descending else rank.asc(nulls_last=True)
+        return queryset.order_by(rank, "id"), True
+
     def render_full_name(self, value, record):
         # Check permissions
         user = getattr(self.request, "user", None) if hasattr(self, "request") else None
@@ -233,7 +244,7 @@ class ProjectTable(tables.Table):
     )
 
     def before_render(self, request):
-        self.total_count = Project.objects.count()
+        self.total_count = cached_count(Project.objects.all())
         self.verbose_name = Project._meta.verbose_name
         self.verbose_name_plural = Project._meta.verbose_name_plural
 
@@ -343,7 +354,7 @@ class VariantTable(tables.Table):
     statuses = tables.Column(verbose_name="Status", orderable=False, empty_values=())
 
     def before_render(self, request):
-        self.total_count = Variant.objects.count()
+        self.total_count = cached_count(Variant.objects.all())
         self.verbose_name = Variant._meta.verbose_name
         self.verbose_name_plural = Variant._meta.verbose_name_plural
 
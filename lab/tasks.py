@@ -27,3 +27,20 @@ def send_notification_email(subject, message, recipient_list):
         return email.send(fail_silently=True)
     except ValueError:
         return 0
+
+
+@task
+def run_export_job(job_id):
+    """Build the file of a background list export (see lab.export_jobs)."""
+    from .export_jobs import build_export
+
+    job = build_export(job_id)
+    return job.status if job else None
+
+
+@task
+def renumber_name_sort_keys():
+    """Respace every name sort-key rank once a gap has run out (see lab.name_sort)."""
+    from .name_sort import rebuild_name_sort_keys
+
+    return rebuild_name_sort_keys()
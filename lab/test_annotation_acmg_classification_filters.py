@@ -126,3 +126,55 @@ class AnnotationACMGClassificationFilterTests(TestCase):
             set(filterset.qs.values_list("pk", flat=True)),
             {self.first_individual.pk},
         )
+
+    def test_classification_is_extracted_into_an_indexed_column(self):
+        annotation = Annotation.objects.get(variant=self.benign_variant)
+        self.assertEqual(annotation.acmg_classification, "Benign")
+        self.assertEqual(Annotation.objects.get(variant=self.non_genebe_variant).acmg_classification, "")
+
+        Annotation.objects.update_or_create(
+            variant=self.benign_variant,
+            source="genebe",
+            defaults={"data": {"acmg_classification": "Likely_benign", "acmg_criteria": "BP4,BP6"}},
+        )
+        annotation.refresh_from_db()
+        self.assertEqual((annotation.acmg_classification, annotation.acmg_criteria), ("Likely_benign", "BP4,BP6"))
+
+    def test_counts_group_by_the_extracted_classification(self):
+        from lab.views import _annotation_acmg_classification_counts
+
+        self.assertEqual(
+            _annotation_acmg_classification_counts("variant_id"),
+            {"Uncertain_significance": 1, "Benign": 1},
+        )
+
+    def test_record_and_top_level_classifications_both_match(self):
+        from lab.views import _annotation_acmg_classification_counts
+
+        annotation = Annotation.objects.get(variant=self.uncertain_variant)
+        annotation.data = {
+            "acmg_classification": "Likely_pathogenic",
+            "variants": [{"acmg_classification": "Uncertain_significance"}],
+        }
+        annotation.save(update_fields=["data"])
+        annotation.refresh_from_db()
+        self.assertEqual(
+            (annotation.acmg_classification, annotation.acmg_alternate_classification),
+            ("Uncertain_significance", "Likely_pathogenic"),
+        )
+
+        for value in ("Uncertain_significance", "Likely_pathogenic"):
+            filterset = VariantFilter(data={"annotation_acmg_classification": [value]}, queryset=Variant.objects.all())
+            self.assertEqual(set(filterset.qs.values_list("pk", flat=True)), {self.uncertain_variant.pk})
+        self.assertEqual(
+            _annotation_acmg_classification_counts("variant_id"),
+            {"Uncertain_significance": 1, "Likely_pathogenic": 1, "Benign": 1},
+        )
+
+    def test_backfill_extracts_annotations_stored_without_the_columns(self):
+        from variant.models import backfill_genebe_acmg_fields
+
+        Annotation.objects.update(acmg_classification="", acmg_alternate_classification="", acmg_criteria="")
+        self.assertEqual(backfill_genebe_acmg_fields(), 2)
+        self.assertEqual(Annotation.objects.get(variant=self.benign_variant).acmg_classification, "Benign")
+        self.assertEqual(backfill_genebe_acmg_fields(), 0)
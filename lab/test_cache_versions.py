@@ -0,0 +1,49 @@
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.test import TestCase
+
+from lab.cache_versions import bump_cache_versions, versioned_key
+from lab.models import Individual, Project, Sample, SampleType, Status
+from lab.views import _individual_filter_counts, _project_filter_counts
+
+
+class FilterCountVersionTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="versionuser", password="password")
+        self.blood = SampleType.objects.create(name="Blood", created_by=self.user)
+        self.individual = Individual.objects.create(full_name="First", created_by=self.user)
+
+    def test_saves_bump_the_dependent_counts_after_commit(self):
+        self.assertEqual(_individual_filter_counts()["sample_type"], {"Blood": 0})
+        key = versioned_key("individual_filter_counts")
+        project_key = versioned_key("project_filter_counts")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Sample.objects.create(individual=self.individual, sample_type=self.blood, created_by=self.user)
+
+        self.assertNotEqual(versioned_key("individual_filter_counts"), key)
+        self.assertEqual(versioned_key("project_filter_counts"), project_key)
+        self.assertEqual(_individual_filter_counts()["sample_type"], {"Blood": 1})
+
+    def test_tags_and_memberships_bump_the_counts(self):
+        project = Project.objects.create(name="Cohort", created_by=self.user)
+        active = Status.objects.create(
+            name="Active", content_type=ContentType.objects.get_for_model(Project), created_by=self.user
+        )
+        self.assertEqual(_project_filter_counts()["status"], {"Active": 0})
+        self.assertEqual(_individual_filter_counts()["projects"], {"Cohort": 0})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            project.statuses.add(active)
+            project.individuals.add(self.individual)
+
+        self.assertEqual(_project_filter_counts()["status"], {"Active": 1})
+        self.assertEqual(_individual_filter_counts()["projects"], {"Cohort": 1})
+
+    def test_bumps_count_from_the_initial_version(self):
+        self.assertEqual(versioned_key("project_filter_counts"), "project_filter_counts:v1")
+        bump_cache_versions("project_filter_counts")
+        bump_cache_versions("project_filter_counts")
+        self.assertEqual(versioned_key("project_filter_counts", "x"), "project_filter_counts:v3:x")
@@ -0,0 +1,73 @@
+import csv
+import io
+import shutil
+import tempfile
+import zipfile
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from openpyxl import load_workbook
+
+from lab.export_jobs import build_export
+from lab.models import ExportJob, Individual
+
+
+class ExportJobTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.user = User.objects.create_user(username="exportjobuser", password="password")
+        Individual.objects.create(full_name="First", sex="female", created_by=self.user)
+        Individual.objects.create(full_name="Second", sex="male", created_by=self.user)
+
+    def _job(self, export_format, query=""):
+        return ExportJob.objects.create(user=self.user, kind="individuals", format=export_format, query=query)
+
+    def test_csv_export_applies_the_saved_filters(self):
+        job = build_export(self._job("csv", "sex=male").pk)
+        self.assertEqual(job.status, "done")
+        self.assertEqual((job.total, job.processed), (1, 1))
+        with job.file.open("rb") as handle:
+            rows = list(csv.reader(io.StringIO(handle.read().decode("utf-8-sig"))))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][6], "Male")
+        # A job is only built once.
+        self.assertIsNone(build_export(job.pk))
+
+    def test_xlsx_and_zip_exports(self):
+        xlsx = build_export(self._job("xlsx").pk)
+        with xlsx.file.open("rb") as handle:
+            sheet = load_workbook(io.BytesIO(handle.read()), read_only=True).active
+            self.assertEqual(len(list(sheet.iter_rows())), 3)
+
+        archive = build_export(self._job("zip").pk)
+        with archive.file.open("rb") as handle, zipfile.ZipFile(io.BytesIO(handle.read())) as contents:
+            (name,) = contents.namelist()
+            self.assertTrue(name.endswith(".csv"))
+            self.assertEqual(len(contents.read(name).decode("utf-8-sig").splitlines()), 3)
+
+    @override_settings(TASKS={"default": {"BACKEND": "django.tasks.backends.immediate.ImmediateBackend"}})
+    def test_views_start_poll_and_download_the_owners_job(self):
+        self.client.force_login(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("lab:export_job_create", args=["variants"]), {"format": "xlsx", "chromosome": "chr1"}
+            )
+        self.assertEqual(response.status_code, 200)
+        job = ExportJob.objects.get()
+        self.assertEqual((job.kind, job.format, job.query), ("variants", "xlsx", "chromosome=chr1"))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, "done")
+        response = self.client.get(reverse("lab:export_job_status", args=[job.pk]))
+        self.assertContains(response, reverse("lab:export_job_download", args=[job.pk]))
+        self.assertEqual(self.client.get(reverse("lab:export_job_download", args=[job.pk])).status_code, 200)
+
+        other = User.objects.create_user(username="otherexportuser", password="password")
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(reverse("lab:export_job_download", args=[job.pk])).status_code, 404)
@@ -0,0 +1,71 @@
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from lab import facet_bitmaps
+from lab.filters import IndividualFilter
+from lab.models import Individual, Project, Sample, SampleType, Status
+
+
+@override_settings(FACET_BITMAP_INDEX=True)
+class FacetBitmapIndexTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        facet_bitmaps._index_state.update(version=None, index=None)
+        self.user = User.objects.create_user(username="bitmapuser", password="password")
+        self.blood = SampleType.objects.create(name="Blood", created_by=self.user)
+        self.saliva = SampleType.objects.create(name="Saliva", created_by=self.user)
+        received = Status.objects.create(
+            name="Received", content_type=ContentType.objects.get_for_model(Sample), created_by=self.user
+        )
+
+        self.first = Individual.objects.create(full_name="First", created_by=self.user)
+        self.second = Individual.objects.create(full_name="Second", created_by=self.user)
+        self.third = Individual.objects.create(full_name="Third", created_by=self.user)
+        Sample.objects.create(individual=self.first, sample_type=self.blood, created_by=self.user).statuses.add(received)
+        Sample.objects.create(individual=self.first, sample_type=self.saliva, created_by=self.user)
+        Sample.objects.create(individual=self.second, sample_type=self.saliva, created_by=self.user)
+        Project.objects.create(name="Cohort", created_by=self.user).individuals.add(self.second, self.third)
+
+    def _ids(self, data):
+        filterset = IndividualFilter(data=data, queryset=Individual.objects.all())
+        return set(filterset.qs.values_list("pk", flat=True))
+
+    def test_results_match_the_sql_filters(self):
+        cases = [
+            {"samples__sample_type": ["Saliva"]},
+            {"samples__sample_type": ["Blood", "Saliva"], "samples__sample_type__mode": "all"},
+            {"samples__sample_type": ["Saliva"], "samples__sample_type__exclude": ["Blood"]},
+            {"samples__status": ["Received"], "projects": ["Cohort"]},
+            {"filter_group_mode": "any", "samples__status": ["Received"], "projects": ["Cohort"]},
+        ]
+        for data in cases:
+            with self.subTest(data=data):
+                with override_settings(FACET_BITMAP_INDEX=False):
+                    expected = self._ids(data)
+                self.assertEqual(self._ids(data), expected)
+        self.assertIsNotNone(facet_bitmaps._index_state["index"])
+
+    def test_signals_patch_the_index_in_place(self):
+        self.assertEqual(self._ids({"samples__sample_type": ["Blood"]}), {self.first.pk})
+        index = facet_bitmaps._index_state["index"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Sample.objects.create(individual=self.third, sample_type=self.blood, created_by=self.user)
+
+        self.assertIs(facet_bitmaps._index_state["index"], index)
+        self.assertEqual(self._ids({"samples__sample_type": ["Blood"]}), {self.first.pk, self.third.pk})
+
+    def test_a_concurrent_bump_forces_a_rebuild(self):
+        self.assertEqual(self._ids({"samples__sample_type": ["Blood"]}), {self.first.pk})
+        index = facet_bitmaps._index_state["index"]
+        # Another worker recorded a change this process never saw.
+        cache.add(facet_bitmaps.FACET_BITMAP_VERSION_KEY, 1, None)
+        cache.incr(facet_bitmaps.FACET_BITMAP_VERSION_KEY)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Sample.objects.create(individual=self.third, sample_type=self.blood, created_by=self.user)
+
+        self.assertEqual(self._ids({"samples__sample_type": ["Blood"]}), {self.first.pk, self.third.pk})
+        self.assertIsNot(facet_bitmaps._index_state["index"], index)
@@ -0,0 +1,51 @@
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.test import TestCase
+
+from lab.models import Individual, Sample, SampleType, Status
+from lab.views import _dashboard_object_status_counts, _filter_count_updates, _individual_filter_counts
+
+
+class IndividualFilterCountsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="countsuser", password="password")
+        self.blood = SampleType.objects.create(name="Blood", created_by=self.user)
+        self.saliva = SampleType.objects.create(name="Saliva", created_by=self.user)
+        self.active = Status.objects.create(
+            name="Active", content_type=ContentType.objects.get_for_model(Sample), created_by=self.user
+        )
+
+        self.first = Individual.objects.create(full_name="First", sex="female", is_affected=True, created_by=self.user)
+        self.second = Individual.objects.create(full_name="Second", sex="male", created_by=self.user)
+        for individual, sample_type in ((self.first, self.blood), (self.first, self.blood), (self.second, self.saliva)):
+            sample = Sample.objects.create(individual=individual, sample_type=sample_type, created_by=self.user)
+            sample.statuses.add(self.active)
+
+    def test_counts_are_restricted_to_the_result_set(self):
+        everyone = _individual_filter_counts()
+        self.assertEqual(everyone["sex"], {"male": 1, "female": 1, "other": 0})
+        self.assertEqual(everyone["sample_type"], {"Blood": 1, "Saliva": 1})
+        # Two tagged samples of one individual count once.
+        self.assertEqual(everyone["sample_status"], {"Active": 2})
+
+        affected = _individual_filter_counts(Individual.objects.filter(is_affected=True))
+        self.assertEqual(affected["sex"], {"male": 0, "female": 1, "other": 0})
+        self.assertEqual(affected["is_affected"], {True: 1, False: 0})
+        self.assertEqual(affected["sample_type"], {"Blood": 1, "Saliva": 0})
+        self.assertEqual(affected["sample_status"], {"Active": 1})
+        self.assertEqual(affected["has_report"], {"true": 0, "false": 1})
+
+        nobody = _individual_filter_counts(Individual.objects.none())
+        self.assertEqual(nobody["sample_type"], {"Blood": 0, "Saliva": 0})
+
+    def test_updates_are_keyed_by_filter_field_and_option_value(self):
+        updates = _filter_count_updates(_individual_filter_counts(Individual.objects.filter(sex="male")))
+        self.assertEqual(updates["samples__sample_type"], {"Blood": 0, "Saliva": 1})
+        self.assertEqual(updates["is_alive"], {"True": 1, "False": 0})
+
+    def test_dashboard_counts_tagged_objects(self):
+        # Three tagged samples across two individuals.
+        self.assertEqual(_dashboard_object_status_counts()["sample"], {"Active": 3})
+        self.assertEqual(_individual_filter_counts()["sample_status"], {"Active": 2})
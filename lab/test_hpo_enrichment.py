@@ -0,0 +1,62 @@
+from math import comb
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from lab.hpo_enrichment import HPOIncidence, benjamini_hochberg, compute_enrichment, hypergeometric_sf
+from lab.models import Project
+from lab.phenotype_similarity import PhenotypeSimilarityIndex
+
+ANCESTORS = {
+    "HP:0000001": set(),
+    "HP:2": {"HP:0000001"},
+    "HP:3": {"HP:2", "HP:0000001"},
+    "HP:5": {"HP:0000001"},
+}
+
+
+class HPOEnrichmentTest(SimpleTestCase):
+    def test_hypergeometric_tail_matches_exact_sum(self):
+        def exact(k, population, successes, draws):
+            upper = min(successes, draws)
+            return sum(
+                comb(successes, x) * comb(population - successes, draws - x) for x in range(k, upper + 1)
+            ) / comb(population, draws)
+
+        ks, successes = [1, 3, 10, 0], [10, 20, 50, 7]
+        tails = hypergeometric_sf(ks, 100, successes, 15)
+        for tail, k, success in zip(tails, ks, successes):
+            self.assertAlmostEqual(tail, exact(k, 100, success, 15))
+
+    def test_benjamini_hochberg(self):
+        adjusted = benjamini_hochberg([0.01, 0.04, 0.03, 0.2])
+        self.assertEqual([round(value, 4) for value in adjusted], [0.04, 0.0533, 0.0533, 0.2])
+
+    def test_cohort_terms_are_propagated_and_ranked(self):
+        profiles = {pk: {"HP:3"} for pk in range(1, 5)}
+        profiles.update({pk: {"HP:5"} for pk in range(5, 13)})
+        incidence = HPOIncidence(PhenotypeSimilarityIndex(profiles, lambda term: ANCESTORS.get(term, set())))
+
+        rows = compute_enrichment(incidence, [1, 2, 3, 4])
+        self.assertEqual([row["identifier"] for row in rows], ["HP:2", "HP:3"])
+        self.assertEqual((rows[0]["cohort_count"], rows[0]["background_count"]), (4, 4))
+        self.assertEqual(rows[0]["background_size"], 12)
+        self.assertLess(rows[0]["p_value"], 0.01)
+
+
+class HPOEnrichmentViewTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="enrichmentuser", password="password")
+        self.client.force_login(self.user)
+        self.url = reverse("lab:hpo_enrichment")
+
+    @mock.patch("lab.views.cohort_enrichment", return_value=[])
+    def test_project_parameter_is_validated(self, enrichment):
+        project = Project.objects.create(name="Cohort", created_by=self.user)
+
+        self.assertEqual(self.client.get(self.url, {"project": "abc"}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {"project": project.pk + 1}).status_code, 404)
+        self.assertEqual(self.client.get(self.url, {"project": project.pk}).status_code, 200)
+        enrichment.assert_called_once()
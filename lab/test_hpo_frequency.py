@@ -0,0 +1,85 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.migrations.loader import MigrationLoader
+from django.test import TestCase
+
+from ontologies.graph_snapshot import HPOGraphSnapshot
+from ontologies.models import Ontology, Term
+
+from .hpo_frequency import rebuild_hpo_term_frequency
+from .models import HPOTermFrequency, Individual
+
+
+class HPOTermFrequencyTest(TestCase):
+    def setUp(self):
+        self.graph = HPOGraphSnapshot.from_edges(
+            {
+                "HP:0000001": "All",
+                "HP:0000118": "Phenotypic abnormality",
+                "HP:0000707": "Abnormality of the nervous system",
+                "HP:0001250": "Seizure",
+            },
+            [
+                ("HP:0000001", "HP:0000118"),
+                ("HP:0000118", "HP:0000707"),
+                ("HP:0000707", "HP:0001250"),
+            ],
+        )
+        patcher = mock.patch("lab.hpo_frequency.get_hpo_graph", return_value=self.graph)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.user = User.objects.create_user(username="frequser", password="password")
+        ontology = Ontology.objects.create(type=1, label="test")
+        self.seizure = Term.objects.create(ontology=ontology, identifier="0001250", label="Seizure")
+        self.nervous = Term.objects.create(ontology=ontology, identifier="0000707", label="Nervous")
+        self.first = Individual.objects.create(full_name="First", created_by=self.user)
+        self.second = Individual.objects.create(full_name="Second", created_by=self.user)
+
+    def counts(self, identifier):
+        row = HPOTermFrequency.objects.filter(identifier=identifier).first()
+        return (row.direct_count, row.propagated_count) if row else None
+
+    def test_m2m_changes_update_counts_incrementally(self):
+        self.first.hpo_terms.add(self.seizure)
+        self.second.hpo_terms.add(self.seizure, self.nervous)
+
+        self.assertEqual(self.counts("HP:0001250"), (2, 2))
+        self.assertEqual(self.counts("HP:0000707"), (1, 2))
+        self.assertEqual(self.counts("HP:0000118"), (0, 2))
+        self.assertEqual(
+            HPOTermFrequency.objects.get(identifier="HP:0001250").parent_identifier, "HP:0000707"
+        )
+
+        self.second.hpo_terms.remove(self.seizure)
+        self.assertEqual(self.counts("HP:0001250"), (1, 1))
+        self.assertEqual(self.counts("HP:0000707"), (1, 2))
+
+        self.seizure.individuals.clear()
+        self.assertIsNone(self.counts("HP:0001250"))
+        self.assertEqual(self.counts("HP:0000118"), (0, 1))
+
+    def test_rebuild_matches_incremental_counts(self):
+        self.first.hpo_terms.add(self.seizure)
+        self.second.hpo_terms.add(self.nervous)
+        incremental = set(HPOTermFrequency.objects.values_list("identifier", "direct_count", "propagated_count"))
+
+        rebuild_hpo_term_frequency()
+        rebuilt = set(HPOTermFrequency.objects.values_list("identifier", "direct_count", "propagated_count"))
+        self.assertEqual(incremental, rebuilt)
+
+    def test_rebuild_runs_against_the_migration_state(self):
+        registry = MigrationLoader(connection).project_state(("lab", "0016_backfill_hpotermfrequency")).apps
+        with mock.patch("lab.hpo_frequency.get_hpo_graph") as graph:
+            self.assertEqual(rebuild_hpo_term_frequency(registry=registry), 0)
+        graph.assert_not_called()
+
+        self.first.hpo_terms.add(self.seizure)
+        self.second.hpo_terms.add(self.seizure, self.nervous)
+        HPOTermFrequency.objects.all().delete()
+        rebuild_hpo_term_frequency(registry=registry)
+        self.assertEqual(self.counts("HP:0001250"), (2, 2))
+        self.assertEqual(self.counts("HP:0000707"), (1, 2))
+        self.assertEqual(self.counts("HP:0000118"), (0, 2))
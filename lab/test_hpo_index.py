@@ -0,0 +1,55 @@
+import json
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import RequestFactory, SimpleTestCase
+
+from lab.hpo_index import MATCH_FUZZY, MATCH_IDENTIFIER, HPOTermIndex
+from lab.views import hpo_bulk_match
+
+
+class HPOTermIndexTest(SimpleTestCase):
+    def setUp(self):
+        self.index = HPOTermIndex(
+            [
+                (1, "0001250", "Seizure", ""),
+                (2, "0002373", "Febrile seizure", "0000001"),
+                (3, "0000478", "Abnormality of the eye", ""),
+            ],
+            [(1, "Fits"), (1, "Epileptic seizure")],
+        )
+
+    def test_prefix_ranks_before_word_match(self):
+        self.assertEqual([hit.pk for hit in self.index.search("seiz")], [1, 2])
+
+    def test_synonym_hit_reports_matched_name(self):
+        hit = self.index.search("fits")[0]
+        self.assertEqual((hit.pk, hit.matched_name, hit.is_synonym), (1, "Fits", True))
+
+    def test_typo_falls_back_to_trigram_similarity(self):
+        hits = self.index.search("seizre")
+        self.assertEqual(hits[0].pk, 1)
+        self.assertEqual(hits[0].match_class, MATCH_FUZZY)
+
+    def test_code_and_alt_id_lookup(self):
+        self.assertEqual(self.index.search("HP:0001250")[0].pk, 1)
+        hit = self.index.search("HP:0000001")[0]
+        self.assertEqual((hit.pk, hit.match_class), (2, MATCH_IDENTIFIER))
+
+    def test_excluded_terms_are_skipped(self):
+        self.assertEqual([hit.pk for hit in self.index.search("seizure", exclude_pks={1})], [2])
+
+    def test_search_many_returns_candidates_per_chunk(self):
+        results = self.index.search_many(["Seizure", "fits", "no such phenotype", "seizure"])
+        self.assertEqual([hits[0].pk if hits else None for hits in results], [1, 1, None, 1])
+        self.assertGreater(results[0][0].confidence, results[0][1].confidence)
+
+    def test_bulk_match_leaves_fuzzy_hits_for_confirmation(self):
+        request = RequestFactory().get("/", {"q": "HP:0000478, seizre, fits"})
+        request.user = SimpleNamespace(is_authenticated=True)
+        with mock.patch("lab.views.get_hpo_term_index", return_value=self.index):
+            data = json.loads(hpo_bulk_match(request).content)
+
+        self.assertEqual([result["id"] for result in data["results"]], [3, 1])
+        self.assertEqual(data["unmatched"], ["seizre"])
+        self.assertEqual(data["matches"][1]["candidates"][0]["id"], 1)
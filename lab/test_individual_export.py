@@ -0,0 +1,66 @@
+import csv
+from datetime import date
+
+from django.contrib.auth.models import Permission, User
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from lab.individual_export import EXPORT_HEADER, individual_export_csv, individual_export_rows
+from lab.models import CrossIdentifier, IdentifierType, Individual, Note, Sample, SampleType, Status
+
+
+class IndividualExportTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="exportuser", password="password")
+        self.admin = User.objects.create_user(username="exportadmin", password="password")
+        self.admin.user_permissions.add(Permission.objects.get(codename="view_sensitive_data"))
+        primary = IdentifierType.objects.create(name="RareBoost", use_priority=1, created_by=self.user)
+        blood = SampleType.objects.create(name="Blood", created_by=self.user)
+        active = Status.objects.create(
+            name="Active", content_type=ContentType.objects.get_for_model(Individual), created_by=self.user
+        )
+
+        self.individuals = []
+        for number in range(3):
+            individual = Individual.objects.create(
+                full_name=f"Person {number}", tc_identity=10000000000 + number, created_by=self.user
+            )
+            CrossIdentifier.objects.create(
+                individual=individual, id_type=primary, id_value=f"RB{number}", created_by=self.user
+            )
+            sample = Sample.objects.create(
+                individual=individual, sample_type=blood, receipt_date=date(2024, 1, number + 1), created_by=self.user
+            )
+            Note.objects.create(content_object=sample, content=f"sample note {number}", user=self.user)
+            individual.statuses.add(active)
+            self.individuals.append(individual)
+
+    def test_rows_are_chunked_newest_first(self):
+        rows = list(individual_export_rows(Individual.objects.all(), self.admin, chunk_size=2))
+        self.assertEqual(rows[0], EXPORT_HEADER)
+        self.assertEqual([row[0] for row in rows[1:]], ["RB2", "RB1", "RB0"])
+        first = dict(zip(EXPORT_HEADER, rows[1]))
+        self.assertEqual(first["Ad-Soyad"], "Person 2")
+        self.assertEqual(first["TC Kimlik No"], "10000000002")
+        self.assertEqual(first["Secondary ID"], "NO SECONDARY ID SET")
+        self.assertEqual(first["Durum"], "Active")
+        self.assertEqual(first["Geliş Tarihi"], "2024-01-03")
+        self.assertEqual(first["Örnek Tipi"], "Blood")
+        self.assertEqual(first["Örnek Notları"], "sample note 2")
+
+    def test_sensitive_fields_are_masked_without_permission(self):
+        lines = list(individual_export_csv(Individual.objects.filter(pk=self.individuals[0].pk), self.user))
+        self.assertEqual(lines[0], "\ufeff")
+        rows = list(csv.reader("".join(lines[1:]).splitlines()))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][2:4], ["*****", "*****"])
+
+    def test_query_count_does_not_grow_with_the_cohort(self):
+        # Warm the permission and ContentType caches so both runs below start from the same state.
+        list(individual_export_rows(Individual.objects.all(), self.admin))
+        with CaptureQueriesContext(connection) as one:
+            list(individual_export_rows(Individual.objects.filter(pk=self.individuals[0].pk), self.admin))
+        with self.assertNumQueries(len(one)):
+            list(individual_export_rows(Individual.objects.all(), self.admin))
@@ -0,0 +1,57 @@
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from lab.individual_summary import rebuild_individual_summaries
+from lab.models import (
+    CrossIdentifier,
+    IdentifierType,
+    Individual,
+    IndividualSummary,
+    Institution,
+    Sample,
+    SampleType,
+    Test,
+    TestType,
+)
+
+
+class IndividualSummaryTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="summaryuser", password="password")
+        self.individual = Individual.objects.create(full_name="Summary Individual", created_by=self.user)
+        self.sample_type = SampleType.objects.create(name="Blood", created_by=self.user)
+        self.test_type = TestType.objects.create(name="WES", created_by=self.user)
+
+    def _summary(self):
+        return IndividualSummary.objects.get(individual=self.individual)
+
+    def test_signals_keep_workflow_dates_and_counts_current(self):
+        self.assertEqual(self._summary().last_activity, self.individual.created_at)
+
+        sample = Sample.objects.create(
+            individual=self.individual, sample_type=self.sample_type, receipt_date=date(2025, 1, 5), created_by=self.user
+        )
+        test = Test.objects.create(
+            sample=sample, test_type=self.test_type, performed_date=date(2025, 3, 1), created_by=self.user
+        )
+        summary = self._summary()
+        self.assertEqual((summary.sample_count, summary.test_count), (1, 1))
+        self.assertEqual(summary.last_activity.date(), date(2025, 3, 1))
+
+        test.delete()
+        summary = self._summary()
+        self.assertEqual(summary.test_count, 0)
+        self.assertEqual(summary.last_activity.date(), date(2025, 1, 5))
+
+    def test_institution_and_identifier_columns(self):
+        institution = Institution.objects.create(name="Zeta Hastanesi", created_by=self.user)
+        self.individual.institution.add(institution, Institution.objects.create(name="Alfa Klinik", created_by=self.user))
+        id_type = IdentifierType.objects.create(name="RB", use_priority=1, created_by=self.user)
+        CrossIdentifier.objects.create(individual=self.individual, id_type=id_type, id_value="RB-7", created_by=self.user)
+        self.assertEqual((self._summary().first_institution_name, self._summary().primary_id), ("Alfa Klinik", "RB-7"))
+
+        IndividualSummary.objects.all().delete()
+        self.assertEqual(rebuild_individual_summaries(), 1)
+        self.assertEqual(self._summary().first_institution_name, "Alfa Klinik")
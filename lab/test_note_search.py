@@ -0,0 +1,45 @@
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.test import TestCase
+
+from lab.models import Note, Project
+from lab.note_search import search_notes
+
+
+class NoteSearchTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="noteuser", password="password")
+        self.other = User.objects.create_user(username="othernoteuser", password="password")
+        self.project = Project.objects.create(name="Ataxia Cohort", created_by=self.user)
+        self.project_type = ContentType.objects.get_for_model(Project)
+
+    def _note(self, content, **kwargs):
+        return Note.objects.create(
+            content=content, user=self.user, content_type=self.project_type, object_id=self.project.pk, **kwargs
+        )
+
+    def test_matches_word_prefixes_and_highlights_escaped_snippets(self):
+        note = self._note("Progressive <b>ataxia</b> since childhood")
+        self._note("Unrelated sequencing comment")
+
+        hits = search_notes("atax child", self.user)
+
+        self.assertEqual([hit["note"] for hit in hits], [note])
+        self.assertEqual(hits[0]["owner"], self.project)
+        self.assertIn("<mark>ataxia</mark>", hits[0]["snippet"])
+        self.assertIn("&lt;b&gt;", hits[0]["snippet"])
+
+    def test_index_follows_updates_deletes_and_privacy(self):
+        note = self._note("Awaiting segregation analysis")
+        self._note("segregation plan (private)", private_owner=self.other)
+
+        self.assertEqual([hit["note"] for hit in search_notes("segregation", self.user)], [note])
+
+        note.content = "Segregation confirmed in parents"
+        note.save()
+        self.assertEqual(search_notes("awaiting", self.user), [])
+        self.assertEqual([hit["note"] for hit in search_notes("confirmed", self.user)], [note])
+
+        note.delete()
+        self.assertEqual(search_notes("confirmed", self.user), [])
+        self.assertEqual(len(search_notes("segregation", self.other)), 1)
@@ -0,0 +1,40 @@
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.test import TestCase
+
+from lab.models import Institution, Note, Project
+from lab.omnisearch import MATCH_EXACT, MATCH_PREFIX, omnisearch
+
+
+class OmnisearchTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="omniuser", password="password")
+        self.other = User.objects.create_user(username="otheruser", password="password")
+
+    def test_groups_results_by_category_in_match_order(self):
+        Project.objects.create(name="Kardiyomiyopati Paneli", created_by=self.user)
+        Project.objects.create(name="Kardiyo", created_by=self.user)
+        Institution.objects.create(name="Kardiyoloji Enstitüsü", created_by=self.user)
+
+        groups = {group["category"]: group["results"] for group in omnisearch("kardiyo", self.user)}
+
+        self.assertEqual([result["label"] for result in groups["Projects"]], ["Kardiyo", "Kardiyomiyopati Paneli"])
+        self.assertEqual([result["match"] for result in groups["Projects"]], [MATCH_EXACT, MATCH_PREFIX])
+        self.assertEqual([result["label"] for result in groups["Institutions"]], ["Kardiyoloji Enstitüsü"])
+
+    def test_private_notes_of_other_users_are_hidden(self):
+        project = Project.objects.create(name="Notes Project", created_by=self.user)
+        project_type = ContentType.objects.get_for_model(Project)
+        Note.objects.create(content="shared ataxia finding", user=self.other, content_type=project_type, object_id=project.pk)
+        Note.objects.create(
+            content="private ataxia finding",
+            user=self.other,
+            private_owner=self.other,
+            content_type=project_type,
+            object_id=project.pk,
+        )
+
+        groups = {group["category"]: group["results"] for group in omnisearch("ataxia", self.user)}
+
+        self.assertEqual([result["label"] for result in groups["Notes"]], ["shared ataxia finding"])
+        self.assertEqual(omnisearch("a", self.user), [])
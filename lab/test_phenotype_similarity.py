@@ -0,0 +1,107 @@
+from collections import Counter
+from unittest import mock
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+
+from lab import phenotype_similarity
+from lab.models import Individual
+from lab.phenotype_similarity import PhenotypeSimilarityIndex, get_phenotype_similarity_index
+from ontologies.graph_snapshot import HPOGraphSnapshot
+from ontologies.models import Ontology, Term
+
+# HP:1 -> HP:2 (Nervous) -> HP:3 (Seizure) -> HP:4 (Febrile seizure)
+#      -> HP:5 (Eye)
+ANCESTORS = {
+    "HP:1": set(),
+    "HP:2": {"HP:1"},
+    "HP:3": {"HP:2", "HP:1"},
+    "HP:4": {"HP:3", "HP:2", "HP:1"},
+    "HP:5": {"HP:1"},
+}
+
+
+class PhenotypeSimilarityIndexTest(SimpleTestCase):
+    def setUp(self):
+        self.index = PhenotypeSimilarityIndex(
+            {
+                10: {"HP:4"},
+                11: {"HP:3"},
+                12: {"HP:5"},
+                13: {"HP:3", "HP:5"},
+                14: set(),
+            },
+            lambda term: ANCESTORS.get(term, set()),
+        )
+
+    def test_individuals_without_terms_are_skipped(self):
+        self.assertEqual(len(self.index), 4)
+        self.assertEqual(self.index.profile(14), [])
+
+    def test_resnik_uses_most_informative_common_ancestor(self):
+        scores = dict(zip(self.index.individual_pks.tolist(), self.index.score(["HP:4"])))
+        # Seizure is carried by 3 of 4 individuals; Eye shares only the root.
+        self.assertAlmostEqual(scores[11], self.index.ic[self.index.universe_position["HP:3"]])
+        self.assertEqual(scores[12], 0)
+
+    def test_similar_to_ranks_and_excludes_self(self):
+        ranked = self.index.similar_to(10, method="lin")
+        self.assertEqual([pk for pk, _ in ranked], [11, 13])
+        self.assertGreater(ranked[0][1], ranked[1][1])
+        self.assertLessEqual(ranked[0][1], 1.0)
+
+    def test_lin_of_identical_profiles_is_one(self):
+        ranked = self.index.rank(["HP:3", "HP:5"], method="lin", limit=1)
+        self.assertEqual(ranked[0][0], 13)
+        self.assertAlmostEqual(ranked[0][1], 1.0)
+
+    def test_given_term_counts_match_the_computed_ones(self):
+        profiles = {10: {"HP:4"}, 11: {"HP:3"}, 12: {"HP:5"}, 13: {"HP:3", "HP:5"}}
+        counts = Counter(
+            term for terms in profiles.values() for term in set().union(*({t, *ANCESTORS[t]} for t in terms))
+        )
+        index = PhenotypeSimilarityIndex(profiles, lambda term: ANCESTORS.get(term, set()), term_counts=counts)
+        self.assertEqual(index.ic.tolist(), self.index.ic.tolist())
+
+
+class PhenotypeProfileCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        phenotype_similarity._index_state.update(signature=None, index=None, profiles={}, counts=Counter())
+        graph = HPOGraphSnapshot.from_edges(
+            {"HP:0000001": "All", "HP:0000707": "Nervous", "HP:0001250": "Seizure", "HP:0000478": "Eye"},
+            [("HP:0000001", "HP:0000707"), ("HP:0000707", "HP:0001250"), ("HP:0000001", "HP:0000478")],
+        )
+        for target in ("lab.hpo_frequency.get_hpo_graph", "lab.phenotype_similarity.get_hpo_graph"):
+            patcher = mock.patch(target, return_value=graph)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        user = User.objects.create_user(username="similarityuser", password="password")
+        ontology = Ontology.objects.create(type=1, label="test")
+        self.seizure = Term.objects.create(ontology=ontology, identifier="0001250", label="Seizure")
+        self.eye = Term.objects.create(ontology=ontology, identifier="0000478", label="Eye")
+        self.individuals = [Individual.objects.create(full_name=f"P{i}", created_by=user) for i in range(3)]
+        with self.captureOnCommitCallbacks(execute=True):
+            for individual in self.individuals:
+                individual.hpo_terms.add(self.seizure)
+
+    def test_changes_reload_only_the_changed_profiles(self):
+        first, second, third = self.individuals
+        index = get_phenotype_similarity_index()
+        self.assertEqual(len(index), 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            third.hpo_terms.set([self.eye])
+        with mock.patch(
+            "lab.phenotype_similarity.hpo_profiles", wraps=phenotype_similarity.hpo_profiles
+        ) as profiles:
+            index = get_phenotype_similarity_index()
+        profiles.assert_called_once_with([third.pk])
+
+        self.assertEqual(index.profile(third.pk), ["HP:0000478"])
+        self.assertEqual([pk for pk, _ in index.similar_to(first.pk)], [second.pk])
+        # Seizure is now carried by two of three individuals.
+        self.assertAlmostEqual(index.ic[index.universe_position["HP:0001250"]], np.log(3 / 2))
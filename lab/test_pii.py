@@ -1,6 +1,8 @@
 from datetime import date
 
-from django.test import TestCase, RequestFactory
+from django.db import connection
+from django.db.migrations.loader import MigrationLoader
+from django.test import TestCase, RequestFactory, override_settings
 from django.contrib.auth.models import User, Permission
 from .htmx_views import (
     RevealSensitiveFieldView,
@@ -9,7 +11,8 @@ from .htmx_views import (
     individual_identification_edit,
     individual_identification_save,
 )
-from .models import CrossIdentifier, IdentifierType, Individual
+from .models import CrossIdentifier, IdentifierType, Individual, IndividualNameSortKey
+from .name_sort import RANK_GAP, rebuild_name_sort_keys
 from .tables import IndividualTable
 from .views import DashboardView, IndividualDetailView
 
@@ -276,3 +279,56 @@ class PIIRevealTest(TestCase):
         self.assertNotIn("99999999999", diff_text)
         self.assertNotIn("2001-02-03", diff_text)
         self.assertNotIn("2020-01-01", diff_text)
+
+    def test_name_blind_index_matches_word_prefixes_without_plaintext(self):
+        from .name_index import full_name_q
+
+        digests = list(self.individual.name_tokens.values_list("digest", flat=True))
+        self.assertTrue(digests)
+        self.assertFalse(any("john" in digest or "doe" in digest for digest in digests))
+
+        self.assertTrue(Individual.objects.filter(full_name_q("jo DOE")).exists())
+        self.assertFalse(Individual.objects.filter(full_name_q("ohn")).exists())
+
+        self.individual.full_name = "Jane Doe"
+        self.individual.save()
+        self.assertFalse(Individual.objects.filter(full_name_q("john")).exists())
+        self.assertTrue(Individual.objects.filter(full_name_q("jane")).exists())
+
+    def test_name_sort_keys_follow_alphabetical_order(self):
+        for name in ["Zeynep Kaya", "Ahmet Yılmaz", "Çağrı Demir"]:
+            Individual.objects.create(full_name=name, created_by=self.user)
+        self.individual.full_name = "Berk Aslan"
+        self.individual.save()
+
+        ordered = [
+            individual.full_name
+            for individual in Individual.objects.order_by("name_sort_key__rank")
+        ]
+        self.assertEqual(ordered, ["Ahmet Yılmaz", "Berk Aslan", "Çağrı Demir", "Zeynep Kaya"])
+
+    @override_settings(TASKS={"default": {"BACKEND": "django.tasks.backends.immediate.ImmediateBackend"}})
+    def test_exhausted_name_sort_gap_is_renumbered_after_commit(self):
+        first = Individual.objects.create(full_name="Ahmet Yılmaz", created_by=self.user)
+        last = Individual.objects.create(full_name="Cem Kaya", created_by=self.user)
+        IndividualNameSortKey.objects.filter(pk=first.pk).update(rank=10)
+        IndividualNameSortKey.objects.filter(pk=last.pk).update(rank=11)
+        IndividualNameSortKey.objects.filter(pk=self.individual.pk).update(rank=12)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Individual.objects.create(full_name="Berk Aslan", created_by=self.user)
+
+        ranks = list(Individual.objects.order_by("name_sort_key__rank").values_list("name_sort_key__rank", flat=True))
+        self.assertEqual(ranks, [RANK_GAP, 2 * RANK_GAP, 3 * RANK_GAP, 4 * RANK_GAP])
+        ordered = [individual.full_name for individual in Individual.objects.order_by("name_sort_key__rank")]
+        self.assertEqual(ordered, ["Ahmet Yılmaz", "Berk Aslan", "Cem Kaya", "John Doe"])
+
+    def test_name_sort_keys_rebuild_against_the_migration_state(self):
+        for name in ["Zeynep Kaya", "Ahmet Yılmaz"]:
+            Individual.objects.create(full_name=name, created_by=self.user)
+        IndividualNameSortKey.objects.all().delete()
+
+        registry = MigrationLoader(connection).project_state(("lab", "0015_backfill_individualnamesortkey")).apps
+        self.assertEqual(rebuild_name_sort_keys(registry=registry), 3)
+        ordered = [individual.full_name for individual in Individual.objects.order_by("name_sort_key__rank")]
+        self.assertEqual(ordered, ["Ahmet Yılmaz", "John Doe", "Zeynep Kaya"])
@@ -0,0 +1,80 @@
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.test import TestCase
+
+from lab.models import Individual, Project, Sample, SampleType, Status, Task
+from lab.row_status import rebuild_row_statuses, row_statuses
+from lab.status_utils import collect_individual_row_statuses
+
+
+class IndividualRowStatusTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="rowstatususer", password="password")
+        individual_type = ContentType.objects.get_for_model(Individual)
+        self.individual = Individual.objects.create(full_name="Row Status Individual", created_by=self.user)
+        self.sample = Sample.objects.create(
+            individual=self.individual,
+            sample_type=SampleType.objects.create(name="Blood", created_by=self.user),
+            created_by=self.user,
+        )
+        self.enrolled = Status.objects.create(name="Enrolled", created_by=self.user)
+        self.received = Status.objects.create(name="Received", created_by=self.user)
+        self.received.connected_classes.add(individual_type)
+        self.archived = Status.objects.create(name="Archived", created_by=self.user)
+        self.in_study = Status.objects.create(name="In Study", created_by=self.user)
+        self.in_study.connected_classes.add(individual_type)
+
+    def test_tagging_updates_the_materialized_badges(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.individual.statuses.add(self.enrolled)
+            self.sample.statuses.add(self.received, self.archived)
+
+        self.assertEqual(row_statuses(self.individual), [self.enrolled, self.received])
+        self.assertEqual(row_statuses(self.individual), collect_individual_row_statuses(self.individual))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.sample.statuses.remove(self.received)
+        self.assertEqual(row_statuses(self.individual), [self.enrolled])
+
+    def test_project_membership_and_rebuild(self):
+        project = Project.objects.create(name="Row Status Project", created_by=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            project.statuses.add(self.in_study)
+            project.individuals.add(self.individual)
+        self.assertEqual(row_statuses(self.individual), [self.in_study])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            project.individuals.remove(self.individual)
+        self.assertEqual(row_statuses(self.individual), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            project.individuals.add(self.individual)
+        self.individual.row_statuses.all().delete()
+        self.assertEqual(rebuild_row_statuses(), 1)
+        self.assertEqual(row_statuses(self.individual), [self.in_study])
+
+    def test_badges_follow_the_walk_order(self):
+        alpha = Status.objects.create(name="Alpha", created_by=self.user)
+        alpha.connected_classes.add(ContentType.objects.get_for_model(Individual))
+        project = Project.objects.create(name="Walk Order Project", created_by=self.user)
+        task = Task.objects.create(
+            title="Consent",
+            content_type=ContentType.objects.get_for_model(Individual),
+            object_id=self.individual.pk,
+            assigned_to=self.user,
+            created_by=self.user,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            project.individuals.add(self.individual)
+            self.sample.statuses.add(alpha)
+            task.statuses.add(self.received)
+            project.statuses.add(self.in_study)
+            self.individual.statuses.add(self.enrolled)
+
+        # Own statuses, then projects, the individual's tasks and samples, whatever the names.
+        expected = [self.enrolled, self.in_study, self.received, alpha]
+        self.assertEqual(collect_individual_row_statuses(self.individual), expected)
+        self.assertEqual(row_statuses(self.individual), expected)
+        self.individual.row_statuses.all().delete()
+        rebuild_row_statuses()
+        self.assertEqual(row_statuses(self.individual), expected)
@@ -1,8 +1,13 @@
 from django.contrib.auth.models import User
+from django.db import connection
+from django.db.migrations.loader import MigrationLoader
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
-from lab.models import Institution
+from lab.models import Individual, Institution, SearchValue
+from lab.search_index import rebuild_search_values
 from lab.search_utils import filter_normalized_contains, normalize_search_text, normalized_contains
+from variant.models import CNV, SNV, Variant
 
 
 class TurkishSearchNormalizationTest(TestCase):
@@ -32,3 +37,53 @@ class TurkishSearchNormalizationTest(TestCase):
 
         self.assertQuerySetEqual(dotted_i_results, [istanbul], transform=lambda obj: obj)
         self.assertQuerySetEqual(dotless_i_results, [isparta], transform=lambda obj: obj)
+
+    def test_indexed_search_values_follow_saves(self):
+        institution = Institution.objects.create(name="Işık Hastanesi", created_by=self.user)
+        self.assertTrue(SearchValue.objects.filter(object_id=institution.pk, value=normalize_search_text("Işık Hastanesi")).exists())
+
+        institution.name = "İzmir Merkezi"
+        institution.save()
+        results = filter_normalized_contains(Institution.objects.all(), ["name", "id"], "izmir")
+        self.assertQuerySetEqual(results, [institution], transform=lambda obj: obj)
+        self.assertFalse(filter_normalized_contains(Institution.objects.all(), ["name"], "ışık").exists())
+
+    def test_variant_rebuild_reads_snv_alleles_in_the_same_query(self):
+        individual = Individual.objects.create(full_name="Variant Owner", created_by=self.user)
+
+        def rebuild_queries(count):
+            for position in range(count):
+                SNV.objects.create(
+                    assembly_version="hg38",
+                    chromosome="chr1",
+                    start=100 + position,
+                    end=100 + position,
+                    individual=individual,
+                    created_by=self.user,
+                    zygosity="het",
+                    reference="A",
+                    alternate="G",
+                )
+            with CaptureQueriesContext(connection) as queries:
+                rebuild_search_values(Variant)
+            return len(queries)
+
+        self.assertEqual(rebuild_queries(1), rebuild_queries(3))
+        self.assertTrue(SearchValue.objects.filter(field="hgvs_name", value=normalize_search_text("chr1:102A>G")).exists())
+
+    def test_rebuild_runs_against_the_migration_state(self):
+        individual = Individual.objects.create(full_name="Variant Owner", created_by=self.user)
+        Institution.objects.create(name="Işık Hastanesi", created_by=self.user)
+        variant = dict(assembly_version="hg38", chromosome="chr2", individual=individual, created_by=self.user, zygosity="het")
+        SNV.objects.create(start=5, end=5, reference="C", alternate="T", **variant)
+        CNV.objects.create(start=10, end=90, cnv_type="loss", **variant)
+        SearchValue.objects.all().delete()
+
+        registry = MigrationLoader(connection).project_state(("lab", "0014_backfill_searchvalue")).apps
+        for label in ("lab.Institution", "variant.Variant"):
+            rebuild_search_values(registry.get_model(label), registry=registry)
+
+        self.assertEqual(
+            set(SearchValue.objects.filter(field__in=["name", "hgvs_name"]).values_list("value", flat=True)),
+            {normalize_search_text(value) for value in ("Işık Hastanesi", "chr2:5C>T", "chr2:10-90")},
+        )
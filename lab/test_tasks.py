@@ -0,0 +1,25 @@
+from io import StringIO
+
+from django.core import mail
+from django.core.management import call_command
+from django.tasks import TaskResultStatus
+from django.test import TestCase, override_settings
+from django_tasks_db import DatabaseBackend
+
+from lab.tasks import send_notification_email
+
+
+@override_settings(TASKS={"default": {"BACKEND": "django_tasks_db.DatabaseBackend"}})
+class DatabaseTaskBackendTest(TestCase):
+    def test_lab_tasks_are_queued_in_the_database_and_run_by_the_worker(self):
+        self.assertIsInstance(send_notification_email.get_backend(), DatabaseBackend)
+        result = send_notification_email.enqueue("Subject", "Body", ["someone@example.com"])
+        self.assertEqual(result.status, TaskResultStatus.READY)
+        self.assertEqual(mail.outbox, [])
+
+        call_command("db_worker", batch=True, no_startup_delay=True, stdout=StringIO(), stderr=StringIO())
+
+        result.refresh()
+        self.assertEqual(result.status, TaskResultStatus.SUCCESSFUL)
+        self.assertEqual(result.return_value, 1)
+        self.assertEqual(len(mail.outbox), 1)
@@ -11,10 +11,15 @@ from .views import (
     FamilyCreateView,
     HPOTermSearchView,
     hpo_bulk_match,
+    hpo_tree_children,
+    hpo_enrichment,
     RenderSelectedHPOTermView,
     CompleteTaskView,
     ReopenTaskView,
     IndividualExportView,
+    export_job_create,
+    export_job_status,
+    export_job_download,
     configurations_view,
     MapVisualizationView,
     issue_plot_token_view,
@@ -39,6 +44,7 @@ from .htmx_views import (
     note_delete,
     note_list,
     note_count,
+    note_search,
     individual_identification_edit,
     individual_identification_save,
     individual_demographics_edit,
@@ -49,6 +55,7 @@ from .htmx_views import (
     individual_contact_information_edit,
     individual_contact_information_save,
     family_search,
+    omnisearch_results,
     individual_parents_edit,
     individual_parents_display,
     individual_parents_save,
@@ -114,6 +121,9 @@ urlpatterns = [
     # Map visualization (current and default at /visualizations/)
     path("visualizations/", MapVisualizationView.as_view(), name="map_visualization"),
     path("individuals/export/", IndividualExportView.as_view(), name="individual_export"),
+    path("exports/<str:kind>/start/", export_job_create, name="export_job_create"),
+    path("exports/<int:pk>/status/", export_job_status, name="export_job_status"),
+    path("exports/<int:pk>/download/", export_job_download, name="export_job_download"),
     path("individuals/create-family/", FamilyCreateView.as_view(), name="create_family"),
     path("samples/", SampleListView.as_view(), name="sample_list"),
     path("individuals/<int:pk>/detail/", IndividualDetailView.as_view(), name="individual_detail"),
@@ -133,6 +143,7 @@ urlpatterns = [
     path("htmx/individual/<int:pk>/contact-information/edit/", individual_contact_information_edit, name="individual_contact_information_edit"),
     path("htmx/individual/<int:pk>/contact-information/save/", individual_contact_information_save, name="individual_contact_information_save"),
     path("htmx/family/search/", family_search, name="family_search"),
+    path("htmx/search/", omnisearch_results, name="omnisearch"),
     path("htmx/individual/<int:pk>/parents/edit/", individual_parents_edit, name="individual_parents_edit"),
     path("htmx/individual/<int:pk>/parents/display/", individual_parents_display, name="individual_parents_display"),
     path("htmx/individual/<int:pk>/parents/save/", individual_parents_save, name="individual_parents_save"),
@@ -154,6 +165,8 @@ urlpatterns = [
     # HPO Search
     path("htmx/hpo/search/", HPOTermSearchView.as_view(), name="hpo_search"),
     path("htmx/hpo/bulk-match/", hpo_bulk_match, name="hpo_bulk_match"),
+    path("htmx/hpo/tree/", hpo_tree_children, name="hpo_tree_children"),
+    path("htmx/hpo/enrichment/", hpo_enrichment, name="hpo_enrichment"),
     path("htmx/hpo/picker/", HPOTermSearchView.as_view(template_name="lab/partials/hpo_picker_results.html"), name="hpo_picker"),
     path("htmx/hpo/render/<int:pk>/", RenderSelectedHPOTermView.as_view(), name="render_selected_hpo"),
     
@@ -163,6 +176,7 @@ urlpatterns = [
     path("htmx/notes/delete/<int:pk>/", note_delete, name="note_delete"),
     path("htmx/notes/list/", note_list, name="note_list"),
     path("htmx/notes/count/", note_count, name="note_count"),
+    path("htmx/notes/search/", note_search, name="note_search"),
     
     # Profile & Theme
     path("profile/", ProfileView.as_view(), name="profile"),
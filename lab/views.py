@@ -1,8 +1,9 @@
 import logging
 import re
+from collections import defaultdict
 from django.conf import settings
 from django.shortcuts import render, get_object_or_404
-from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
+from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, JsonResponse
 from django.utils import timezone
 from django.views.decorators.vary import vary_on_headers
 from django.contrib.auth.decorators import login_required
@@ -12,10 +13,10 @@ from django_tables2 import SingleTableMixin
 from django_filters.views import FilterView
 from django.core.cache import cache
 from django.core.paginator import Paginator
-from django.db.models import Count, Min, Max, Sum, Avg, DateTimeField, Q
-from django.db.models.functions import Cast, Coalesce
+from django.db.models import Count, Exists, F, Min, Max, OuterRef, Subquery, Sum, Avg, Q
 from django.contrib.contenttypes.models import ContentType
-from django_tables2.rows import BoundRows
+from .cache_versions import FILTER_COUNTS_CACHE_TTL, versioned_key
+from .pagination import CursorPaginationMixin, HydratedPagePaginator, cached_count, queryset_signature
 from .display_preferences import DEFAULT_INSTITUTION_DISPLAY, institution_display_name, normalize_institution_display
 from .models import (
     Individual,
@@ -36,18 +37,22 @@ from .models import (
     PlotTemplate,
     DashboardWidget,
     Family,
+    AnalysisRequestForm,
+    TaggedStatus,
+    ExportJob,
 )
 from .tables import IndividualTable, SampleTable, ProjectTable, VariantTable
 from .filters import (
+    ANNOTATION_ACMG_CLASSIFICATION_FIELDS,
     IndividualFilter,
     ProjectFilter,
     VariantFilter,
+    _annotation_acmg_classification_q,
 )
-from .search_utils import (
-    filter_normalized_contains,
-    normalize_search_text,
-    order_by_normalized_relevance,
-)
+from .search_utils import filter_normalized_contains
+from .hpo_index import MATCH_SUBSTRING, SearchResults, get_hpo_term_index
+from .phenotype_similarity import similar_individuals
+from .hpo_enrichment import cohort_enrichment
 from .history_display import format_history_diff, historical_model_name
 from .status_utils import build_status_metadata_by_model
 from variant.models import (
@@ -60,39 +65,6 @@ from variant.models import (
 logger = logging.getLogger(__name__)
 
 
-class HydratedPagePaginator(Paginator):
-    """Paginate a light table queryset, then hydrate only the current page rows."""
-
-    def __init__(self, object_list, per_page, *args, hydrated_queryset=None, **kwargs):
-        self.hydrated_queryset = hydrated_queryset
-        super().__init__(object_list, per_page, *args, **kwargs)
-
-    def _get_page(self, object_list, number, paginator):
-        if self.hydrated_queryset is not None and isinstance(object_list, BoundRows):
-            object_list = BoundRows(
-                data=self._hydrate_records(object_list),
-                table=object_list.table,
-                pinned_data=object_list.pinned_data,
-            )
-        return super()._get_page(object_list, number, paginator)
-
-    def _hydrate_records(self, bound_rows):
-        table_data = getattr(bound_rows, "data", None)
-        page_queryset = getattr(table_data, "data", table_data)
-        if not hasattr(page_queryset, "values_list"):
-            return list(table_data or [])
-
-        page_ids = list(page_queryset.values_list("pk", flat=True))
-        if not page_ids:
-            return []
-
-        hydrated_by_id = {
-            record.pk: record
-            for record in self.hydrated_queryset.filter(pk__in=page_ids)
-        }
-        return [hydrated_by_id[pk] for pk in page_ids if pk in hydrated_by_id]
-
-
 def _plot_config_filters(config):
     return config.get("filters") or config.get("filter") or {}
 
@@ -161,18 +133,39 @@ def _dashboard_group_status_counts(model, counts):
     return grouped
 
 
+def _dashboard_object_status_counts():
+    """
+    {"sample" | "test" | "pipeline" | "analysis": {status name: tagged objects}}
+    for the dashboard cards, which count objects where the individual sidebar
+    counts individuals. Cached with the individual filter counts.
+    """
+    CACHE_KEY = versioned_key("individual_filter_counts", "dashboard_objects")
+    counts = cache.get(CACHE_KEY)
+    if counts is not None:
+        return counts
+
+    counts = {}
+    for model in (Sample, Test, Pipeline, Analysis):
+        counts[model._meta.model_name] = {
+            row['tag__name']: row['c']
+            for row in TaggedStatus.objects.filter(content_type=ContentType.objects.get_for_model(model))
+            .order_by().values('tag__name').annotate(c=Count('object_id', distinct=True))
+            if row['tag__name']
+        }
+    cache.set(CACHE_KEY, counts, FILTER_COUNTS_CACHE_TTL)
+    return counts
+
+
 def _variant_filter_counts():
     """
     Returns per-option counts for the variant filter sidebar.
 
-    Results are cached for 5 minutes. The counts are global (not affected by
-    the current filter selection) so they only need to be refreshed when the
-    underlying data changes, not on every request. The cache is invalidated
-    automatically after TTL; for immediate refresh after bulk imports use
-    cache.delete("variant_filter_counts").
+    The counts are global (not affected by the current filter selection), so
+    they are cached under a versioned key that lab.signals bumps whenever
+    the underlying data changes (see lab.cache_versions).
     """
-    CACHE_KEY = "variant_filter_counts"
-    CACHE_TTL = 300  # seconds
+    CACHE_KEY = versioned_key("variant_filter_counts")
+    CACHE_TTL = FILTER_COUNTS_CACHE_TTL
 
     counts = cache.get(CACHE_KEY)
     if counts is not None:
@@ -235,10 +228,13 @@ def _variant_filter_counts():
     return counts
 
 
-def _acmg_evidence_counts(count_field):
+def _acmg_evidence_counts(count_field, restrict=None):
+    overrides = ACMGEvidenceOverride.objects.filter(included=True)
+    if restrict is not None:
+        overrides = overrides.filter(restrict)
     return {
         row["criterion"]: row["c"]
-        for row in ACMGEvidenceOverride.objects.filter(included=True)
+        for row in overrides
         .exclude(criterion="")
         .values("criterion")
         .annotate(c=Count(count_field, distinct=True))
@@ -246,277 +242,239 @@ def _acmg_evidence_counts(count_field):
     }
 
 
-def _annotation_acmg_classification_counts(count_field):
-    lookups = ("data__variants__0__acmg_classification", "data__acmg_classification")
+def _annotation_acmg_classification_counts(count_field, restrict=None):
+    annotations = VariantAnnotation.objects.all()
+    if restrict is not None:
+        annotations = annotations.filter(restrict)
     values = set()
-    for lookup in lookups:
-        values.update(
-            value
-            for value in VariantAnnotation.objects.filter(source__icontains="genebe")
-            .exclude(**{f"{lookup}__isnull": True})
-            .exclude(**{lookup: ""})
-            .values_list(lookup, flat=True)
-            if value
-        )
-
-    counts = {}
-    for value in values:
-        counts[value] = (
-            VariantAnnotation.objects.filter(source__icontains="genebe")
-            .filter(
-                Q(data__variants__0__acmg_classification=value)
-                | Q(data__acmg_classification=value)
-            )
-            .aggregate(c=Count(count_field, distinct=True))["c"]
-        )
-    return counts
+    for field in ANNOTATION_ACMG_CLASSIFICATION_FIELDS:
+        values.update(annotations.exclude(**{field: ""}).order_by().values_list(field, flat=True).distinct())
+    values = sorted(values)
+    if not values:
+        return {}
+    # One filtered aggregate per value: an annotation counts under both of its classifications, once each.
+    totals = annotations.order_by().aggregate(
+        **{
+            f"c{index}": Count(count_field, distinct=True, filter=_annotation_acmg_classification_q("", [value]))
+            for index, value in enumerate(values)
+        }
+    )
+    return {value: totals[f"c{index}"] for index, value in enumerate(values)}
 
-def _individual_filter_counts():
-    """
-    Returns per-option counts for the individual filter sidebar.
-    Each count represents the number of distinct individuals matching that option.
-    Cached for 5 minutes.
-    """
-    CACHE_KEY = "individual_filter_counts"
-    CACHE_TTL = 300
 
-    counts = cache.get(CACHE_KEY)
-    if counts is not None:
-        return counts
+def _in_result(queryset, path, individual_ids):
+    """Restrict `queryset` to rows whose individual (at `path`) is in `individual_ids`; None keeps all."""
+    if individual_ids is None:
+        return queryset
+    return queryset.filter(**{f"{path}__in": individual_ids})
 
-    from .models import TaggedStatus
-    individual_ct = ContentType.objects.get_for_model(Individual)
-    sample_ct = ContentType.objects.get_for_model(Sample)
-    test_ct = ContentType.objects.get_for_model(Test)
-    pipeline_ct = ContentType.objects.get_for_model(Pipeline)
-    analysis_ct = ContentType.objects.get_for_model(Analysis)
-    variant_ct = ContentType.objects.get_for_model(Variant)
 
-    # Status (keyed by status name, counting distinct objects tagged with each status)
-    status_counts = {s: 0 for s in Status.objects.filter(content_type=individual_ct).values_list('name', flat=True)}
-    status_counts.update({
+def _tagged_individual_counts(model, path, individual_ids):
+    """{status name: distinct individuals with a `model` object (at `path` from it) tagged with it}."""
+    content_type = ContentType.objects.get_for_model(model)
+    if model is Individual:
+        owner = F("object_id")
+    else:
+        owner = Subquery(model._base_manager.filter(pk=OuterRef("object_id")).values(path)[:1])
+    tagged = TaggedStatus.objects.filter(content_type=content_type)
+    if individual_ids is not None:
+        tagged = tagged.filter(
+            object_id__in=_in_result(model._base_manager.all(), path, individual_ids).values("pk")
+        )
+    return {
         row['tag__name']: row['c']
-        for row in TaggedStatus.objects.filter(content_type=individual_ct)
-        .values('tag__name').annotate(c=Count('object_id', distinct=True))
+        for row in tagged.order_by().values('tag__name').annotate(c=Count(owner, distinct=True))
         if row['tag__name']
-    })
-
-    # Sex (keyed by sex value: 'male', 'female', 'other')
-    sex_counts = {'male': 0, 'female': 0, 'other': 0}
-    sex_counts.update({
-        row['sex']: row['c']
-        for row in Individual.objects.filter(sex__isnull=False).values('sex').annotate(c=Count('id'))
-    })
-
-    # Is alive (keyed by Python bool True/False)
-    is_alive_counts = {True: 0, False: 0}
-    is_alive_counts.update({
-        row['is_alive']: row['c']
-        for row in Individual.objects.values('is_alive').annotate(c=Count('id'))
-    })
-
-    # Is affected
-    is_affected_counts = {True: 0, False: 0}
-    is_affected_counts.update({
-        row['is_affected']: row['c']
-        for row in Individual.objects.values('is_affected').annotate(c=Count('id'))
-    })
+    }
 
-    # Is index
-    is_index_counts = {True: 0, False: 0}
-    is_index_counts.update({
-        row['is_index']: row['c']
-        for row in Individual.objects.values('is_index').annotate(c=Count('id'))
-    })
 
-    family_consanguinity_counts = {
-        "false": 0,
-        "unknown": Individual.objects.filter(
-            Q(family__isnull=True) |
-            Q(family__is_consanguineous__isnull=True)
-        ).distinct().count(),
-        "true": 0,
+def _grouped_individual_counts(queryset, group_field, individual_field):
+    return {
+        row[group_field]: row['c']
+        for row in queryset.order_by().values(group_field).annotate(c=Count(individual_field, distinct=True))
+        if row[group_field]
     }
-    family_consanguinity_counts.update({
-        str(row["family__is_consanguineous"]).lower(): row["c"]
-        for row in Individual.objects.filter(
-            family__is_consanguineous__isnull=False
-        )
-        .values("family__is_consanguineous")
-        .annotate(c=Count("id", distinct=True))
-    })
 
-    # Has Report
-    has_report_counts = {
-        'true': Individual.objects.filter(samples__tests__pipelines__analyses__reports__isnull=False).distinct().count(),
-        'false': Individual.objects.filter(samples__tests__pipelines__analyses__reports__isnull=True).distinct().count()
-    }
 
-    # Has Request Form
-    has_request_form_counts = {
-        'true': Individual.objects.filter(analysis_request_forms__isnull=False).distinct().count(),
-        'false': Individual.objects.filter(analysis_request_forms__isnull=True).distinct().count()
+# Individual filter field -> its `_individual_filter_counts` family, for the
+# counts sent out of band with each HTMX table swap.
+INDIVIDUAL_FILTER_COUNT_FIELDS = {
+    "status": "status",
+    "sex": "sex",
+    "is_alive": "is_alive",
+    "is_affected": "is_affected",
+    "is_index": "is_index",
+    "family__is_consanguineous": "family_consanguinity",
+    "has_report": "has_report",
+    "has_request_form": "has_request_form",
+    "institution__city": "institution_city",
+    "institution__speciality": "institution_speciality",
+    "institution__center_name": "institution_center",
+    "samples__sample_type": "sample_type",
+    "samples__status": "sample_status",
+    "samples__tests__test_type": "test_type",
+    "samples__tests__status": "test_status",
+    "samples__tests__pipelines__type": "pipeline_type",
+    "samples__tests__pipelines__status": "pipeline_status",
+    "samples__tests__pipelines__analyses__type": "analysis_type",
+    "samples__tests__pipelines__analyses__status": "analysis_status",
+    "variant_type": "variant_type",
+    "variants__status": "variant_status",
+    "variants__annotation_acmg_classification": "variants__annotation_acmg_classification",
+    "variants__acmg_evidence": "variants__acmg_evidence",
+}
+
+
+def _filter_count_updates(counts, fields=INDIVIDUAL_FILTER_COUNT_FIELDS):
+    """Counts keyed by filter field and rendered option value, for the sidebar to apply."""
+    return {
+        field: {str(value): count for value, count in counts.get(family, {}).items()}
+        for field, family in fields.items()
     }
 
-    # Projects
-    projects_counts = {p: 0 for p in Project.objects.values_list('name', flat=True)}
-    projects_counts.update({
-        row['projects__name']: row['c']
-        for row in Individual.objects.filter(projects__isnull=False)
-        .values('projects__name')
-        .annotate(c=Count('id', distinct=True))
-    })
 
-    # Sample type (count = distinct individuals with at least one sample of this type)
-    sample_type_counts = {name: 0 for name in SampleType.objects.values_list('name', flat=True)}
-    sample_type_counts.update({
-        row['sample_type__name']: row['c']
-        for row in Sample.objects.values('sample_type__name')
-        .annotate(c=Count('individual_id', distinct=True))
-        if row['sample_type__name']
-    })
+def _individual_filter_counts(individuals=None):
+    """
+    Returns per-option counts for the individual filter sidebar.
+    Each count represents the number of distinct individuals matching that option.
 
-    # Sample status
-    sample_status_counts = {s: 0 for s in Status.objects.filter(content_type=sample_ct).values_list('name', flat=True)}
-    sample_status_counts.update({
-        row['tag__name']: row['c']
-        for row in TaggedStatus.objects.filter(content_type=sample_ct)
-        .values('tag__name').annotate(c=Count('object_id', distinct=True))
-        if row['tag__name']
-    })
+    Given `individuals` (the current IndividualFilter result), every count is
+    restricted to that result set, i.e. how many of the listed individuals the
+    option matches. Each facet family is one grouped query over the rows
+    related to the result set's ids (passed as a subquery), and the plain
+    Individual fields share one conditional aggregate. Cached under a
+    versioned key (see lab.cache_versions), per result-set signature when
+    filtered.
+    """
+    CACHE_KEY = versioned_key("individual_filter_counts")
+    CACHE_TTL = FILTER_COUNTS_CACHE_TTL
 
-    # Test type
-    test_type_counts = {name: 0 for name in TestType.objects.values_list('name', flat=True)}
-    test_type_counts.update({
-        row['test_type__name']: row['c']
-        for row in Test.objects.filter(sample__isnull=False).values('test_type__name')
-        .annotate(c=Count('sample__individual_id', distinct=True))
-        if row['test_type__name']
-    })
+    individual_ids = None
+    if individuals is not None:
+        CACHE_KEY = f"{CACHE_KEY}:{queryset_signature(individuals) or 'none'}"
+        individual_ids = individuals.order_by().values("pk")
 
-    # Test status
-    test_status_counts = {s: 0 for s in Status.objects.filter(content_type=test_ct).values_list('name', flat=True)}
-    test_status_counts.update({
-        row['tag__name']: row['c']
-        for row in TaggedStatus.objects.filter(content_type=test_ct)
-        .values('tag__name').annotate(c=Count('object_id', distinct=True))
-        if row['tag__name']
-    })
+    counts = cache.get(CACHE_KEY)
+    if counts is not None:
+        return counts
 
-    # Pipeline type
-    pipeline_type_counts = {name: 0 for name in PipelineType.objects.values_list('name', flat=True)}
-    pipeline_type_counts.update({
-        row['type__name']: row['c']
-        for row in Pipeline.objects.values('type__name')
-        .annotate(c=Count('test__sample__individual_id', distinct=True))
-        if row['type__name']
-    })
+    def zeros(names):
+        return {name: 0 for name in names}
 
-    # Pipeline status
-    pipeline_status_counts = {s: 0 for s in Status.objects.filter(content_type=pipeline_ct).values_list('name', flat=True)}
-    pipeline_status_counts.update({
-        row['tag__name']: row['c']
-        for row in TaggedStatus.objects.filter(content_type=pipeline_ct)
-        .values('tag__name').annotate(c=Count('object_id', distinct=True))
-        if row['tag__name']
-    })
+    status_names = defaultdict(dict)
+    for content_type_id, name in Status.objects.filter(content_type__isnull=False).values_list('content_type_id', 'name'):
+        status_names[content_type_id][name] = 0
 
-    # Analysis type
-    analysis_type_counts = {name: 0 for name in AnalysisType.objects.values_list('name', flat=True)}
-    analysis_type_counts.update({
-        row['type__name']: row['c']
-        for row in Analysis.objects.values('type__name')
-        .annotate(c=Count('pipeline__test__sample__individual_id', distinct=True))
-        if row['type__name']
-    })
+    def status_counts(model, path):
+        counts = dict(status_names[ContentType.objects.get_for_model(model).pk])
+        counts.update(_tagged_individual_counts(model, path, individual_ids))
+        return counts
 
-    # Analysis status
-    analysis_status_counts = {s: 0 for s in Status.objects.filter(content_type=analysis_ct).values_list('name', flat=True)}
-    analysis_status_counts.update({
-        row['tag__name']: row['c']
-        for row in TaggedStatus.objects.filter(content_type=analysis_ct)
-        .values('tag__name').annotate(c=Count('object_id', distinct=True))
-        if row['tag__name']
+    # Plain Individual fields: one pass with a conditional count per option.
+    reports = Individual.objects.filter(pk=OuterRef("pk"))
+    request_forms = AnalysisRequestForm.objects.filter(individual_id=OuterRef("pk"))
+    scalar_options = [
+        *(("sex", value, Q(sex=value)) for value, _ in Individual._meta.get_field("sex").choices),
+        *(
+            (field, flag, Q(**{field: flag}))
+            for field in ("is_alive", "is_affected", "is_index")
+            for flag in (True, False)
+        ),
+        ("family_consanguinity", "false", Q(family__is_consanguineous=False)),
+        ("family_consanguinity", "unknown", Q(family__isnull=True) | Q(family__is_consanguineous__isnull=True)),
+        ("family_consanguinity", "true", Q(family__is_consanguineous=True)),
+        # Same conditions as IndividualFilter.filter_has_report / filter_has_request_form.
+        ("has_report", "true", Exists(reports.filter(samples__tests__pipelines__analyses__reports__isnull=False))),
+        ("has_report", "false", Exists(reports.filter(samples__tests__pipelines__analyses__reports__isnull=True))),
+        ("has_request_form", "true", Exists(request_forms)),
+        ("has_request_form", "false", ~Exists(request_forms)),
+    ]
+    totals = _in_result(Individual.objects.all(), "pk", individual_ids).aggregate(**{
+        f"option_{position}": Count("pk", filter=condition)
+        for position, (_, _, condition) in enumerate(scalar_options)
     })
+    scalar_counts = defaultdict(dict)
+    for position, (family, key, _) in enumerate(scalar_options):
+        scalar_counts[family][key] = totals[f"option_{position}"]
+
+    projects_counts = zeros(Project.objects.values_list('name', flat=True))
+    projects_counts.update(_grouped_individual_counts(
+        _in_result(Individual.objects.filter(projects__isnull=False), "pk", individual_ids),
+        'projects__name', 'id',
+    ))
+
+    # Types (count = distinct individuals with at least one object of the type)
+    sample_type_counts = zeros(SampleType.objects.values_list('name', flat=True))
+    sample_type_counts.update(_grouped_individual_counts(
+        _in_result(Sample.objects.all(), "individual", individual_ids),
+        'sample_type__name', 'individual_id',
+    ))
+    test_type_counts = zeros(TestType.objects.values_list('name', flat=True))
+    test_type_counts.update(_grouped_individual_counts(
+        _in_result(Test.objects.filter(sample__isnull=False), "sample__individual", individual_ids),
+        'test_type__name', 'sample__individual_id',
+    ))
+    pipeline_type_counts = zeros(PipelineType.objects.values_list('name', flat=True))
+    pipeline_type_counts.update(_grouped_individual_counts(
+        _in_result(Pipeline.objects.all(), "test__sample__individual", individual_ids),
+        'type__name', 'test__sample__individual_id',
+    ))
+    analysis_type_counts = zeros(AnalysisType.objects.values_list('name', flat=True))
+    analysis_type_counts.update(_grouped_individual_counts(
+        _in_result(Analysis.objects.all(), "pipeline__test__sample__individual", individual_ids),
+        'type__name', 'pipeline__test__sample__individual_id',
+    ))
 
     # Variant type (distinct individuals with that variant subtype)
-    variant_type_counts = {
-        'SNV':    Individual.objects.filter(variants__snv__isnull=False).distinct().count(),
-        'CNV':    Individual.objects.filter(variants__cnv__isnull=False).distinct().count(),
-        'SV':     Individual.objects.filter(variants__sv__isnull=False).distinct().count(),
-        'Repeat': Individual.objects.filter(variants__repeat__isnull=False).distinct().count(),
-    }
-
-    # Variant status (distinct individuals)
-    variant_status_counts = {s: 0 for s in Status.objects.filter(content_type=variant_ct).values_list('name', flat=True)}
-    variant_status_counts.update({
-        row['tag__name']: row['c']
-        for row in TaggedStatus.objects.filter(content_type=variant_ct)
-        .values('tag__name').annotate(c=Count('object_id', distinct=True))
-        if row['tag__name']
+    variant_type_counts = _in_result(Variant.objects.all(), "individual", individual_ids).aggregate(**{
+        label: Count('individual_id', distinct=True, filter=Q(**{f"{subtype}__isnull": False}))
+        for label, subtype in (('SNV', 'snv'), ('CNV', 'cnv'), ('SV', 'sv'), ('Repeat', 'repeat'))
     })
 
     # ACMG classification (distinct individuals)
     classif_counts = {choice[0]: 0 for choice in VariantClassification.CLASSIFICATION_CHOICES}
-    classif_counts.update({
-        row['classification']: row['c']
-        for row in VariantClassification.objects.values('classification')
-        .annotate(c=Count('variant__individual_id', distinct=True))
-        if row['classification']
-    })
+    classif_counts.update(_grouped_individual_counts(
+        _in_result(VariantClassification.objects.all(), "variant__individual", individual_ids),
+        'classification', 'variant__individual_id',
+    ))
+    variant_restrict = None if individual_ids is None else Q(variant__individual__in=individual_ids)
     annotation_acmg_classification_counts = _annotation_acmg_classification_counts(
-        "variant__individual_id"
+        "variant__individual_id", variant_restrict
     )
-    acmg_evidence_counts = _acmg_evidence_counts("variant__individual_id")
+    acmg_evidence_counts = _acmg_evidence_counts("variant__individual_id", variant_restrict)
 
-
-    # --- Lab App Setup/Installation Checks ---
     # Institution sub-filters (distinct individuals per city / speciality / center_name)
-    institution_city_counts = {
-        row['institution__city']: row['c']
-        for row in Individual.objects.filter(institution__city__isnull=False)
-        .exclude(institution__city='')
-        .values('institution__city')
-        .annotate(c=Count('id', distinct=True))
-        if row['institution__city']
-    }
-    institution_speciality_counts = {
-        row['institution__speciality']: row['c']
-        for row in Individual.objects.filter(institution__speciality__isnull=False)
-        .exclude(institution__speciality='')
-        .values('institution__speciality')
-        .annotate(c=Count('id', distinct=True))
-        if row['institution__speciality']
-    }
-    institution_center_counts = {
-        row['institution__center_name']: row['c']
-        for row in Individual.objects.filter(institution__center_name__isnull=False)
-        .exclude(institution__center_name='')
-        .values('institution__center_name')
-        .annotate(c=Count('id', distinct=True))
-        if row['institution__center_name']
-    }
+    individuals_in_result = _in_result(Individual.objects.all(), "pk", individual_ids)
+    institution_city_counts = _grouped_individual_counts(
+        individuals_in_result, 'institution__city', 'id'
+    )
+    institution_speciality_counts = _grouped_individual_counts(
+        individuals_in_result, 'institution__speciality', 'id'
+    )
+    institution_center_counts = _grouped_individual_counts(
+        individuals_in_result, 'institution__center_name', 'id'
+    )
 
     counts = {
-        "status":                   status_counts,
-        "sex":                      sex_counts,
-        "is_alive":                 is_alive_counts,
-        "is_affected":              is_affected_counts,
-        "is_index":                 is_index_counts,
-        "family_consanguinity":      family_consanguinity_counts,
-        "has_report":               has_report_counts,
-        "has_request_form":         has_request_form_counts,
+        "status":                   status_counts(Individual, "pk"),
+        "sex":                      scalar_counts["sex"],
+        "is_alive":                 scalar_counts["is_alive"],
+        "is_affected":              scalar_counts["is_affected"],
+        "is_index":                 scalar_counts["is_index"],
+        "family_consanguinity":      scalar_counts["family_consanguinity"],
+        "has_report":               scalar_counts["has_report"],
+        "has_request_form":         scalar_counts["has_request_form"],
         "projects":                 projects_counts,
         "sample_type":              sample_type_counts,
-        "sample_status":            sample_status_counts,
+        "sample_status":            status_counts(Sample, "individual"),
         "test_type":                test_type_counts,
-        "test_status":              test_status_counts,
+        "test_status":              status_counts(Test, "sample__individual"),
         "pipeline_type":            pipeline_type_counts,
-        "pipeline_status":          pipeline_status_counts,
+        "pipeline_status":          status_counts(Pipeline, "test__sample__individual"),
         "analysis_type":            analysis_type_counts,
-        "analysis_status":          analysis_status_counts,
+        "analysis_status":          status_counts(Analysis, "pipeline__test__sample__individual"),
         "variant_type":             variant_type_counts,
-        "variant_status":           variant_status_counts,
+        "variant_status":           status_counts(Variant, "individual"),
         "classification":           classif_counts,
         "variants__annotation_acmg_classification": annotation_acmg_classification_counts,
         "variants__acmg_evidence":  acmg_evidence_counts,
@@ -531,10 +489,10 @@ def _individual_filter_counts():
 def _project_filter_counts():
     """
     Returns per-option counts for the project filter sidebar.
-    Cached for 5 minutes.
+    Cached under a versioned key (see lab.cache_versions).
     """
-    CACHE_KEY = "project_filter_counts"
-    CACHE_TTL = 300
+    CACHE_KEY = versioned_key("project_filter_counts")
+    CACHE_TTL = FILTER_COUNTS_CACHE_TTL
 
     counts = cache.get(CACHE_KEY)
     if counts is not None:
@@ -739,6 +697,7 @@ class DashboardView(LoginRequiredMixin, TemplateView):
         context['individual_filter_counts'] = _individual_filter_counts()
         context['project_filter_counts'] = _project_filter_counts()
         context['variant_filter_counts'] = _variant_filter_counts()
+        object_status_counts = _dashboard_object_status_counts()
         context["dashboard_status_groups"] = {
             "individual": _dashboard_group_status_counts(
                 Individual,
@@ -746,7 +705,7 @@ class DashboardView(LoginRequiredMixin, TemplateView):
             ),
             "sample": _dashboard_group_status_counts(
                 Sample,
-                context["individual_filter_counts"].get("sample_status", {}),
+                object_status_counts["sample"],
             ),
             "project": _dashboard_group_status_counts(
                 Project,
@@ -758,15 +717,15 @@ class DashboardView(LoginRequiredMixin, TemplateView):
             ),
             "test": _dashboard_group_status_counts(
                 Test,
-                context["individual_filter_counts"].get("test_status", {}),
+                object_status_counts["test"],
             ),
             "pipeline": _dashboard_group_status_counts(
                 Pipeline,
-                context["individual_filter_counts"].get("pipeline_status", {}),
+                object_status_counts["pipeline"],
             ),
             "analysis": _dashboard_group_status_counts(
                 Analysis,
-                context["individual_filter_counts"].get("analysis_status", {}),
+                object_status_counts["analysis"],
             ),
         }
 
@@ -843,7 +802,7 @@ class DashboardView(LoginRequiredMixin, TemplateView):
         
         return context
 
-class IndividualListView(LoginRequiredMixin, SingleTableMixin, FilterView):
+class IndividualListView(LoginRequiredMixin, CursorPaginationMixin, SingleTableMixin, FilterView):
     model = Individual
     table_class = IndividualTable
     filterset_class = IndividualFilter
@@ -866,96 +825,51 @@ class IndividualListView(LoginRequiredMixin, SingleTableMixin, FilterView):
     def _individual_queryset(self, prefetch_for_table):
         """
         Base queryset for individual filtering and table hydration.
-        Annotates first_institution_name so the Institution column can be sorted.
+        Annotates first_institution_name and last_activity from IndividualSummary
+        so those columns can be sorted.
         """
         qs = super().get_queryset()
         if prefetch_for_table:
+            # Row badges are materialized in IndividualRowStatus (see
+            # lab.row_status), so one prefetch replaces the workflow walk.
             qs = qs.prefetch_related(
                 "cross_ids__id_type",
                 "institution",
-                "statuses",
-                "statuses__connected_classes",
-                "projects__statuses",
-                "projects__statuses__connected_classes",
-                "projects__tasks__statuses",
-                "projects__tasks__statuses__connected_classes",
-                "tasks__statuses",
-                "tasks__statuses__connected_classes",
-                "samples__statuses",
-                "samples__statuses__connected_classes",
-                "samples__tasks__statuses",
-                "samples__tasks__statuses__connected_classes",
-                "samples__tests__statuses",
-                "samples__tests__statuses__connected_classes",
-                "samples__tests__tasks__statuses",
-                "samples__tests__tasks__statuses__connected_classes",
-                "samples__tests__pipelines__statuses",
-                "samples__tests__pipelines__statuses__connected_classes",
-                "samples__tests__pipelines__tasks__statuses",
-                "samples__tests__pipelines__tasks__statuses__connected_classes",
-                "samples__tests__pipelines__analyses__statuses",
-                "samples__tests__pipelines__analyses__statuses__connected_classes",
-                "samples__tests__pipelines__analyses__tasks__statuses",
-                "samples__tests__pipelines__analyses__tasks__statuses__connected_classes",
-                "samples__tests__pipelines__analyses__reports__statuses",
-                "samples__tests__pipelines__analyses__reports__statuses__connected_classes",
-                "variants__statuses",
-                "variants__statuses__connected_classes",
+                "row_statuses__status",
             )
 
-        # Per-individual aggregate timestamps for related objects that belong
-        # exclusively to a single Individual (no shared multi-individual models).
-        # We rely on domain timestamps rather than history tables so everything
-        # can be expressed as ORM joins.
-        qs = qs.annotate(
-            first_institution_name=Min("institution__name"),
-            individual_created_at=Max("created_at"),
-            sample_last_date=Max("samples__receipt_date"),
-            test_last_date=Max("samples__tests__performed_date"),
-            pipeline_last_date=Max("samples__tests__pipelines__performed_date"),
-            analysis_last_date=Max(
-                "samples__tests__pipelines__analyses__performed_date"
-            ),
-            variant_last_dt=Max("variants__created_at"),
-            report_last_dt=Max("samples__tests__pipelines__analyses__reports__created_at"),
-        )
-
-        # Last activity: pick the most downstream non-null timestamp in the
-        # workflow order (Report -> Variant -> Analysis -> Pipeline -> Test
-        # -> Sample -> Individual created). This avoids backend-specific
-        # issues with Greatest across mixed date/datetime fields while still
-        # giving a meaningful "last touched" value.
+        # Sort keys come from the denormalized IndividualSummary row (see
+        # lab.individual_summary) rather than aggregates over the workflow
+        # tree, so ordering is a one-to-one join on an indexed column.
         qs = qs.annotate(
-            last_activity=Coalesce(
-                "report_last_dt",
-                "variant_last_dt",
-                Cast("analysis_last_date", output_field=DateTimeField()),
-                Cast("pipeline_last_date", output_field=DateTimeField()),
-                Cast("test_last_date", output_field=DateTimeField()),
-                Cast("sample_last_date", output_field=DateTimeField()),
-                "individual_created_at",
-            )
+            first_institution_name=F("summary__first_institution_name"),
+            last_activity=F("summary__last_activity"),
         )
 
         return qs.order_by("-last_activity", "-id")
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['total_count'] = self.model.objects.count()
+        context['total_count'] = cached_count(self.model.objects.all())
         context['status_metadata'] = build_status_metadata_by_model()
+        context['export_formats'] = ExportJob.FORMAT_CHOICES
         
-        # Filter counts are needed whenever the full page/sidebar renders.
-        # Skip them only for HTMX requests that swap just the table container.
-        if not self.request.htmx or self.request.headers.get("HX-Target") != "individual-table-container":
-            context['filter_counts'] = _individual_filter_counts()
-        else:
-            context['filter_counts'] = {}
-
         # Get filtered queryset to calculate distinct families
         if 'filter' in context:
             qs = context['filter'].qs
         else:
             qs = self.get_queryset()
+
+        # Sidebar counts follow the current result set. Table swaps carry
+        # them out of band so the sidebar updates in the same round trip;
+        # only infinite-scroll row appends skip them.
+        table_swap = self.request.headers.get("HX-Target") == "individual-table-container"
+        if self.request.htmx and not table_swap and self.request.GET.get("page"):
+            context['filter_counts'] = {}
+        else:
+            context['filter_counts'] = _individual_filter_counts(qs)
+            if self.request.htmx and table_swap:
+                context['filter_count_updates'] = _filter_count_updates(context['filter_counts'])
         
         # Count distinct non-null families the filtered individuals belong to
         context['family_count'] = qs.exclude(family__isnull=True).values('family').distinct().count()
@@ -997,7 +911,7 @@ class IndividualListView(LoginRequiredMixin, SingleTableMixin, FilterView):
             
         return ["lab/individual_list.html"]
 
-class ProjectListView(LoginRequiredMixin, SingleTableMixin, FilterView):
+class ProjectListView(LoginRequiredMixin, CursorPaginationMixin, SingleTableMixin, FilterView):
     model = Project
     table_class = ProjectTable
     filterset_class = ProjectFilter
@@ -1015,7 +929,7 @@ class ProjectListView(LoginRequiredMixin, SingleTableMixin, FilterView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['total_count'] = self.model.objects.count()
+        context['total_count'] = cached_count(self.model.objects.all())
         context['status_metadata'] = build_status_metadata_by_model()
 
         # Filter counts are needed whenever the full page/sidebar renders.
@@ -1042,7 +956,7 @@ class ProjectListView(LoginRequiredMixin, SingleTableMixin, FilterView):
         return ["lab/project_list.html"]
 
 
-class VariantListView(LoginRequiredMixin, SingleTableMixin, FilterView):
+class VariantListView(LoginRequiredMixin, CursorPaginationMixin, SingleTableMixin, FilterView):
     model = Variant
     table_class = VariantTable
     filterset_class = VariantFilter
@@ -1054,8 +968,9 @@ class VariantListView(LoginRequiredMixin, SingleTableMixin, FilterView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["total_count"] = self.model.objects.count()
+        context["total_count"] = cached_count(self.model.objects.all())
         context["status_metadata"] = build_status_metadata_by_model()
+        context["export_formats"] = ExportJob.FORMAT_CHOICES
 
         # Filter counts are needed whenever the full page/sidebar renders.
         # Skip them only for HTMX requests that swap just the table container.
@@ -1150,7 +1065,7 @@ class MapVisualizationView(LoginRequiredMixin, TemplateView):
         context["city_totals"] = city_totals
         context["filter"] = filterset
         context["status_metadata"] = build_status_metadata_by_model()
-        context["filter_counts"] = _individual_filter_counts()
+        context["filter_counts"] = _individual_filter_counts(filterset.qs if filterset.is_bound else None)
         hpo_term_ids = self.request.GET.getlist("hpo_terms")
         if hpo_term_ids:
             from ontologies.models import Term
@@ -1166,62 +1081,120 @@ class MapVisualizationView(LoginRequiredMixin, TemplateView):
 from django.views.generic import ListView, DetailView
 from django.db.models import Q
 from ontologies.models import Term
+from ontologies.utils import get_hpo_tree_level, propagate_hpo_counts
 
 
-def _normalize_hpo_identifier(value):
-    digits = re.sub(r"\D", "", value or "")
-    if not digits:
-        return ""
-    return digits.zfill(7)
-
-
-def _best_hpo_match(query):
-    query = (query or "").strip()
-    if not query:
-        return None
-
-    code_match = re.search(r"(?i)\bHP\s*:?\s*(\d{4,7})\b", query)
-    if code_match:
-        identifier = _normalize_hpo_identifier(code_match.group(1))
-        exact_code_match = Term.objects.filter(ontology__type=1, identifier=identifier).first()
-        if exact_code_match:
-            return exact_code_match
-
-    text_query = re.sub(r"(?i)\bHP\s*:?\s*\d{4,7}\b", " ", query).strip()
-    text_query = re.sub(r"\s+", " ", text_query)
-    identifier_query = _normalize_hpo_identifier(query)
-
-    qs = Term.objects.filter(ontology__type=1)
-    search_fields = ["label", "identifier"] if identifier_query else ["label"]
-    return order_by_normalized_relevance(
-        filter_normalized_contains(qs, search_fields, text_query or query),
-        search_fields,
-        text_query or query,
-    ).first()
+HPO_BULK_SPLIT_RE = re.compile(r"[,;\n]+")
+HPO_BULK_CANDIDATES = 5
+# Identifier, exact and contains matches are added directly; anything looser
+# (all words scattered, typo tolerance) is left for the user to confirm.
+HPO_BULK_ACCEPT_MATCH_CLASS = MATCH_SUBSTRING
 
 
 @login_required
 def hpo_bulk_match(request):
-    raw_query = request.GET.get("q", "")
-    chunks = [chunk.strip() for chunk in raw_query.split(",") if chunk.strip()]
+    """
+    Resolve a pasted phenotype list (comma, semicolon or newline separated)
+    against the HPO index in one request.
+
+    `results` keeps the best term per chunk (deduplicated) when it matched
+    by code or contains the chunk; `matches` lists ranked candidates with
+    confidence per chunk and `unmatched` the chunks that still need a
+    decision (no hit, or only approximate ones).
+    """
+    raw_query = request.POST.get("q") if request.method == "POST" else request.GET.get("q", "")
+    chunks = [chunk.strip() for chunk in HPO_BULK_SPLIT_RE.split(raw_query or "") if chunk.strip()]
     results = []
+    matches = []
+    unmatched = []
     seen_ids = set()
 
-    for chunk in chunks:
-        term = _best_hpo_match(chunk)
-        if not term or term.pk in seen_ids:
+    hits_per_chunk = get_hpo_term_index().search_many(chunks, limit=HPO_BULK_CANDIDATES) if chunks else []
+    for chunk, hits in zip(chunks, hits_per_chunk):
+        candidates = [
+            {
+                "id": hit.pk,
+                "label": hit.label,
+                "code": f"HP:{hit.identifier}",
+                "confidence": hit.confidence,
+                "matched_synonym": hit.matched_name,
+            }
+            for hit in hits
+        ]
+        matches.append({"query": chunk, "candidates": candidates})
+        if not hits or hits[0].match_class > HPO_BULK_ACCEPT_MATCH_CLASS:
+            unmatched.append(chunk)
+            continue
+        best = candidates[0]
+        if best["id"] in seen_ids:
             continue
-        seen_ids.add(term.pk)
+        seen_ids.add(best["id"])
         results.append(
             {
-                "id": term.pk,
-                "label": term.label,
-                "code": term.term,
+                "id": best["id"],
+                "label": best["label"],
+                "code": best["code"],
                 "query": chunk,
+                "confidence": best["confidence"],
             }
         )
 
-    return JsonResponse({"results": results})
+    return JsonResponse({"results": results, "matches": matches, "unmatched": unmatched})
+
+
+HPO_TREE_CACHE_KEY = "hpo_tree_structure"  # dropped by lab.signals on hpo_terms changes
+HPO_TREE_CACHE_TTL = 60 * 60
+
+
+def _hpo_tree_counts():
+    node_counts = cache.get(HPO_TREE_CACHE_KEY)
+    if node_counts is None:
+        term_members = defaultdict(set)
+        links = Individual.hpo_terms.through.objects.values_list("individual_id", "term__identifier")
+        for individual_id, identifier in links.iterator(chunk_size=5000):
+            term_members[f"HP:{identifier}"].add(individual_id)
+        node_counts = propagate_hpo_counts(term_members)
+        cache.set(HPO_TREE_CACHE_KEY, node_counts, HPO_TREE_CACHE_TTL)
+    return node_counts
+
+
+@login_required
+def hpo_tree_children(request):
+    """One level of the cohort HPO tree; `node` is the OBO ID being expanded (roots if absent)."""
+    nodes = get_hpo_tree_level(_hpo_tree_counts(), parent=request.GET.get("node") or None)
+    return render(request, "lab/partials/hpo_tree_level.html", {"nodes": nodes})
+
+
+def _visible_projects():
+    """Projects a signed-in user may open; shared by the project page and project-scoped views."""
+    return Project.objects.all()
+
+
+@login_required
+def hpo_enrichment(request):
+    """
+    HPO terms over-represented in a cohort compared with the rest of the database.
+    The cohort is a project (`?project=<pk>`) or the individual list's current filters.
+    """
+    project_pk = request.GET.get("project")
+    if project_pk:
+        try:
+            project_pk = int(project_pk)
+        except ValueError:
+            return HttpResponseBadRequest("Invalid project id.")
+        cohort = get_object_or_404(_visible_projects(), pk=project_pk).individuals.all()
+    else:
+        cohort = IndividualFilter(request.GET, queryset=Individual.objects.all(), request=request).qs
+    rows = cohort_enrichment(cohort.values_list("pk", flat=True).distinct())
+    return render(
+        request,
+        "lab/partials/hpo_enrichment.html",
+        {
+            "rows": rows,
+            "cohort_size": rows[0]["cohort_size"] if rows else 0,
+            "background_size": rows[0]["background_size"] if rows else 0,
+        },
+    )
 
 
 class HPOTermSearchView(LoginRequiredMixin, ListView):
@@ -1250,31 +1223,24 @@ class HPOTermSearchView(LoginRequiredMixin, ListView):
         if not query:
             return Term.objects.none()
 
-        # Base filter
-        identifier_query = re.sub(r'(?i)^HP\s*:?\s*', '', query).strip()
-        qs = Term.objects.filter(ontology__type=1) # HPO Only
-        qs = filter_normalized_contains(qs, ["label", "identifier"], query)
-        if identifier_query and normalize_search_text(identifier_query) != normalize_search_text(query):
-            qs = qs | filter_normalized_contains(
-                Term.objects.filter(ontology__type=1),
-                ["identifier"],
-                identifier_query,
-            )
-        
         # Exclude already selected terms
-        selected_term_ids = self.request.GET.getlist("hpo_terms")
-        if selected_term_ids:
-            qs = qs.exclude(pk__in=selected_term_ids)
+        excluded_term_ids = set()
+        for term_id in self.request.GET.getlist("hpo_terms"):
+            try:
+                excluded_term_ids.add(int(term_id))
+            except (TypeError, ValueError):
+                continue
 
         individual_id = self.request.GET.get('individual_id')
         if individual_id:
             try:
                 individual = Individual.objects.get(pk=individual_id)
-                qs = qs.exclude(pk__in=individual.hpo_terms.all())
-            except Individual.DoesNotExist:
+                excluded_term_ids.update(individual.hpo_terms.values_list("pk", flat=True))
+            except (Individual.DoesNotExist, ValueError):
                 pass
 
-        return order_by_normalized_relevance(qs.distinct(), ["label", "identifier"], query)
+        # HPO only; ranked by the in-memory label/synonym index
+        return SearchResults(get_hpo_term_index().search(query, exclude_pks=excluded_term_ids))
 
 
 class RenderSelectedHPOTermView(LoginRequiredMixin, DetailView):
@@ -1305,7 +1271,7 @@ class ProjectDetailView(LoginRequiredMixin, DetailView):
     context_object_name = "project"
 
     def get_queryset(self):
-        return Project.objects.prefetch_related(
+        return _visible_projects().prefetch_related(
             'individuals',
             'individuals__cross_ids__id_type',
             'individuals__statuses',
@@ -1438,6 +1404,9 @@ class IndividualDetailView(LoginRequiredMixin, DetailView):
                 return render(self.request, "lab/partials/tabs/_history.html", context)
             elif partial_name == "workflow":
                 return render(self.request, "lab/partials/tabs/_workflow.html", context)
+            elif partial_name == "similar":
+                context["similar_individuals"] = similar_individuals(self.object, method="lin")
+                return render(self.request, "lab/partials/tabs/_phenotype.html#similar", context)
             elif partial_name in ["phenotype", "hpo_card"]:
                 # Phenotype tab is in _phenotype.html
                 target = f"lab/partials/tabs/_phenotype.html#{partial_name}" if partial_name != "phenotype" else "lab/partials/tabs/_phenotype.html"
@@ -1703,165 +1672,61 @@ class ReopenTaskView(LoginRequiredMixin, TemplateView):
             return HttpResponse("")
         return redirect("lab:task_detail", pk=pk)
 
-import csv
+from django.http import StreamingHttpResponse
 from django.views import View
+from .individual_export import individual_export_csv
 
 class IndividualExportView(LoginRequiredMixin, View):
     def get(self, request, *args, **kwargs):
-        # 1. Apply Filters (Same as List View)
-        qs = Individual.objects.all().prefetch_related(
-            'samples', 'samples__tests', 'cross_ids', 'hpo_terms',
-            'institution', 'physicians', 'projects', 'family',
-             'samples__isolation_by', 'samples__tests__test_type'
-        )
-        filter = IndividualFilter(request.GET, queryset=qs)
-        filtered_qs = filter.qs.distinct()
-
-        # 2. Prepare Response
-        response = HttpResponse(content_type='text/csv')
+        # Same filters as the list view; rows are streamed in chunks (see individual_export).
+        filterset = IndividualFilter(request.GET, queryset=Individual.objects.all())
+        response = StreamingHttpResponse(individual_export_csv(filterset.qs, request.user), content_type='text/csv')
         filename = f"individuals_export_{timezone.now().strftime('%Y%m%d_%H%M')}.csv"
         response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
 
-        writer = csv.writer(response)
-        
-        # 3. Write Header
-        header = [
-            # IDs
-            "Primary ID", "Secondary ID", "Ad-Soyad", "TC Kimlik No", "Other IDs",
-            # Demographics
-            "Doğum Tarihi", "Cinsiyet", "Durum", # Status
-            # Clinical
-            "ICD11", "HPO kodları", "Tanı", "Geliş Tarihi", "Kurum Notları", 
-            
-            # Relations
-            "Gönderen Kurum/Birim", "Klinisyen & İletişim Bilgileri", "Konsey Tarihi", "Takip Notları", "Genel Notlar/Sonuçlar",
-            
-            # Sample & Test (Flattened)
-            "Örnek Tipi", "Örnek Notları", "İzolasyonu yapan", "Örnek gön.& OD değ.", # Sample Measurements
-            "Çalışılan Test Adı", "Test Notları", "Çalışılma Tarihi", "Hiz.Alım.Gön. Tarihi", "Data Geliş tarihi",
-            
-            # Projects
-            "Projeler"
-        ]
-        # BOM for Excel compatibility with UTF-8
-        response.write(u'\ufeff'.encode('utf8'))
-        writer.writerow(header)
-
-        # 4. Write Rows — ONE row per individual, aggregated sample/test data
-        for individual in filtered_qs:
-            # Base Individual Data
-            primary_id = individual.primary_id
-            secondary_id = individual.secondary_id
-            
-            # Other IDs
-            other_ids_list = [
-                f"{x.id_type.name}:{x.id_value}" 
-                for x in individual.cross_ids.all() 
-                if x.id_type.use_priority not in [1, 2]
-            ]
-            other_ids = "; ".join(other_ids_list)
-            
-            name = individual.full_name
-            
-            if not request.user.has_perm("lab.view_sensitive_data"):
-                name = "*****"
-                tc = "*****"
-            else:
-                tc = str(individual.tc_identity) if individual.tc_identity else ""
-            
-            dob = individual.birth_date
-            sex = individual.get_sex_display() if individual.sex else ""
-            status = ", ".join(individual.statuses.values_list("name", flat=True))
-            
-            icd11 = individual.icd11_code or ""
-            hpo = "; ".join([t.identifier for t in individual.hpo_terms.all()])
-            diagnosis = individual.diagnosis or ""
-            council_date = individual.council_date or ""
-            
-            # Notes
-            general_notes = " | ".join([n.content for n in individual.notes.all()])
-            
-            institution_display = DEFAULT_INSTITUTION_DISPLAY
-            if self.request.user.is_authenticated and hasattr(self.request.user, "profile"):
-                institution_display = normalize_institution_display(
-                    (self.request.user.profile.display_preferences or {}).get(
-                        "institution_display",
-                        DEFAULT_INSTITUTION_DISPLAY,
-                    )
-                )
-            institution_names = "; ".join(
-                [
-                    institution_display_name(institution, institution_display)
-                    for institution in individual.institution.all()
-                ]
-            )
-            physicians = "; ".join(
-                [
-                    contact.full_name or str(contact)
-                    for contact in individual.physicians.all()
-                ]
-            )
-            projects = "; ".join([p.name for p in individual.projects.all()])
-
-            # Aggregate Sample data
-            samples = individual.samples.all()
-            receipt_dates = []
-            sample_types = []
-            sample_notes_list = []
-            isolation_by_list = []
-            measurements_list = []
-            
-            # Aggregate Test data
-            test_names = []
-            test_notes_list = []
-            test_dates = []
-            service_dates = []
-            data_dates = []
-            
-            for sample in samples:
-                if sample.receipt_date:
-                    receipt_dates.append(str(sample.receipt_date))
-                if sample.sample_type:
-                    sample_types.append(sample.sample_type.name)
-                s_notes = " | ".join([n.content for n in sample.notes.all()])
-                if s_notes:
-                    sample_notes_list.append(s_notes)
-                if sample.isolation_by:
-                    iso_name = sample.isolation_by.full_name or str(sample.isolation_by)
-                    isolation_by_list.append(iso_name)
-                if sample.sample_measurements:
-                    measurements_list.append(sample.sample_measurements)
-                    
-                for test in sample.tests.all():
-                    if test.test_type:
-                        test_names.append(test.test_type.name)
-                    t_notes = " | ".join([n.content for n in test.notes.all()])
-                    if t_notes:
-                        test_notes_list.append(t_notes)
-                    if test.performed_date:
-                        test_dates.append(str(test.performed_date))
-                    if test.service_send_date:
-                        service_dates.append(str(test.service_send_date))
-                    if test.data_receipt_date:
-                        data_dates.append(str(test.data_receipt_date))
-
-            row = [
-                primary_id, secondary_id, name, tc, other_ids,
-                dob, sex, status,
-                icd11, hpo, diagnosis,
-                "; ".join(receipt_dates) if receipt_dates else (individual.created_at.date() if individual.created_at else ""),
-                "",  # Kurum Notları
-                institution_names, physicians, council_date, "",  # Takip Notları
-                general_notes,
-                "; ".join(sample_types), "; ".join(sample_notes_list),
-                "; ".join(isolation_by_list), "; ".join(measurements_list),
-                "; ".join(test_names), "; ".join(test_notes_list),
-                "; ".join(test_dates), "; ".join(service_dates), "; ".join(data_dates),
-                projects
-            ]
-            writer.writerow(row)
 
-        return response
+from pathlib import Path
+from django.db import transaction
+from django.http import FileResponse, Http404
+from django.views.decorators.http import require_POST
+from .export_jobs import EXPORT_SOURCES
+from .tasks import run_export_job
+
+
+@login_required
+@require_POST
+def export_job_create(request, kind):
+    """
+    Start a background export of the individual or variant list. The POST
+    carries the list's filter form plus `format`; the response is the job's
+    progress partial, which polls until the file is ready.
+    """
+    if kind not in EXPORT_SOURCES:
+        raise Http404("Unknown export.")
+    query = request.POST.copy()
+    query.pop("csrfmiddlewaretoken", None)
+    export_format = query.pop("format", ["csv"])[-1]
+    if export_format not in dict(ExportJob.FORMAT_CHOICES):
+        export_format = "csv"
+
+    job = ExportJob.objects.create(user=request.user, kind=kind, format=export_format, query=query.urlencode())
+    transaction.on_commit(lambda: run_export_job.enqueue(job_id=job.pk))
+    return render(request, "lab/partials/export_job_status.html", {"job": job})
+
+
+@login_required
+def export_job_status(request, pk):
+    job = get_object_or_404(ExportJob, pk=pk, user=request.user)
+    return render(request, "lab/partials/export_job_status.html", {"job": job})
+
+
+@login_required
+def export_job_download(request, pk):
+    job = get_object_or_404(ExportJob, pk=pk, user=request.user)
+    if job.status != "done" or not job.file:
+        raise Http404("Export is not ready.")
+    return FileResponse(job.file.open("rb"), as_attachment=True, filename=Path(job.file.name).name)
 
 
 @login_required
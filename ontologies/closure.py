@@ -0,0 +1,148 @@
+"""
+Materialized is_a closure for ontology versions.
+
+`TermClosure` holds one row per (ancestor, descendant) pair of an ontology
+version, so descendant-aware lookups become an indexed subquery instead of a
+networkx walk followed by a huge `IN (...)` parameter list.
+"""
+import logging
+from collections import defaultdict, deque
+
+from django.db import transaction
+
+from .models import Relationship, Term, TermClosure
+
+logger = logging.getLogger(__name__)
+
+IS_A_LABEL = 'is_a'
+CLOSURE_BATCH_SIZE = 5000
+
+
+def _is_a_parents(ontology):
+    """Return {term_pk: [parent_pk, ...]} for the is_a edges of an ontology."""
+    parents = defaultdict(list)
+    edges = (
+        Relationship.objects.filter(term__ontology=ontology, type__label=IS_A_LABEL)
+        .values_list('term_id', 'related_term_id')
+    )
+    for term_id, parent_id in edges.iterator(chunk_size=5000):
+        if term_id != parent_id:
+            parents[term_id].append(parent_id)
+    return parents
+
+
+def _topological_order(term_ids, parents):
+    """Parents-first order of term_ids; terms caught in a cycle are appended last."""
+    children = defaultdict(list)
+    pending = {}
+    for term_id in term_ids:
+        term_parents = [p for p in parents.get(term_id, ()) if p in term_ids]
+        pending[term_id] = len(term_parents)
+        for parent_id in term_parents:
+            children[parent_id].append(term_id)
+
+    queue = deque(term_id for term_id, count in pending.items() if count == 0)
+    order = []
+    while queue:
+        term_id = queue.popleft()
+        order.append(term_id)
+        for child_id in children[term_id]:
+            pending[child_id] -= 1
+            if pending[child_id] == 0:
+                queue.append(child_id)
+
+    if len(order) < len(term_ids):
+        placed = set(order)
+        leftover = [term_id for term_id in term_ids if term_id not in placed]
+        logger.warning('is_a cycle detected; %s terms closed on a best-effort basis', len(leftover))
+        order.extend(leftover)
+    return order
+
+
+def compute_closure(term_ids, parents):
+    """
+    Yield (ancestor_pk, descendant_pk, depth) for every term, self pair included.
+
+    Depth is the shortest is_a distance between the two terms.
+    """
+    term_ids = set(term_ids)
+    ancestors = {}
+    for term_id in _topological_order(term_ids, parents):
+        term_ancestors = {term_id: 0}
+        for parent_id in parents.get(term_id, ()):
+            for ancestor_id, depth in ancestors.get(parent_id, {parent_id: 0}).items():
+                if ancestor_id not in term_ancestors or term_ancestors[ancestor_id] > depth + 1:
+                    term_ancestors[ancestor_id] = depth + 1
+        ancestors[term_id] = term_ancestors
+        for ancestor_id, depth in term_ancestors.items():
+            yield ancestor_id, term_id, depth
+
+
+def _write_closure_rows(ontology, rows):
+    batch = []
+    written = 0
+    for ancestor_id, descendant_id, depth in rows:
+        batch.append(TermClosure(
+            ontology=ontology,
+            ancestor_id=ancestor_id,
+            descendant_id=descendant_id,
+            depth=depth,
+        ))
+        if len(batch) >= CLOSURE_BATCH_SIZE:
+            TermClosure.objects.bulk_create(batch)
+            written += len(batch)
+            batch = []
+    if batch:
+        TermClosure.objects.bulk_create(batch)
+        written += len(batch)
+    return written
+
+
+def rebuild_term_closure(ontology):
+    """Replace the closure rows of an ontology version. Returns the row count."""
+    term_ids = list(Term.objects.filter(ontology=ontology).values_list('id', flat=True))
+    parents = _is_a_parents(ontology)
+    with transaction.atomic():
+        TermClosure.objects.filter(ontology=ontology).delete()
+        return _write_closure_rows(ontology, compute_closure(term_ids, parents))
+
+
+def _below(term_ids, parents):
+    """term_ids plus every term beneath them in the is_a graph described by `parents`."""
+    children = defaultdict(list)
+    for term_id, term_parents in parents.items():
+        for parent_id in term_parents:
+            children[parent_id].append(term_id)
+    found = set(term_ids)
+    queue = deque(found)
+    while queue:
+        for child_id in children[queue.popleft()]:
+            if child_id not in found:
+                found.add(child_id)
+                queue.append(child_id)
+    return found
+
+
+def refresh_term_closure(ontology, term_ids):
+    """
+    Recompute the closure rows of term_ids and of every term below them.
+
+    Used after an incremental sync changed the is_a edges of a few terms; the
+    rest of the closure is left untouched. Returns the refreshed term PKs.
+    """
+    if not term_ids:
+        return set()
+    parents = _is_a_parents(ontology)
+    affected = _below(term_ids, parents)
+    all_term_ids = Term.objects.filter(ontology=ontology).values_list('id', flat=True)
+    rows = (row for row in compute_closure(all_term_ids, parents) if row[1] in affected)
+
+    affected_list = list(affected)
+    with transaction.atomic():
+        for start in range(0, len(affected_list), 500):
+            TermClosure.objects.filter(
+                ontology=ontology,
+                descendant_id__in=affected_list[start:start + 500],
+            ).delete()
+        _write_closure_rows(ontology, rows)
+    return affected
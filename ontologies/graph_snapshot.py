@@ -0,0 +1,242 @@
+"""
+Compiled, memory-mappable HPO graph.
+
+`sync_ontology` writes the is_a graph once as a handful of `.npy` arrays
+(sorted node ids, a UTF-8 label blob and CSR adjacency in both directions).
+Web workers `np.load(..., mmap_mode='r')` them, so every gunicorn worker shares
+the same page-cache copy and none of them has to parse `hp.obo` or download it
+during a request.
+
+Snapshots live in versioned sub-directories of a snapshot root; the `CURRENT`
+file names the active one and is swapped atomically.
+"""
+import os
+import shutil
+import time
+from functools import lru_cache
+
+import numpy as np
+
+SNAPSHOT_ARRAYS = (
+    'ids',
+    'label_offsets',
+    'label_blob',
+    'child_indptr',
+    'child_indices',
+    'parent_indptr',
+    'parent_indices',
+)
+CURRENT_FILENAME = 'CURRENT'
+KEEP_SNAPSHOTS = 2
+
+
+def _csr(num_nodes, sources, targets):
+    order = np.lexsort((targets, sources))
+    sources = sources[order]
+    targets = targets[order]
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.add.at(indptr, sources + 1, 1)
+    return np.cumsum(indptr), targets.astype(np.int32)
+
+
+def _gather(indptr, indices, nodes):
+    """All CSR neighbours of `nodes`, concatenated."""
+    starts = indptr[nodes]
+    lengths = indptr[nodes + 1] - starts
+    total = int(lengths.sum())
+    if not total:
+        return np.empty(0, dtype=indices.dtype)
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return indices[offsets + np.arange(total)]
+
+
+class HPOGraphSnapshot:
+    """Read-only is_a graph backed by numpy arrays (edges point parent -> child)."""
+
+    def __init__(self, arrays):
+        for name in SNAPSHOT_ARRAYS:
+            setattr(self, name, arrays[name])
+
+    @classmethod
+    def from_edges(cls, labels, edges):
+        """
+        Build a snapshot from {obo_id: label} and (parent_obo_id, child_obo_id) pairs.
+        Edge endpoints missing from `labels` are added with their id as label.
+        """
+        labels = dict(labels)
+        edges = [(str(parent), str(child)) for parent, child in edges if parent != child]
+        for parent, child in edges:
+            labels.setdefault(parent, parent)
+            labels.setdefault(child, child)
+
+        node_ids = sorted(labels)
+        width = max((len(node_id.encode('utf-8')) for node_id in node_ids), default=1)
+        ids = np.array([node_id.encode('utf-8') for node_id in node_ids], dtype=f'S{width}')
+        position = {node_id: index for index, node_id in enumerate(node_ids)}
+
+        encoded_labels = [str(labels[node_id] or node_id).encode('utf-8') for node_id in node_ids]
+        label_offsets = np.zeros(len(node_ids) + 1, dtype=np.int64)
+        label_offsets[1:] = np.cumsum([len(label) for label in encoded_labels])
+        label_blob = np.frombuffer(b''.join(encoded_labels), dtype=np.uint8)
+
+        parents = np.array([position[parent] for parent, _ in edges], dtype=np.int64)
+        children = np.array([position[child] for _, child in edges], dtype=np.int64)
+        child_indptr, child_indices = _csr(len(node_ids), parents, children)
+        parent_indptr, parent_indices = _csr(len(node_ids), children, parents)
+
+        return cls({
+            'ids': ids,
+            'label_offsets': label_offsets,
+            'label_blob': label_blob,
+            'child_indptr': child_indptr,
+            'child_indices': child_indices,
+            'parent_indptr': parent_indptr,
+            'parent_indices': parent_indices,
+        })
+
+    @classmethod
+    def from_networkx(cls, graph):
+        labels = {node: data.get('name', node) for node, data in graph.nodes(data=True)}
+        return cls.from_edges(labels, graph.edges())
+
+    @classmethod
+    def load(cls, directory):
+        return cls({
+            name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r')
+            for name in SNAPSHOT_ARRAYS
+        })
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        for name in SNAPSHOT_ARRAYS:
+            np.save(os.path.join(directory, f'{name}.npy'), np.asarray(getattr(self, name)))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, obo_id):
+        return self.index(obo_id) is not None
+
+    def index(self, obo_id):
+        key = str(obo_id).encode('utf-8')
+        if len(key) > self.ids.dtype.itemsize:
+            return None
+        position = int(np.searchsorted(self.ids, key))
+        if position < len(self.ids) and self.ids[position] == key:
+            return position
+        return None
+
+    def indices(self, obo_ids):
+        return np.array(
+            [index for index in (self.index(obo_id) for obo_id in obo_ids) if index is not None],
+            dtype=np.int64,
+        )
+
+    def obo_id(self, index):
+        return self.ids[index].decode('utf-8')
+
+    def obo_ids(self, indices):
+        return [self.ids[index].decode('utf-8') for index in indices]
+
+    def label_at(self, index):
+        start, end = self.label_offsets[index], self.label_offsets[index + 1]
+        return bytes(self.label_blob[start:end]).decode('utf-8')
+
+    def label(self, obo_id):
+        index = self.index(obo_id)
+        return self.label_at(index) if index is not None else obo_id
+
+    def children(self, obo_id):
+        index = self.index(obo_id)
+        if index is None:
+            return []
+        return self.obo_ids(self.child_indices[self.child_indptr[index]:self.child_indptr[index + 1]])
+
+    def parents(self, obo_id):
+        index = self.index(obo_id)
+        if index is None:
+            return []
+        return self.obo_ids(self.parent_indices[self.parent_indptr[index]:self.parent_indptr[index + 1]])
+
+    def child_count_at(self, index):
+        return int(self.child_indptr[index + 1] - self.child_indptr[index])
+
+    def reachable(self, start_indices, direction='down'):
+        """Indices reachable from start_indices (exclusive) following child or parent edges."""
+        if direction == 'down':
+            indptr, indices = self.child_indptr, self.child_indices
+        else:
+            indptr, indices = self.parent_indptr, self.parent_indices
+        start_indices = np.asarray(start_indices, dtype=np.int64)
+        visited = np.zeros(len(self.ids), dtype=bool)
+        frontier = start_indices
+        while frontier.size:
+            neighbours = _gather(indptr, indices, frontier)
+            neighbours = np.unique(neighbours[~visited[neighbours]])
+            visited[neighbours] = True
+            frontier = neighbours.astype(np.int64)
+        reached = np.flatnonzero(visited)
+        return reached[~np.isin(reached, start_indices)]
+
+    def descendants(self, obo_id):
+        index = self.index(obo_id)
+        if index is None:
+            return set()
+        return set(self.obo_ids(self.reachable([index], 'down')))
+
+    def ancestors(self, obo_id):
+        index = self.index(obo_id)
+        if index is None:
+            return set()
+        return set(self.obo_ids(self.reachable([index], 'up')))
+
+
+def write_snapshot(snapshot, root, version):
+    """Write `snapshot` under root/<version>-<timestamp>/ and make it CURRENT."""
+    os.makedirs(root, exist_ok=True)
+    safe_version = ''.join(char if char.isalnum() or char in '-_.' else '_' for char in str(version))
+    name = f'{safe_version}-{time.time_ns()}'
+    snapshot.save(os.path.join(root, name))
+
+    pointer_tmp = os.path.join(root, f'{CURRENT_FILENAME}.{os.getpid()}.tmp')
+    with open(pointer_tmp, 'w') as pointer:
+        pointer.write(name)
+    os.replace(pointer_tmp, os.path.join(root, CURRENT_FILENAME))
+
+    _prune_snapshots(root, keep=name)
+    return os.path.join(root, name)
+
+
+def _prune_snapshots(root, keep):
+    snapshots = sorted(
+        (entry for entry in os.scandir(root) if entry.is_dir()),
+        key=lambda entry: entry.stat().st_mtime,
+        reverse=True,
+    )
+    older = [entry for entry in snapshots if entry.name != keep]
+    # Workers may still have the previous snapshot mapped; keep it around.
+    for entry in older[KEEP_SNAPSHOTS - 1:]:
+        shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def current_snapshot_dir(root):
+    try:
+        with open(os.path.join(root, CURRENT_FILENAME)) as pointer:
+            name = pointer.read().strip()
+    except FileNotFoundError:
+        return None
+    directory = os.path.join(root, name)
+    return directory if name and os.path.isdir(directory) else None
+
+
+@lru_cache(maxsize=2)
+def _load_snapshot_dir(directory):
+    return HPOGraphSnapshot.load(directory)
+
+
+def load_current_snapshot(root):
+    """Memory-map the CURRENT snapshot under root, or return None if none was written."""
+    directory = current_snapshot_dir(root)
+    if directory is None:
+        return None
+    return _load_snapshot_dir(directory)
@@ -0,0 +1,20 @@
+from django.core.management import BaseCommand
+
+from ontologies.models import Ontology
+from ontologies.utils import HPO_ONTOLOGY_TYPE, HPO_SNAPSHOT_DIR, write_hpo_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Write the memory-mapped HPO graph snapshot from the latest synced HP version'
+
+    def handle(self, *args, **options):
+        ontology = Ontology.objects.filter(type=HPO_ONTOLOGY_TYPE).order_by('-id').first()
+        if ontology is None:
+            self.stdout.write(self.style.ERROR(
+                "No HP ontology loaded. Run: python manage.py sync_ontology --ontology=HP"
+            ))
+            return
+
+        self.stdout.write(f'Building HPO graph snapshot for {ontology}...')
+        snapshot_dir = write_hpo_snapshot(ontology)
+        self.stdout.write(self.style.SUCCESS(f'Snapshot written to {snapshot_dir} ({HPO_SNAPSHOT_DIR}/CURRENT updated)'))
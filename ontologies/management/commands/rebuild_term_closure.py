@@ -0,0 +1,31 @@
+from django.core.management import BaseCommand
+
+from ontologies.closure import rebuild_term_closure
+from ontologies.models import Ontology
+from ontologies.utils import bump_hpo_descendant_cache_version
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the materialized is_a closure (TermClosure) for loaded ontology versions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ontology',
+            dest='ontology',
+            choices=['HP', 'MONDO', 'ONCOTREE'],
+            help='Only rebuild versions of this ontology (default: all)',
+        )
+
+    def handle(self, *args, **options):
+        ontology_type_map = {'HP': 1, 'MONDO': 2, 'ONCOTREE': 3}
+        ontologies = Ontology.objects.order_by('type', 'id')
+        if options['ontology']:
+            ontologies = ontologies.filter(type=ontology_type_map[options['ontology']])
+
+        for ontology in ontologies:
+            self.stdout.write(f'Rebuilding closure for {ontology}...')
+            rows = rebuild_term_closure(ontology)
+            self.stdout.write(f'  {rows} closure rows')
+
+        bump_hpo_descendant_cache_version()
+        self.stdout.write(self.style.SUCCESS('Closure rebuild complete'))
@@ -1,9 +1,24 @@
 import logging
+import time
+from collections import defaultdict
 from django.core.management import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from ontologies.closure import IS_A_LABEL, rebuild_term_closure, refresh_term_closure
 from ontologies.models import Ontology, Term, Synonym, CrossReference, Relationship, RelationshipType
 
 logger = logging.getLogger(__name__)
 
+BULK_BATCH_SIZE = 5000
+DIFF_TERM_FIELDS = ['label', 'description', 'created_by', 'created', 'alternate_ids']
+
+
+def _stored_value(field, value):
+    """`value` as the Term field stores it (None and '' alike), so unchanged terms compare equal."""
+    value = Term._meta.get_field(field).to_python(value)
+    return '' if value is None else value
+
+
 class Command(BaseCommand):
     help = 'Sync ontology from online resource'
 
@@ -14,6 +29,11 @@ class Command(BaseCommand):
             choices=['HP', 'MONDO', 'ONCOTREE'],
             help='Ontology Source',
         )
+        parser.add_argument(
+            '--diff',
+            action='store_true',
+            help='Update the latest loaded version in place instead of importing a new copy',
+        )
 
     def handle(self, *args, **options):
         try:
@@ -68,188 +88,500 @@ class Command(BaseCommand):
         ontology_type_map = {'HP': 1, 'MONDO': 2, 'ONCOTREE': 3}
         ontology_type = ontology_type_map.get(options['ontology'])
         
-        # Get or create the ontology
-        ontology, created = Ontology.objects.get_or_create(
-            type=ontology_type,
-            label=version
-        )
+        if options['diff']:
+            current = Ontology.objects.filter(type=ontology_type).order_by('-id').first()
+            if current is not None:
+                if Ontology.objects.filter(type=ontology_type, label=version).exists():
+                    self.stdout.write(f'Version {version} already exists')
+                    return
+                self._diff_sync(data, current, version, options['ontology'])
+                return
+            self.stdout.write('No loaded version to diff against, importing in full')
 
-        if not created:
-            self.stdout.write(f'Version {version} already exists')
-            return
+        started = time.monotonic()
+        with transaction.atomic():
+            # Get or create the ontology
+            ontology, created = Ontology.objects.get_or_create(
+                type=ontology_type,
+                label=version
+            )
 
-        self.stdout.write(f'Adding version: {version}')
-        self.stdout.write('Adding terms...')
+            if not created:
+                self.stdout.write(f'Version {version} already exists')
+                return
+
+            self.stdout.write(f'Adding version: {version}')
+            loaded = self._bulk_load(data, ontology)
+
+            self.stdout.write('Building is_a closure...')
+            closure_rows = rebuild_term_closure(ontology)
+        elapsed = time.monotonic() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully imported {options["ontology"]} version {version}'
+        ))
 
-        # Store relationship data for later processing
-        relations = []
+        if options["ontology"] == "HP":
+            from ontologies.utils import bump_hpo_descendant_cache_version, write_hpo_snapshot
+            self.stdout.write('Writing HPO graph snapshot...')
+            snapshot_dir = write_hpo_snapshot(ontology)
+            self.stdout.write(f"Graph snapshot: {snapshot_dir}")
+            bump_hpo_descendant_cache_version()
         
-        # Create the is_a relationship type
-        is_a_relationship, _ = RelationshipType.objects.get_or_create(
-            label='is_a',
-            defaults={'slug': 'is-a'}
+        # Print some statistics
+        total_rows = sum(loaded.values()) + closure_rows
+        self.stdout.write(f"Terms created: {loaded['terms']}")
+        self.stdout.write(f"Synonyms created: {loaded['synonyms']}")
+        self.stdout.write(f"Cross-references created: {loaded['xrefs']}")
+        self.stdout.write(f"Relationship types: {RelationshipType.objects.count()}")
+        self.stdout.write(f"Relationships created: {loaded['relationships']}")
+        self.stdout.write(f"Closure rows created: {closure_rows}")
+        self.stdout.write(
+            f"Loaded {total_rows} rows in {elapsed:.1f}s "
+            f"({total_rows / max(elapsed, 0.001):.0f} rows/s, "
+            f"{loaded['terms'] / max(elapsed, 0.001):.0f} terms/s)"
         )
-        
-        # First pass: Create all terms
-        term_objects = {}  # Dictionary to store term objects by ID
+
+    def _bulk_load(self, data, ontology):
+        """
+        Stage every term, synonym, cross-reference and relationship of `data`
+        in memory and insert them with batched bulk_create calls.
+        Must run inside a transaction. Returns per-table row counts.
+        """
+        self.stdout.write('Adding terms...')
+        staged_terms = {}
+        staged_synonyms = {}
+        staged_xrefs = {}
         for term_id, term in data.items():
             try:
-                # Extract alternate IDs - adapt to current pronto API
-                alternate_ids = []
-                if hasattr(term, 'alternate_ids'):
-                    alternate_ids = term.alternate_ids
-                elif hasattr(term, 'other') and 'alt_id' in term.other:
-                    alternate_ids = term.other.get('alt_id', [])
-                
-                alt_ids_str = ",".join([
-                    str(self._extract_id(alt_term))
-                    for alt_term in alternate_ids
-                ])
-                
-                # Get created_by and creation_date - adapt to current pronto API
-                created_by = ""
-                created_date = ""
-                
-                if hasattr(term, 'created_by'):
-                    created_by = term.created_by
-                elif hasattr(term, 'other') and 'created_by' in term.other:
-                    created_by = term.other.get('created_by', [""])[0]
-                    
-                if hasattr(term, 'creation_date'):
-                    created_date = term.creation_date
-                elif hasattr(term, 'other') and 'creation_date' in term.other:
-                    created_date = term.other.get('creation_date', [""])[0]
-                
-                # Get description from different possible attributes
-                description = ""
-                if hasattr(term, 'definition') and term.definition:
-                    description = term.definition.value if hasattr(term.definition, 'value') else str(term.definition)
-                elif hasattr(term, 'desc') and term.desc:
-                    description = term.desc
-                
-                # Create the term
-                term_obj = Term.objects.create(
-                    ontology=ontology,
-                    identifier=self._extract_id(term_id),
-                    label=term.name if hasattr(term, 'name') and term.name else "",
-                    description=description,
-                    created_by=created_by,
-                    created=created_date,
-                    alternate_ids=alt_ids_str
-                )
-                
-                # Store the term object for later relationship creation
-                term_objects[term_id] = term_obj
-                
-                # Create synonyms - adapt to current pronto API
-                if hasattr(term, 'synonyms'):
-                    for synonym in term.synonyms:
-                        if hasattr(synonym, 'scope') and hasattr(synonym, 'description'):
-                            Synonym.objects.create(
-                                term=term_obj,
-                                description=synonym.description,
-                                scope=self._get_scope_id(synonym.scope)
-                            )
-                        elif hasattr(synonym, 'scope') and hasattr(synonym, 'value'):
-                            Synonym.objects.create(
-                                term=term_obj,
-                                description=synonym.value,
-                                scope=self._get_scope_id(synonym.scope)
-                            )
-                
-                # Create cross references - adapt to current pronto API
-                xrefs = []
-                if hasattr(term, 'xrefs'):
-                    xrefs = term.xrefs
-                elif hasattr(term, 'other') and 'xref' in term.other:
-                    xrefs = term.other.get('xref', [])
-                
-                for xref in xrefs:
-                    xref_str = xref.id
-                    if ':' in xref_str:
-                        xref_data = xref_str.split(':', 1)
-                        
-                        # Skip malformed xrefs
-                        if len(xref_data) != 2 or xref_data[0].upper() == 'HTTP':
-                            logger.warning(f'CrossReference: {xref_str} format not supported!')
-                            continue
-                        
-                        CrossReference.objects.create(
-                            term=term_obj,
-                            source=xref_data[0],
-                            source_value=xref_data[1]
-                        )
-            
+                staged_terms[term_id] = Term(ontology=ontology, **self._term_fields(term_id, term))
+                staged_synonyms[term_id] = self._term_synonyms(term)
+                staged_xrefs[term_id] = self._term_xrefs(term)
             except Exception as e:
                 logger.error(f'Error processing term {term_id}: {str(e)}')
                 continue
-        
-        # Second pass: Create relationships
+
+        Term.objects.bulk_create(staged_terms.values(), batch_size=BULK_BATCH_SIZE)
+        term_pks = self._term_pk_map(ontology, staged_terms)
+
+        synonyms = [
+            Synonym(term_id=term_pks[term_id], description=description, scope=scope)
+            for term_id, rows in staged_synonyms.items() if term_id in term_pks
+            for description, scope in rows
+        ]
+        Synonym.objects.bulk_create(synonyms, batch_size=BULK_BATCH_SIZE)
+
+        xrefs = [
+            CrossReference(term_id=term_pks[term_id], source=source, source_value=source_value)
+            for term_id, rows in staged_xrefs.items() if term_id in term_pks
+            for source, source_value in rows
+        ]
+        CrossReference.objects.bulk_create(xrefs, batch_size=BULK_BATCH_SIZE)
+
         self.stdout.write('Building relationships...')
+        is_a_relationship, _ = RelationshipType.objects.get_or_create(
+            label='is_a',
+            defaults={'slug': 'is-a'}
+        )
+        relationship_types = {'is_a': is_a_relationship}
+        relationships = []
         for term_id, term in data.items():
+            if term_id not in term_pks:
+                continue
             try:
-                if term_id not in term_objects:
-                    continue
-                    
-                current_term = term_objects[term_id]
-                
-                # Add is_a relationships (superclasses)
-                for parent in term.superclasses(distance=1):
-                    if parent.id != term_id:  # Skip self-references
-                        if parent.id in term_objects:
-                            Relationship.objects.create(
-                                type=is_a_relationship,
-                                term=current_term,
-                                related_term=term_objects[parent.id]
-                            )
-                            # self.stdout.write(f"Added is_a relationship: {term_id} -> {parent.id}")
-                
-                # Add other relationships
-                if hasattr(term, 'relationships'):
-                    for rel_type, related_terms in term.relationships.items():
-                        rel_type_str = str(rel_type)
-                        if "Relationship('" in rel_type_str:
-                            rel_type_str = rel_type_str.replace("Relationship('", "").replace("')", "")
-                        
-                        # Skip is_a relationships as they're handled separately
-                        if rel_type_str.lower() == 'is_a':
-                            continue
-                            
-                        # Get or create relationship type
-                        rel_type_obj, _ = RelationshipType.objects.get_or_create(
-                            label=rel_type_str,
-                            defaults={'slug': rel_type_str.lower().replace(' ', '-')}
+                for rel_label, related_id in self._term_relations(term_id, term):
+                    if related_id not in term_pks:
+                        continue
+                    if rel_label not in relationship_types:
+                        relationship_types[rel_label], _ = RelationshipType.objects.get_or_create(
+                            label=rel_label,
+                            defaults={'slug': rel_label.lower().replace(' ', '-')}
                         )
-                        
-                        # Create relationships
-                        for related_term in related_terms:
-                            related_id = str(related_term.id) if hasattr(related_term, 'id') else str(related_term)
-                            if related_id in term_objects:
-                                Relationship.objects.create(
-                                    type=rel_type_obj,
-                                    term=current_term,
-                                    related_term=term_objects[related_id]
-                                )
-                                self.stdout.write(f"Added {rel_type_str} relationship: {term_id} -> {related_id}")
-            
+                    relationships.append(Relationship(
+                        type=relationship_types[rel_label],
+                        term_id=term_pks[term_id],
+                        related_term_id=term_pks[related_id],
+                    ))
             except Exception as e:
                 logger.error(f'Error processing relationships for term {term_id}: {str(e)}')
                 continue
-        
+        Relationship.objects.bulk_create(relationships, batch_size=BULK_BATCH_SIZE)
+
+        return {
+            'terms': len(term_pks),
+            'synonyms': len(synonyms),
+            'xrefs': len(xrefs),
+            'relationships': len(relationships),
+        }
+
+    def _diff_sync(self, data, ontology, version, ontology_name):
+        """Bring `ontology` up to `version` by writing only what changed."""
+        self.stdout.write(f'Diffing {ontology} against version {version}...')
+        started = time.monotonic()
+        with transaction.atomic():
+            stats, closure_roots = self._apply_diff(data, ontology)
+            refreshed = refresh_term_closure(ontology, closure_roots)
+            ontology.label = version
+            ontology.save(update_fields=['label', 'modified'])
+        elapsed = time.monotonic() - started
+
         self.stdout.write(self.style.SUCCESS(
-            f'Successfully imported {options["ontology"]} version {version}'
+            f'Successfully updated {ontology_name} to version {version}'
         ))
 
-        if options["ontology"] == "HP":
-            from ontologies.utils import bump_hpo_descendant_cache_version
-            bump_hpo_descendant_cache_version()
-        
-        # Print some statistics
-        self.stdout.write(f"Terms created: {Term.objects.filter(ontology=ontology).count()}")
-        self.stdout.write(f"Synonyms created: {Synonym.objects.filter(term__ontology=ontology).count()}")
-        self.stdout.write(f"Cross-references created: {CrossReference.objects.filter(term__ontology=ontology).count()}")
-        self.stdout.write(f"Relationship types: {RelationshipType.objects.count()}")
-        self.stdout.write(f"Relationships created: {Relationship.objects.filter(term__ontology=ontology).count()}")
+        if ontology_name == 'HP' and (refreshed or stats['terms_added'] or stats['terms_updated']):
+            from ontologies.utils import bump_hpo_descendant_cache_version, write_hpo_snapshot
+            self.stdout.write('Writing HPO graph snapshot...')
+            self.stdout.write(f"Graph snapshot: {write_hpo_snapshot(ontology)}")
+            if refreshed:
+                # Label-only releases keep cached descendant sets valid.
+                bump_hpo_descendant_cache_version()
+
+        for key, value in stats.items():
+            self.stdout.write(f"{key.replace('_', ' ').capitalize()}: {value}")
+        self.stdout.write(f"Closure rows refreshed for: {len(refreshed)} terms")
+        self.stdout.write(f"Diff applied in {elapsed:.1f}s")
+
+    def _apply_diff(self, data, ontology):
+        """
+        Apply the release in `data` onto the terms of `ontology`, matched by
+        pronto id (see _existing_terms). Returns (stats, term PKs whose is_a
+        parents changed).
+        """
+        staged = {}
+        for term_id, term in data.items():
+            try:
+                staged[term_id] = {
+                    'fields': self._term_fields(term_id, term),
+                    'alternate_ids': [str(alt_id).strip() for alt_id in self._term_alternate_ids(term)],
+                    'synonyms': set(self._term_synonyms(term)),
+                    'xrefs': set(self._term_xrefs(term)),
+                    'relations': set(self._term_relations(term_id, term)),
+                    'replaced_by': self._term_replaced_by(term),
+                }
+            except Exception as e:
+                logger.error(f'Error processing term {term_id}: {str(e)}')
+                continue
+
+        existing = self._existing_terms(ontology, staged)
+
+        # Terms
+        new_terms = {
+            term_id: Term(ontology=ontology, **entry['fields'])
+            for term_id, entry in staged.items()
+            if term_id not in existing
+        }
+        Term.objects.bulk_create(new_terms.values(), batch_size=BULK_BATCH_SIZE)
+        changed_terms = []
+        now = timezone.now()
+        for term_id, entry in staged.items():
+            term = existing.get(term_id)
+            if term is None:
+                continue
+            changed = False
+            for field in DIFF_TERM_FIELDS:
+                value = _stored_value(field, entry['fields'][field])
+                if _stored_value(field, getattr(term, field)) != value:
+                    setattr(term, field, value)
+                    changed = True
+            if changed:
+                # bulk_update skips auto_now, so the timestamp is set here.
+                term.modified = now
+                changed_terms.append(term)
+        Term.objects.bulk_update(changed_terms, DIFF_TERM_FIELDS + ['modified'], batch_size=BULK_BATCH_SIZE)
+
+        term_pks = {term_id: term.pk for term_id, term in existing.items()}
+        term_pks.update(self._term_pk_map(ontology, new_terms))
+
+        # Synonyms and cross-references are replaced per term when their set differs
+        synonyms_replaced = self._replace_term_rows(
+            Synonym, ('description', 'scope'), ontology, staged, 'synonyms', term_pks,
+        )
+        xrefs_replaced = self._replace_term_rows(
+            CrossReference, ('source', 'source_value'), ontology, staged, 'xrefs', term_pks,
+        )
+
+        # Relationships
+        current_edges = {
+            (term_id, related_id, label): pk
+            for pk, term_id, related_id, label in Relationship.objects.filter(
+                term__ontology=ontology
+            ).values_list('id', 'term_id', 'related_term_id', 'type__label')
+        }
+        incoming_edges = {
+            (term_pks[term_id], term_pks[related_id], rel_label)
+            for term_id, entry in staged.items()
+            for rel_label, related_id in entry['relations']
+            if term_id in term_pks and related_id in term_pks
+        }
+        removed_edges = [edge for edge in current_edges if edge not in incoming_edges]
+        added_edges = [edge for edge in incoming_edges if edge not in current_edges]
+        self._delete_in_chunks(Relationship.objects.all(), 'id', [current_edges[edge] for edge in removed_edges])
+
+        relationship_types = {}
+        for _, _, rel_label in added_edges:
+            if rel_label not in relationship_types:
+                relationship_types[rel_label], _ = RelationshipType.objects.get_or_create(
+                    label=rel_label,
+                    defaults={'slug': 'is-a' if rel_label == IS_A_LABEL else rel_label.lower().replace(' ', '-')}
+                )
+        Relationship.objects.bulk_create(
+            [
+                Relationship(type=relationship_types[rel_label], term_id=term_id, related_term_id=related_id)
+                for term_id, related_id, rel_label in added_edges
+            ],
+            batch_size=BULK_BATCH_SIZE,
+        )
+
+        closure_roots = {term.pk for term in new_terms.values()}
+        closure_roots.update(
+            term_id for term_id, _, rel_label in removed_edges + added_edges if rel_label == IS_A_LABEL
+        )
+
+        remapped_links = self._remap_individual_terms(self._term_remap(ontology, staged, term_pks))
+
+        stats = {
+            'terms_added': len(new_terms),
+            'terms_updated': len(changed_terms),
+            'synonym_sets_replaced': synonyms_replaced,
+            'cross_reference_sets_replaced': xrefs_replaced,
+            'relationships_added': len(added_edges),
+            'relationships_removed': len(removed_edges),
+            'individual_term_links_remapped': remapped_links,
+        }
+        return stats, closure_roots
+
+    def _existing_terms(self, ontology, staged):
+        """
+        {pronto id: Term} for every stored term of `ontology`. Terms store
+        their id without its prefix, so when staged ids of several prefixes
+        share one (HP:0000001, UBERON:0000001) the rows are matched by label,
+        then in load order. Rows no staged id claims are keyed by their id in
+        the ontology's own prefix.
+        """
+        rows = defaultdict(list)
+        for term in Term.objects.filter(ontology=ontology).order_by('pk'):
+            rows[term.identifier].append(term)
+        claims = defaultdict(list)
+        for term_id, entry in staged.items():
+            claims[entry['fields']['identifier']].append(term_id)
+
+        existing = {}
+        for identifier, terms in rows.items():
+            unmatched = []
+            for term_id in claims.get(identifier, []):
+                label = staged[term_id]['fields']['label']
+                match = next((term for term in terms if term.label == label), None)
+                if match is None:
+                    unmatched.append(term_id)
+                else:
+                    existing[term_id] = match
+                    terms.remove(match)
+            existing.update(zip(unmatched, terms))
+            for term in terms[len(unmatched):]:
+                term.ontology = ontology
+                existing.setdefault(term.term, term)
+        return existing
+
+    def _replace_term_rows(self, model, fields, ontology, staged, key, term_pks):
+        """Rewrite the `model` rows of every term whose staged set differs. Returns the term count."""
+        current = {}
+        for row in model.objects.filter(term__ontology=ontology).values_list('term_id', *fields):
+            current.setdefault(row[0], set()).add(tuple(row[1:]))
+
+        replaced = [
+            term_pks[term_id]
+            for term_id, entry in staged.items()
+            if term_id in term_pks and current.get(term_pks[term_id], set()) != entry[key]
+        ]
+        replaced_set = set(replaced)
+        self._delete_in_chunks(model.objects.all(), 'term_id', replaced)
+        model.objects.bulk_create(
+            [
+                model(term_id=term_pks[term_id], **dict(zip(fields, values)))
+                for term_id, entry in staged.items()
+                if term_pks.get(term_id) in replaced_set
+                for values in entry[key]
+            ],
+            batch_size=BULK_BATCH_SIZE,
+        )
+        return len(replaced)
+
+    def _term_remap(self, ontology, staged, term_pks):
+        """
+        {old term PK: current term PK} for links that should move:
+        obsolete terms with a replacement, ids merged into another term as an
+        alt_id, and terms of older loaded versions of the same ontology.
+        """
+        remap = {}
+        for term_id, entry in staged.items():
+            targets = [target for target in entry['replaced_by'] if target in term_pks]
+            if term_id in term_pks and targets:
+                remap[term_pks[term_id]] = term_pks[targets[0]]
+            for alt_id in entry['alternate_ids']:
+                if alt_id in term_pks and alt_id not in staged and term_id in term_pks:
+                    remap[term_pks[alt_id]] = term_pks[term_id]
+
+        old_version_terms = (
+            Term.objects.filter(ontology__type=ontology.type, individuals__isnull=False)
+            .exclude(ontology=ontology)
+            .values_list('id', 'identifier')
+            .distinct()
+        )
+        for old_pk, identifier in old_version_terms:
+            term_id = Term(ontology=ontology, identifier=identifier).term
+            if term_id in term_pks:
+                remap[old_pk] = term_pks[term_id]
+
+        # Follow replacement chains (obsolete -> obsolete -> live)
+        for old_pk in list(remap):
+            seen = {old_pk}
+            while remap[old_pk] in remap and remap[old_pk] not in seen:
+                seen.add(remap[old_pk])
+                remap[old_pk] = remap[remap[old_pk]]
+        return {old_pk: new_pk for old_pk, new_pk in remap.items() if old_pk != new_pk}
+
+    def _remap_individual_terms(self, remap):
+        """
+        Move Individual.hpo_terms links through the related manager so the
+        usual m2m_changed handlers run. Returns the number of links moved.
+        """
+        moved = 0
+        terms = Term.objects.in_bulk(set(remap) | set(remap.values()))
+        for old_pk, new_pk in remap.items():
+            individual_ids = list(terms[old_pk].individuals.values_list('pk', flat=True))
+            if not individual_ids:
+                continue
+            terms[new_pk].individuals.add(*individual_ids)
+            terms[old_pk].individuals.remove(*individual_ids)
+            moved += len(individual_ids)
+        return moved
+
+    def _delete_in_chunks(self, queryset, field, values, chunk_size=500):
+        for start in range(0, len(values), chunk_size):
+            queryset.filter(**{f'{field}__in': values[start:start + chunk_size]}).delete()
+
+    def _term_pk_map(self, ontology, staged_terms):
+        """Map pronto term ids to the primary keys assigned by bulk_create."""
+        if all(term.pk is not None for term in staged_terms.values()):
+            return {term_id: term.pk for term_id, term in staged_terms.items()}
+        # Backends that can't return ids from bulk inserts (e.g. MySQL).
+        pk_by_identifier = dict(
+            Term.objects.filter(ontology=ontology).values_list('identifier', 'id')
+        )
+        return {
+            term_id: pk_by_identifier[term.identifier]
+            for term_id, term in staged_terms.items()
+            if term.identifier in pk_by_identifier
+        }
+
+    def _term_alternate_ids(self, term):
+        """Alternate ids of a pronto term - adapt to current pronto API."""
+        if hasattr(term, 'alternate_ids'):
+            return term.alternate_ids
+        if hasattr(term, 'other') and 'alt_id' in term.other:
+            return term.other.get('alt_id', [])
+        return []
+
+    def _term_fields(self, term_id, term):
+        """Term model field values for a pronto term."""
+        alt_ids_str = ",".join([
+            str(self._extract_id(alt_term))
+            for alt_term in self._term_alternate_ids(term)
+        ])
+
+        # Get created_by and creation_date - adapt to current pronto API
+        created_by = ""
+        created_date = ""
+
+        if hasattr(term, 'created_by'):
+            created_by = term.created_by
+        elif hasattr(term, 'other') and 'created_by' in term.other:
+            created_by = term.other.get('created_by', [""])[0]
+
+        if hasattr(term, 'creation_date'):
+            created_date = term.creation_date
+        elif hasattr(term, 'other') and 'creation_date' in term.other:
+            created_date = term.other.get('creation_date', [""])[0]
+
+        # Get description from different possible attributes
+        description = ""
+        if hasattr(term, 'definition') and term.definition:
+            description = term.definition.value if hasattr(term.definition, 'value') else str(term.definition)
+        elif hasattr(term, 'desc') and term.desc:
+            description = term.desc
+
+        return {
+            'identifier': self._extract_id(term_id),
+            'label': term.name if hasattr(term, 'name') and term.name else "",
+            'description': description,
+            'created_by': created_by,
+            'created': created_date,
+            'alternate_ids': alt_ids_str,
+        }
+
+    def _term_synonyms(self, term):
+        """(description, scope) pairs for a pronto term - adapt to current pronto API."""
+        synonyms = []
+        if hasattr(term, 'synonyms'):
+            for synonym in term.synonyms:
+                if hasattr(synonym, 'scope') and hasattr(synonym, 'description'):
+                    synonyms.append((synonym.description, self._get_scope_id(synonym.scope)))
+                elif hasattr(synonym, 'scope') and hasattr(synonym, 'value'):
+                    synonyms.append((synonym.value, self._get_scope_id(synonym.scope)))
+        return synonyms
+
+    def _term_xrefs(self, term):
+        """(source, source_value) pairs for a pronto term - adapt to current pronto API."""
+        xrefs = []
+        if hasattr(term, 'xrefs'):
+            xrefs = term.xrefs
+        elif hasattr(term, 'other') and 'xref' in term.other:
+            xrefs = term.other.get('xref', [])
+
+        rows = []
+        for xref in xrefs:
+            xref_str = xref.id
+            if ':' in xref_str:
+                xref_data = xref_str.split(':', 1)
+
+                # Skip malformed xrefs
+                if len(xref_data) != 2 or xref_data[0].upper() == 'HTTP':
+                    logger.warning(f'CrossReference: {xref_str} format not supported!')
+                    continue
+
+                rows.append((xref_data[0], xref_data[1]))
+        return rows
+
+    def _term_replaced_by(self, term):
+        """Pronto ids an obsolete pronto term was replaced by."""
+        if not getattr(term, 'obsolete', False):
+            return []
+        replaced_by = getattr(term, 'replaced_by', None) or []
+        if not replaced_by and hasattr(term, 'other'):
+            replaced_by = term.other.get('replaced_by', [])
+        return [str(getattr(target, 'id', target)).strip() for target in replaced_by]
+
+    def _term_relations(self, term_id, term):
+        """Yield (relationship label, related pronto id) for a pronto term."""
+        # Add is_a relationships (superclasses)
+        for parent in term.superclasses(distance=1):
+            if parent.id != term_id:  # Skip self-references
+                yield 'is_a', parent.id
+
+        # Add other relationships
+        if hasattr(term, 'relationships'):
+            for rel_type, related_terms in term.relationships.items():
+                rel_type_str = str(rel_type)
+                if "Relationship('" in rel_type_str:
+                    rel_type_str = rel_type_str.replace("Relationship('", "").replace("')", "")
+
+                # Skip is_a relationships as they're handled separately
+                if rel_type_str.lower() == 'is_a':
+                    continue
+
+                for related_term in related_terms:
+                    yield rel_type_str, str(related_term.id) if hasattr(related_term, 'id') else str(related_term)
 
     def _extract_id(self, value):
         """Extract the ID part from an ontology term identifier"""
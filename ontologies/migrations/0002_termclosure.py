@@ -0,0 +1,30 @@
+# Generated by Django 6.0rc1 on 2026-10-17 09:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ontologies', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TermClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveSmallIntegerField()),
+                ('ancestor', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='ontologies.term')),
+                ('descendant', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='ontologies.term')),
+                ('ontology', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='closure', to='ontologies.ontology')),
+            ],
+            options={
+                'verbose_name': 'Term Closure',
+                'verbose_name_plural': 'Term Closures',
+                'indexes': [models.Index(fields=['descendant', 'ancestor'], name='term_closure_desc_anc_idx')],
+                'constraints': [models.UniqueConstraint(fields=('ancestor', 'descendant'), name='unique_term_closure_pair')],
+            },
+        ),
+    ]
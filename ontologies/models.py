@@ -172,3 +172,45 @@ class Relationship(models.Model):
 
     def __str__(self):
         return str(self.term)
+
+
+class TermClosure(models.Model):
+    """Transitive is_a closure of an ontology version.
+
+    One row per (ancestor, descendant) pair, including the depth-0 self pair,
+    so "this term or anything below it" is a single indexed lookup.
+    """
+    ontology = models.ForeignKey(
+        'Ontology',
+        related_name='closure',
+        on_delete=models.CASCADE,
+    )
+    ancestor = models.ForeignKey(
+        'Term',
+        related_name='descendant_links',
+        on_delete=models.CASCADE,
+        db_index=False,
+    )
+    descendant = models.ForeignKey(
+        'Term',
+        related_name='ancestor_links',
+        on_delete=models.CASCADE,
+        db_index=False,
+    )
+    depth = models.PositiveSmallIntegerField()
+
+    class Meta:
+        verbose_name = _('Term Closure')
+        verbose_name_plural = _('Term Closures')
+        constraints = [
+            models.UniqueConstraint(
+                fields=['ancestor', 'descendant'],
+                name='unique_term_closure_pair',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['descendant', 'ancestor'], name='term_closure_desc_anc_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.ancestor} > {self.descendant} ({self.depth})'
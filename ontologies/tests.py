@@ -1,3 +1,238 @@
+import tempfile
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
 from django.test import TestCase
 
-# Create your tests here.
+from lab.models import Individual
+
+from .graph_snapshot import HPOGraphSnapshot, load_current_snapshot, write_snapshot
+from .closure import compute_closure, rebuild_term_closure, refresh_term_closure
+from .models import CrossReference, Ontology, Relationship, RelationshipType, Synonym, Term, TermClosure
+from .utils import build_hpo_snapshot, descendant_terms_queryset, get_hpo_tree_level, propagate_hpo_counts
+
+
+class TermClosureTests(TestCase):
+    def setUp(self):
+        self.ontology = Ontology.objects.create(type=1, label="test")
+        self.is_a = is_a = RelationshipType.objects.create(label="is_a", slug="is-a")
+        self.root = Term.objects.create(ontology=self.ontology, identifier="0000118", label="Phenotypic abnormality")
+        self.nervous = Term.objects.create(ontology=self.ontology, identifier="0000707", label="Nervous system")
+        self.seizure = Term.objects.create(ontology=self.ontology, identifier="0001250", label="Seizure")
+        self.other = Term.objects.create(ontology=self.ontology, identifier="0000478", label="Eye")
+        for child, parent in [
+            (self.nervous, self.root),
+            (self.seizure, self.nervous),
+            (self.seizure, self.root),
+            (self.other, self.root),
+        ]:
+            Relationship.objects.create(type=is_a, term=child, related_term=parent)
+
+    def test_compute_closure_uses_shortest_depth(self):
+        rows = set(compute_closure([1, 2, 3], {2: [1], 3: [2, 1]}))
+        self.assertIn((1, 3, 1), rows)
+        self.assertNotIn((1, 3, 2), rows)
+        self.assertIn((3, 3, 0), rows)
+
+    def test_rebuild_term_closure_and_descendant_lookup(self):
+        rebuild_term_closure(self.ontology)
+
+        self.assertTrue(
+            TermClosure.objects.filter(ancestor=self.root, descendant=self.seizure, depth=1).exists()
+        )
+        descendants = set(descendant_terms_queryset(term_ids=[self.nervous.pk]))
+        self.assertEqual(descendants, {self.nervous, self.seizure})
+
+        from_obo = set(descendant_terms_queryset(obo_ids=["HP:0000118"]))
+        self.assertEqual(from_obo, {self.root, self.nervous, self.seizure, self.other})
+
+    def test_graph_snapshot_round_trip(self):
+        snapshot = build_hpo_snapshot(self.ontology)
+        self.assertEqual(snapshot.descendants("HP:0000707"), {"HP:0001250"})
+        self.assertEqual(snapshot.ancestors("HP:0001250"), {"HP:0000118", "HP:0000707"})
+        self.assertEqual(snapshot.label("HP:0000478"), "Eye")
+
+        with tempfile.TemporaryDirectory() as root:
+            write_snapshot(snapshot, root, self.ontology.label)
+            loaded = load_current_snapshot(root)
+            self.assertEqual(sorted(loaded.children("HP:0000118")), ["HP:0000478", "HP:0000707", "HP:0001250"])
+
+    def test_refresh_term_closure_only_touches_changed_subtree(self):
+        rebuild_term_closure(self.ontology)
+        untouched = TermClosure.objects.get(ancestor=self.root, descendant=self.other)
+
+        Relationship.objects.create(type=self.is_a, term=self.nervous, related_term=self.other)
+        refreshed = refresh_term_closure(self.ontology, {self.nervous.pk})
+
+        self.assertEqual(refreshed, {self.nervous.pk, self.seizure.pk})
+        self.assertTrue(
+            TermClosure.objects.filter(ancestor=self.other, descendant=self.seizure, depth=2).exists()
+        )
+        self.assertTrue(TermClosure.objects.filter(pk=untouched.pk).exists())
+
+    def test_tree_level_counts_shared_nodes_once(self):
+        snapshot = build_hpo_snapshot(self.ontology)
+        with mock.patch("ontologies.utils.get_hpo_graph", return_value=snapshot):
+            counts = propagate_hpo_counts({"HP:0001250": {1, 2}, "HP:0000707": {2}})
+            roots = get_hpo_tree_level(counts)
+            children = get_hpo_tree_level(counts, parent="HP:0000118")
+
+        self.assertEqual(counts["HP:0000118"], (2, 0))
+        self.assertEqual([node["identifier"] for node in roots], ["HP:0000118"])
+        self.assertTrue(roots[0]["has_children"])
+        by_id = {node["identifier"]: node for node in children}
+        self.assertEqual(set(by_id), {"HP:0000707", "HP:0001250"})
+        self.assertEqual(by_id["HP:0001250"]["parent_count"], 2)
+        self.assertEqual(by_id["HP:0001250"]["id"], self.seizure.pk)
+
+
+class FakeTerm:
+    """The parts of a pronto Term that sync_ontology reads."""
+
+    def __init__(self, term_id, name, parents=(), alternate_ids=(), obsolete=False, replaced_by=(),
+                 synonyms=(), xrefs=()):
+        self.id = term_id
+        self.name = name
+        self.definition = ""
+        self.created_by = ""
+        self.creation_date = ""
+        self.alternate_ids = frozenset(alternate_ids)
+        self.obsolete = obsolete
+        self.replaced_by = list(replaced_by)
+        self.synonyms = [SimpleNamespace(description=synonym, scope="EXACT") for synonym in synonyms]
+        self.xrefs = [SimpleNamespace(id=xref) for xref in xrefs]
+        self.relationships = {}
+        self.parents = [SimpleNamespace(id=parent) for parent in parents]
+
+    def superclasses(self, distance=None):
+        # pronto includes the term itself at distance 0.
+        return [self, *self.parents]
+
+
+def fake_ontology(version, *terms):
+    by_id = {term.id: term for term in terms}
+    return SimpleNamespace(items=by_id.items, metadata=SimpleNamespace(data_version=version))
+
+
+class SyncOntologyTests(TestCase):
+    def setUp(self):
+        for target in ("ontologies.utils.write_hpo_snapshot", "lab.hpo_frequency.get_hpo_graph"):
+            patcher = mock.patch(target, return_value=HPOGraphSnapshot.from_edges({}, []))
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user(username="syncuser", password="password")
+        self.first_release = fake_ontology(
+            "v1",
+            FakeTerm("HP:0000001", "All"),
+            FakeTerm("UBERON:0000001", "anatomical entity"),
+            FakeTerm("HP:0000118", "Phenotypic abnormality", parents=["HP:0000001"]),
+            FakeTerm("HP:0000707", "Nervous system", parents=["HP:0000118"], synonyms=["Neurological"]),
+            FakeTerm("HP:0001250", "Seizure", parents=["HP:0000707", "HP:0000118"], xrefs=["UMLS:C0036572"]),
+            FakeTerm("HP:0000005", "Mode of inheritance", parents=["HP:0000001"]),
+            FakeTerm("HP:0000006", "Nervous system abnormality", parents=["HP:0000118"]),
+        )
+
+    def sync(self, data, *args):
+        with mock.patch("pronto.Ontology", return_value=data):
+            call_command("sync_ontology", "--ontology=HP", *args, stdout=StringIO())
+
+    def edges(self, ontology):
+        return {
+            (relationship.term.identifier, relationship.related_term.label)
+            for relationship in Relationship.objects.filter(term__ontology=ontology, type__label="is_a")
+            .select_related("term", "related_term")
+        }
+
+    def test_full_load_creates_terms_synonyms_and_relations(self):
+        self.sync(self.first_release)
+
+        ontology = Ontology.objects.get(type=1, label="v1")
+        self.assertEqual(Term.objects.filter(ontology=ontology).count(), 7)
+        self.assertEqual(
+            list(Synonym.objects.values_list("term__identifier", "description", "scope")),
+            [("0000707", "Neurological", 1)],
+        )
+        self.assertEqual(
+            list(CrossReference.objects.values_list("term__identifier", "source", "source_value")),
+            [("0001250", "UMLS", "C0036572")],
+        )
+        self.assertEqual(
+            self.edges(ontology),
+            {
+                ("0000118", "All"),
+                ("0000707", "Phenotypic abnormality"),
+                ("0001250", "Nervous system"),
+                ("0001250", "Phenotypic abnormality"),
+                ("0000005", "All"),
+                ("0000006", "Phenotypic abnormality"),
+            },
+        )
+        self.assertTrue(TermClosure.objects.filter(ancestor__label="All", descendant__label="Seizure").exists())
+
+    def test_failed_load_rolls_back_the_whole_version(self):
+        with mock.patch(
+            "ontologies.management.commands.sync_ontology.rebuild_term_closure", side_effect=RuntimeError("boom")
+        ):
+            with self.assertRaises(RuntimeError):
+                self.sync(self.first_release)
+
+        self.assertFalse(Ontology.objects.exists())
+        self.assertFalse(Term.objects.exists())
+        self.assertFalse(Synonym.objects.exists())
+        self.assertFalse(Relationship.objects.exists())
+
+    def test_diff_updates_terms_relations_and_remaps_individuals(self):
+        older = Ontology.objects.create(type=1, label="v0")
+        older_nervous = Term.objects.create(ontology=older, identifier="0000707", label="Nervous system")
+        self.sync(self.first_release)
+        ontology = Ontology.objects.get(type=1, label="v1")
+        terms = {term.identifier: term for term in Term.objects.filter(ontology=ontology).exclude(label="anatomical entity")}
+        obsolete, merged, previous = (
+            Individual.objects.create(full_name=name, created_by=self.user) for name in ("A", "B", "C")
+        )
+        obsolete.hpo_terms.add(terms["0000005"])
+        merged.hpo_terms.add(terms["0000006"])
+        previous.hpo_terms.add(older_nervous)
+
+        self.sync(
+            fake_ontology(
+                "v2",
+                FakeTerm("HP:0000001", "All"),
+                FakeTerm("UBERON:0000001", "anatomical entity"),
+                FakeTerm("HP:0000118", "Phenotypic abnormality", parents=["HP:0000001"]),
+                FakeTerm(
+                    "HP:0000707",
+                    "Abnormality of the nervous system",
+                    parents=["HP:0000118", "UBERON:0000001"],
+                    alternate_ids=["HP:0000006"],
+                    synonyms=["Neurological"],
+                ),
+                FakeTerm("HP:0001250", "Seizure", parents=["HP:0000707"], xrefs=["UMLS:C0036572"]),
+                FakeTerm("HP:0000005", "obsolete Mode of inheritance", obsolete=True, replaced_by=["HP:0001250"]),
+            ),
+            "--diff",
+        )
+
+        ontology.refresh_from_db()
+        self.assertEqual(ontology.label, "v2")
+        self.assertEqual(Term.objects.filter(ontology=ontology).count(), 7)
+        self.assertEqual(Term.objects.get(pk=terms["0000707"].pk).label, "Abnormality of the nervous system")
+        self.assertEqual(
+            self.edges(ontology),
+            {
+                ("0000118", "All"),
+                ("0000707", "Phenotypic abnormality"),
+                # The UBERON parent, not HP:0000001 with the same number.
+                ("0000707", "anatomical entity"),
+                ("0001250", "Abnormality of the nervous system"),
+            },
+        )
+        self.assertTrue(
+            TermClosure.objects.filter(ancestor__label="anatomical entity", descendant__label="Seizure").exists()
+        )
+        self.assertEqual(list(obsolete.hpo_terms.all()), [terms["0001250"]])
+        self.assertEqual(list(merged.hpo_terms.all()), [terms["0000707"]])
+        self.assertEqual(list(previous.hpo_terms.all()), [terms["0000707"]])
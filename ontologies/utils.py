@@ -5,17 +5,21 @@ import fastobo
 import networkx as nx
 from django.conf import settings
 from functools import lru_cache
+from django.db.models import Q
 from collections import defaultdict
 from django.core.cache import cache
-from .models import Term
+from .graph_snapshot import HPOGraphSnapshot, load_current_snapshot, write_snapshot
+from .models import Relationship, Term, TermClosure
 
 HBO_URL = "https://purl.obolibrary.org/obo/hp.obo"
 ONTOLOGY_DIR = os.path.join(settings.MEDIA_ROOT, 'ontologies')
 OBO_PATH = os.path.join(ONTOLOGY_DIR, 'hp.obo')
+HPO_SNAPSHOT_DIR = os.path.join(ONTOLOGY_DIR, 'hp_graph')
 HPO_DESCENDANT_CACHE_VERSION_KEY = "hpo_descendant_cache_version"
 HPO_DESCENDANT_CACHE_TTL = 60 * 60 * 24
+HPO_ONTOLOGY_TYPE = 1
 
-# get_global_hpo_tree removed as part of HPO optimization
+# get_global_hpo_tree and get_hpo_tree removed as part of HPO optimization
 
 OBO_PATH = os.path.join(ONTOLOGY_DIR, 'hp.obo')
 
@@ -74,141 +78,133 @@ def load_hpo_graph():
                     
     return graph
 
-def get_hpo_tree(used_term_ids):
+@lru_cache(maxsize=1)
+def _hpo_snapshot_from_obo():
+    return HPOGraphSnapshot.from_networkx(load_hpo_graph())
+
+
+def get_hpo_graph():
     """
-    Builds a tree structure of HPO terms given a list of used IDs.
-    Uses NetworkX graph to find full ancestry.
+    The HPO is_a graph as an HPOGraphSnapshot.
+
+    Prefers the memory-mapped snapshot written by sync_ontology (shared by all
+    worker processes); only falls back to downloading/parsing hp.obo when no
+    snapshot has been built yet.
     """
-    if not used_term_ids:
-        return []
+    snapshot = load_current_snapshot(HPO_SNAPSHOT_DIR)
+    if snapshot is not None:
+        return snapshot
+    return _hpo_snapshot_from_obo()
 
-    graph = load_hpo_graph()
-    
-    # Set of interest: used IDs + all their ancestors
-    # Ancestors in our Parent->Child graph correspond to nodes that can reach the used ID?
-    # Wait, if edges are Parent -> Child:
-    # Ancestors of X are nodes that have path TO X.
-    # nx.ancestors(G, source) returns all nodes having a path to source.
-    # So yes, ancestors(child) -> parents.
-    
-    relevant_ids = set()
-    cleaned_used_ids = set()
-    
-    # Resolve numeric/string IDs
-    # Our DB stores IDs often without prefix "HP:", or maybe with? 
-    # Term.identifier stores "0000118".
-    # OBO file uses "HP:0000118".
-    # We need a mapping/helper.
-    # Assuming DB Term.identifier is just digits, lets check models.
-    # Term.term property returns f'HP:{self.identifier}'.
-    # So we should convert DB IDs to OBO IDs ("HP:" + id) for graph lookup.
-    
-    # Fetch DB objects for used IDs to get correct identifiers
-    if not used_term_ids:
-         return []
-         
-    # used_term_ids might be IDs (PKs) or strings?
-    # The view passes used_ids which are Term PKs? No, values_list('hpo_terms', flat=True) -> Term PKs.
-    # We need to get the actual Term objects to get the identifier.
-    
-    used_db_terms = Term.objects.filter(id__in=used_term_ids)
-    
-    # Map DB ID -> OBO ID
-    db_id_to_obo = {t.id: t.term for t in used_db_terms} # t.term is "HP:00123"
-    obo_to_db_term = {t.term: t for t in used_db_terms}
-    
-    # Set of OBO IDs we want
-    target_obo_ids = set(db_id_to_obo.values())
-    
-    final_obo_ids = set()
-    
-    for obo_id in target_obo_ids:
-        if obo_id in graph:
-            final_obo_ids.add(obo_id)
-            # Add ancestors (nodes strictly above)
-            final_obo_ids.update(nx.ancestors(graph, obo_id))
-        else:
-            # Term might be obsolete or missing from OBO
-            print(f"Warning: Term {obo_id} not found in HPO graph.")
-            # Add it anyway? No, can't structure it.
-            # But we should show it if it's used.
-            # Maybe show as root?
-            final_obo_ids.add(obo_id)
-
-    # Now we have a set of OBO IDs (strings like "HP:000123")
-    # We need to fetch/create Term objects for them to pass to template.
-    # The DB might not have all ancestors. We might need to construct dummy objects or
-    # rely on what's in DB.
-    # Requirement: "Show in hierarchical order".
-    # Ideally we use DB terms.
-    # If ancestor not in DB, we can't show label easily without parsing OBO labels (fastobo provides names).
-    # Refactor: load_hpo_graph should ideally return frame map or we re-read names?
-    # fastobo loads names. We can store them in graph nodes.
-    
-    # Let's verify if we need to show labels for ancestors not in DB.
-    # Probably yes.
-    # Let's update load_hpo_graph to store attributes.
-    
-    # For now, let's assume we only strictly need what's in DB + structure?
-    # If an ancestor is missing from DB, we can't link the tree visually unless we show a placeholder.
-    # Better: Ensure DB is synced? No, that's a separate task.
-    # We should render the tree using OBO data primarily for structure/labels, 
-    # and mark "used" ones based on DB selection.
-    
-    # Let's refine the node builder.
-    
-    # Subgraph for the view
-    subgraph = graph.subgraph(final_obo_ids)
-    
-    # Root nodes in subgraph: in_degree 0
-    roots = [n for n in subgraph.nodes() if subgraph.in_degree(n) == 0]
-    
-    # Helper to get label
-    # We can fetch labels from DB for existing ones, and OBO for others?
-    # Assuming fastobo didn't save labels in graph, we might want to.
-    
-    # Re-loading graph with labels is expensive.
-    # Let's try to fetch all corresponding Terms from DB first.
-    # We need to look up by identifier (strip "HP:").
-    
-    all_identifiers = [oid.split(':')[1] for oid in final_obo_ids if ':' in oid]
-    db_terms = Term.objects.filter(identifier__in=all_identifiers, ontology__type=1) # 1=HP
-    obo_id_to_db_term = {t.term: t for t in db_terms}
-    
-    def get_node_label(obo_id):
-        if obo_id in obo_id_to_db_term:
-            return obo_id_to_db_term[obo_id].label
-        # Fallback to OBO label? 
-        # We need to store it in graph or reload.
-        # Let's update load_hpo_graph to store name.
-        if 'name' in graph.nodes[obo_id]:
-             return graph.nodes[obo_id]['name']
-        return obo_id
-
-    def build_node(obo_id):
-        db_term = obo_id_to_db_term.get(obo_id)
-        is_used = db_term and db_term.id in db_id_to_obo # Check if this DB term ID was in input
-        
-        node = {
-            'id': db_term.id if db_term else obo_id, # Value for checkbox. If no DB ID, can't select?
-            'label': get_node_label(obo_id),
+
+def build_hpo_snapshot(ontology):
+    """Compile the is_a graph of a synced ontology version from the database."""
+    prefix = ontology.get_type_display()
+    identifiers = dict(
+        Term.objects.filter(ontology=ontology).values_list('id', 'identifier').iterator(chunk_size=5000)
+    )
+    labels = {
+        f"{prefix}:{identifier}": label
+        for identifier, label in Term.objects.filter(ontology=ontology)
+        .values_list('identifier', 'label').iterator(chunk_size=5000)
+    }
+    edges = (
+        (f"{prefix}:{identifiers[parent_id]}", f"{prefix}:{identifiers[term_id]}")
+        for term_id, parent_id in Relationship.objects.filter(
+            term__ontology=ontology, type__label='is_a'
+        ).values_list('term_id', 'related_term_id').iterator(chunk_size=5000)
+        if term_id in identifiers and parent_id in identifiers
+    )
+    return HPOGraphSnapshot.from_edges(labels, edges)
+
+
+def write_hpo_snapshot(ontology):
+    """Build and publish the snapshot for an HP ontology version. Returns its directory."""
+    return write_snapshot(build_hpo_snapshot(ontology), HPO_SNAPSHOT_DIR, ontology.label or ontology.pk)
+
+
+def propagate_hpo_counts(term_members):
+    """
+    Cohort counts for the HPO tree.
+
+    term_members maps used OBO IDs to the members (e.g. Individual PKs)
+    annotated with them. Returns {obo_id: (propagated_count, direct_count)}
+    for every used term and all of its ancestors; a member is counted once
+    per node even when several of its terms sit below it.
+    """
+    graph = get_hpo_graph()
+    members_by_node = defaultdict(set)
+    direct = {}
+    for obo_id, members in term_members.items():
+        members = set(members)
+        direct[obo_id] = len(members)
+        members_by_node[obo_id] |= members
+        index = graph.index(obo_id)
+        if index is None:
+            continue
+        for ancestor in graph.obo_ids(graph.reachable([index], 'up')):
+            members_by_node[ancestor] |= members
+    return {
+        obo_id: (len(members), direct.get(obo_id, 0))
+        for obo_id, members in members_by_node.items()
+    }
+
+
+def get_hpo_tree_level(node_counts, parent=None):
+    """
+    One level of the cohort HPO tree: the children of `parent` (or the roots).
+
+    node_counts comes from propagate_hpo_counts; only nodes with a count are
+    shown. Each node is returned once, referenced by its OBO ID, so terms with
+    several parents are never copied into each parent's subtree - the client
+    asks for a node's children only when it is expanded.
+    """
+    graph = get_hpo_graph()
+    if parent:
+        parent = _normalize_obo_id(parent)
+        level_ids = [obo_id for obo_id in graph.children(parent) if obo_id in node_counts]
+    else:
+        # Terms missing from the graph (obsolete/unknown) are shown as roots.
+        level_ids = [
+            obo_id for obo_id in node_counts
+            if not any(parent_id in node_counts for parent_id in graph.parents(obo_id))
+        ]
+
+    identifiers = [obo_id.split(':', 1)[1] for obo_id in level_ids if ':' in obo_id]
+    db_terms = {
+        term.term: term
+        for term in Term.objects.filter(
+            identifier__in=identifiers, ontology__type=HPO_ONTOLOGY_TYPE
+        ).select_related('ontology').order_by('ontology_id')
+    }
+
+    nodes = []
+    for obo_id in level_ids:
+        db_term = db_terms.get(obo_id)
+        count, direct_count = node_counts[obo_id]
+        parent_ids = graph.parents(obo_id)
+        nodes.append({
+            'id': db_term.id if db_term else obo_id,
             'identifier': obo_id,
+            'label': db_term.label if db_term else graph.label(obo_id),
             'term': db_term,
-            'is_used': bool(is_used),
-            'children': [],
-            # If no DB term, we can't filter by it backend-wise easily unless we pass OBO ID.
-            # The filter expects Term IDs.
-            # If intermediate node is not in DB, user can't select it? 
-            # Or we disable checkbox.
-            'selectable': bool(db_term) 
-        }
-        
-        children = sorted([n for n in subgraph.successors(obo_id)], key=lambda x: get_node_label(x))
-        node['children'] = [build_node(child) for child in children]
-        return node
-        
-    tree = [build_node(root) for root in sorted(roots, key=lambda x: get_node_label(x))]
-    return tree
+            'count': count,
+            'direct_count': direct_count,
+            'is_used': direct_count > 0,
+            'has_children': any(child in node_counts for child in graph.children(obo_id)),
+            'parent_count': sum(1 for parent_id in parent_ids if parent_id in node_counts),
+            # The filter expects Term PKs, so terms missing from the DB can't be selected.
+            'selectable': bool(db_term),
+        })
+    nodes.sort(key=lambda node: (-node['count'], node['label']))
+    return nodes
+
+
+def _graph_descendant_obo_ids(obo_ids):
+    graph = get_hpo_graph()
+    start = graph.indices(obo_ids)
+    return set(obo_ids) | set(graph.obo_ids(graph.reachable(start, 'down')))
+
 
 def get_descendants(term_ids):
     """
@@ -231,17 +227,21 @@ def get_descendants(term_ids):
     if cached is not None:
         return set(cached)
 
-    graph = load_hpo_graph()
-    
+    if hpo_closure_available():
+        descendant_ids = set(
+            descendant_terms_queryset(term_ids=normalized_term_ids).values_list('id', flat=True)
+        )
+        cache.set(
+            _descendant_cache_key("db", normalized_term_ids),
+            list(descendant_ids),
+            HPO_DESCENDANT_CACHE_TTL,
+        )
+        return descendant_ids
+
     # Convert DB PKs to OBO IDs
     terms = Term.objects.filter(id__in=normalized_term_ids)
-    obo_ids = [t.term for t in terms]
-    
-    all_descendants_obo = set(obo_ids)
-    for oid in obo_ids:
-        if oid in graph:
-            all_descendants_obo.update(nx.descendants(graph, oid))
-            
+    all_descendants_obo = _graph_descendant_obo_ids([t.term for t in terms])
+
     # Convert back to DB PKs
     # Extract identifiers
     identifiers = [oid.split(':')[1] for oid in all_descendants_obo if ':' in oid]
@@ -268,13 +268,19 @@ def get_descendants_from_obo(obo_ids):
     if cached is not None:
         return set(cached)
 
-    graph = load_hpo_graph()
-    
-    all_descendants_obo = set(normalized_obo_ids)
-    for oid in normalized_obo_ids:
-        if oid in graph:
-            all_descendants_obo.update(nx.descendants(graph, oid))
-            
+    if hpo_closure_available():
+        descendant_ids = set(
+            descendant_terms_queryset(obo_ids=normalized_obo_ids).values_list('id', flat=True)
+        )
+        cache.set(
+            _descendant_cache_key("obo", normalized_obo_ids),
+            list(descendant_ids),
+            HPO_DESCENDANT_CACHE_TTL,
+        )
+        return descendant_ids
+
+    all_descendants_obo = _graph_descendant_obo_ids(normalized_obo_ids)
+
     # Convert back to DB PKs
     identifiers = [oid.split(':')[1] for oid in all_descendants_obo if ':' in oid]
     descendant_ids = set(
@@ -289,6 +295,76 @@ def get_descendants_from_obo(obo_ids):
     return descendant_ids
 
 
+def descendant_terms_queryset(term_ids=(), obo_ids=()):
+    """
+    HPO Terms (any loaded version) that are one of the given terms or below them.
+
+    Uses the materialized TermClosure table, so the result stays a subquery
+    and can be embedded as `hpo_terms__in=...` without a parameter list.
+    Terms are matched by identifier so individuals linked to an older HPO
+    release still match the current hierarchy.
+    """
+    ancestor_q = Q()
+    if term_ids:
+        ancestor_q |= Q(ancestor__identifier__in=Term.objects.filter(pk__in=term_ids).values('identifier'))
+    identifiers = [
+        _normalize_obo_id(obo_id).split(':', 1)[1]
+        for obo_id in obo_ids
+        if obo_id and ':' in _normalize_obo_id(obo_id)
+    ]
+    if identifiers:
+        ancestor_q |= Q(ancestor__identifier__in=identifiers)
+    if not ancestor_q:
+        return Term.objects.none()
+
+    descendant_identifiers = (
+        TermClosure.objects.filter(ancestor_q, ontology__type=HPO_ONTOLOGY_TYPE)
+        .values('descendant__identifier')
+    )
+    return Term.objects.filter(
+        ontology__type=HPO_ONTOLOGY_TYPE,
+        identifier__in=descendant_identifiers,
+    )
+
+
+def hpo_descendant_term_ids(values):
+    """
+    Resolve filter values (Term PKs or OBO IDs) to their descendant Term PKs.
+
+    Returns a PK subquery when the closure table is populated, otherwise falls
+    back to the graph walk and returns a set of PKs. Either is accepted by
+    `hpo_terms__in=`.
+    """
+    db_ids = set()
+    obo_ids = set()
+    for value in values:
+        try:
+            db_ids.add(int(value))
+        except (TypeError, ValueError):
+            if value:
+                obo_ids.add(str(value))
+
+    if hpo_closure_available():
+        return descendant_terms_queryset(term_ids=db_ids, obo_ids=obo_ids).values('pk')
+
+    term_ids = set()
+    if db_ids:
+        term_ids.update(get_descendants(db_ids))
+    if obo_ids:
+        term_ids.update(get_descendants_from_obo(obo_ids))
+    return term_ids
+
+
+def hpo_closure_available():
+    """True once the HPO closure table has been populated (see sync_ontology)."""
+    key = f"hpo_closure_available:v{cache.get(HPO_DESCENDANT_CACHE_VERSION_KEY, 1)}"
+    available = cache.get(key)
+    if available is None:
+        available = TermClosure.objects.filter(ontology__type=HPO_ONTOLOGY_TYPE).exists()
+        cache.set(key, available, HPO_DESCENDANT_CACHE_TTL)
+    return available
+
+
 def bump_hpo_descendant_cache_version():
     cache.set(
         HPO_DESCENDANT_CACHE_VERSION_KEY,
@@ -27,6 +27,13 @@ environ.Env.read_env(os.path.join(BASE_DIR, ".env"))
 
 
 FIELD_ENCRYPTION_KEY = env("FIELD_ENCRYPTION_KEY")
+# Key for the HMAC blind index over Individual.full_name tokens (lab.name_index).
+# Derived from FIELD_ENCRYPTION_KEY when unset; changing it requires `rebuild_name_index`.
+NAME_BLIND_INDEX_KEY = env("NAME_BLIND_INDEX_KEY", default="")
+
+# Evaluate the individual list's status/type/project facets with the in-memory
+# numpy bitmaps of lab.facet_bitmaps instead of per-facet SQL subqueries.
+FACET_BITMAP_INDEX = env.bool("FACET_BITMAP_INDEX", default=False)
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.1/howto/deployment/checklist/
@@ -40,7 +47,7 @@ DEBUG = env("DEBUG")
 ALLOWED_HOSTS = env.list("ALLOWED_HOSTS")
 
 # Marimo configuration
-PLOT_ALLOWED_MODELS = ['Individual', 'Sample', 'Test', 'Analysis', 'Pipeline', 'Project', 'Variant']
+PLOT_ALLOWED_MODELS = ['Individual', 'Sample', 'Test', 'Analysis', 'Pipeline', 'Project', 'Variant', 'HPOTermFrequency']
 MARIMO_NOTEBOOKS_DIR = BASE_DIR / 'lab/notebooks'
 # URL the *browser* uses to load `marimo run` (iframes, links). Use a host/port reachable from
 # the user’s machine — not an internal Docker service name unless the browser can resolve it.
@@ -78,6 +85,7 @@ INSTALLED_APPS = [
     "django_filters",
     "widget_tweaks",
     "taggit",
+    "django_tasks_db",
 ]
 
 MIDDLEWARE = [
@@ -150,6 +158,30 @@ DATABASES = {
     ),
 }
 
+# Cache
+# Shared by every gunicorn worker, so sidebar counts, HPO caches and the
+# version keys that invalidate them (lab.cache_versions) are computed once.
+# The default database cache needs `manage.py createcachetable`
+# (scripts/entrypoint.sh runs it); CACHE_URL can point elsewhere, e.g.
+# filecache:///var/tmp/rareindex_cache or redis://cache:6379/1.
+
+CACHES = {
+    "default": env.cache("CACHE_URL", default="dbcache://rareindex_cache"),
+}
+
+# Background tasks
+# List exports, notification emails and name sort-key renumbering are queued
+# in the database and run by `manage.py db_worker` (the worker service in
+# docker-compose), so they never block a request. Tests and one-off scripts
+# can set TASKS_BACKEND=django.tasks.backends.immediate.ImmediateBackend to
+# run them inline.
+
+TASKS = {
+    "default": {
+        "BACKEND": env("TASKS_BACKEND", default="django_tasks_db.DatabaseBackend"),
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
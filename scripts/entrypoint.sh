@@ -8,6 +8,7 @@ echo "Applying database migrations..."
 python manage.py makemigrations
 python manage.py makemigrations lab
 python manage.py migrate
+python manage.py createcachetable
 
 # Collect static files
 echo "Downloading frontend vendor assets..."
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from lab.cache_versions import bump_cache_versions
+from variant.models import backfill_genebe_acmg_fields
+
+
+class Command(BaseCommand):
+    help = "Fill the extracted Annotation ACMG columns from the stored GeneBe data"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        updated = backfill_genebe_acmg_fields(options["batch_size"])
+        if updated:
+            # bulk_update sends no signals.
+            bump_cache_versions("individual_filter_counts", "variant_filter_counts")
+
+        self.stdout.write(self.style.SUCCESS(f"ACMG fields backfilled: {updated} annotations updated"))
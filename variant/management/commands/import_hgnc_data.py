@@ -4,6 +4,7 @@ import io
 from django.core.management.base import BaseCommand
 from variant.models import Gene
 from django.db import transaction
+from lab.search_index import rebuild_search_values
 
 class Command(BaseCommand):
     help = 'Imports HGNC gene data from a TSV file'
@@ -81,5 +82,9 @@ class Command(BaseCommand):
                     'locus_type', 'locus_group', 'gene_family', 'uniprot_ids',
                     'pubmed_id', 'refseq_accession'
                 ], batch_size=1000)
+
+            # bulk_create/bulk_update bypass the save signals that maintain SearchValue.
+            if genes_to_create or genes_to_update:
+                rebuild_search_values(Gene)
                 
         self.stdout.write(self.style.SUCCESS(f"Successfully imported HGNC data. Total processed: {count}"))
@@ -0,0 +1,33 @@
+# Generated by Django 6.0rc1 on 2026-10-17 20:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('variant', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='annotation',
+            name='acmg_classification',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='annotation',
+            name='acmg_criteria',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='historicalannotation',
+            name='acmg_classification',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='historicalannotation',
+            name='acmg_criteria',
+            field=models.TextField(blank=True, default=''),
+        ),
+    ]
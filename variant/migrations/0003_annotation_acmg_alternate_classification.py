@@ -0,0 +1,31 @@
+# Generated by Django 6.0rc1 on 2026-10-17 22:10
+
+from django.db import migrations, models
+
+from variant.models import backfill_genebe_acmg_fields
+
+
+def backfill_acmg_fields(apps, schema_editor):
+    """Extract the ACMG columns of the GeneBe annotations stored before they existed."""
+    backfill_genebe_acmg_fields(registry=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('variant', '0002_annotation_acmg_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='annotation',
+            name='acmg_alternate_classification',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='historicalannotation',
+            name='acmg_alternate_classification',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=50),
+        ),
+        migrations.RunPython(backfill_acmg_fields, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,4 @@
+from django.apps import apps
 from django.db import models
 from django.contrib.auth.models import User
 from django.contrib.contenttypes.fields import GenericRelation
@@ -58,6 +59,10 @@ class Variant(HistoryMixin, models.Model):
             self.chromosome = f"chr{self.chromosome}"
         super().save(*args, **kwargs)
 
+    @property
+    def locus(self):
+        return f"{self.chromosome}:{self.start}-{self.end}"
+
     @property
     def hgvs_name(self):
         if hasattr(self, 'snv'):
@@ -146,12 +151,70 @@ class Repeat(Variant):
     def __str__(self):
         return f"{self.chromosome}:{self.start} ({self.repeat_unit})x{self.repeat_count}"
 
+def genebe_acmg_fields(source, data):
+    """
+    (classification, alternate classification, criteria) of a GeneBe
+    annotation. Classification and criteria are the first variant record's
+    values, else the top-level ones; the alternate is the top-level
+    classification when the record carries a different one, so both stay
+    searchable. Blank for other sources.
+    """
+    if "genebe" not in (source or "").lower() or not isinstance(data, dict):
+        return "", "", ""
+    records = data.get("variants") if isinstance(data.get("variants"), list) else []
+    record = records[0] if records and isinstance(records[0], dict) else {}
+
+    def value(values, key):
+        value = values.get(key) or ""
+        if isinstance(value, (list, tuple)):
+            value = ",".join(str(item) for item in value)
+        return str(value).strip()
+
+    record_classification = value(record, "acmg_classification")
+    top_classification = value(data, "acmg_classification")
+    alternate = top_classification if record_classification and top_classification != record_classification else ""
+    return (
+        (record_classification or top_classification)[:50],
+        alternate[:50],
+        value(record, "acmg_criteria") or value(data, "acmg_criteria"),
+    )
+
+
+ACMG_EXTRACTED_FIELDS = ["acmg_classification", "acmg_alternate_classification", "acmg_criteria"]
+
+
+def backfill_genebe_acmg_fields(batch_size=1000, registry=apps):
+    """Re-extract the ACMG fields of stored GeneBe annotations; returns the number updated."""
+    model = registry.get_model("variant", "Annotation")
+    annotations = model.objects.filter(source__icontains="genebe").only("pk", "source", "data", *ACMG_EXTRACTED_FIELDS)
+    changed = []
+    updated = 0
+    for annotation in annotations.iterator(chunk_size=batch_size):
+        fields = genebe_acmg_fields(annotation.source, annotation.data)
+        if fields == tuple(getattr(annotation, field) for field in ACMG_EXTRACTED_FIELDS):
+            continue
+        for field, value in zip(ACMG_EXTRACTED_FIELDS, fields):
+            setattr(annotation, field, value)
+        changed.append(annotation)
+        if len(changed) >= batch_size:
+            updated += model.objects.bulk_update(changed, ACMG_EXTRACTED_FIELDS)
+            changed = []
+    if changed:
+        updated += model.objects.bulk_update(changed, ACMG_EXTRACTED_FIELDS)
+    return updated
+
+
 class Annotation(models.Model):
     """Stores annotations for variants from external sources"""
     variant = models.ForeignKey(Variant, on_delete=models.CASCADE, related_name="annotations")
     source = models.CharField(max_length=100, help_text="e.g. myvariant, vep, genebe")
     source_version = models.CharField(max_length=100, null=True, blank=True)
     data = models.JSONField()
+    # Extracted from a GeneBe `data` on save (blank for other sources), so the
+    # ACMG facet counts and filters are plain indexed lookups.
+    acmg_classification = models.CharField(max_length=50, blank=True, default="", db_index=True)
+    acmg_alternate_classification = models.CharField(max_length=50, blank=True, default="", db_index=True)
+    acmg_criteria = models.TextField(blank=True, default="")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -159,6 +222,18 @@ class Annotation(models.Model):
         ordering = ["-created_at"]
         unique_together = ["variant", "source", "source_version"]
 
+    def save(self, *args, **kwargs):
+        # Covers AnnotationService._save_annotation's update_or_create and any direct save.
+        (
+            self.acmg_classification,
+            self.acmg_alternate_classification,
+            self.acmg_criteria,
+        ) = genebe_acmg_fields(self.source, self.data)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"source", "data"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, *ACMG_EXTRACTED_FIELDS}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.source} for {self.variant}"
 